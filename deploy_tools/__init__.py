@@ -1,2 +1,16 @@
-from .compile import compile_project, compile_contract  # noqa: F401
-from .deploy import deploy_compiled_contract  # noqa: F401
+import importlib
+
+# The exports are imported lazily to not load web3 and solc when only a submodule is needed,
+# for example when starting the cli
+_lazy_exports = {
+    "compile_project": "compile",
+    "compile_contract": "compile",
+    "deploy_compiled_contract": "deploy",
+}
+
+
+def __getattr__(name):
+    if name in _lazy_exports:
+        module = importlib.import_module(f".{_lazy_exports[name]}", __name__)
+        return getattr(module, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,164 @@
+"""Agent holding decrypted private keys in memory to sign transactions, similar to ssh-agent"""
+import json
+import os
+import threading
+import time
+from typing import Dict, NamedTuple, Optional, Tuple
+
+from .ipc import IPCServer, default_socket_path, is_server_running, send_request
+
+DEFAULT_KEY_TTL = 3600
+
+
+class AgentException(Exception):
+    pass
+
+
+def default_agent_socket_path() -> str:
+    """Returns the path of the socket of the agent
+
+    The path can be set via the environment variable DEPLOY_TOOLS_AGENT_SOCKET
+    """
+    socket_path = os.environ.get("DEPLOY_TOOLS_AGENT_SOCKET")
+    if socket_path:
+        return socket_path
+    return default_socket_path("deploy-tools-agent.sock")
+
+
+def get_keystore_address(keystore_path: str) -> Optional[str]:
+    """Returns the checksummed address stored unencrypted in the keystore, or None if it is not included"""
+    from eth_utils import to_checksum_address
+
+    with open(keystore_path) as keystore_file:
+        address = json.load(keystore_file).get("address")
+    if not address:
+        return None
+    return to_checksum_address(address)
+
+
+class KeyAgent:
+    """Holds private keys for at most their ttl and signs transactions with them"""
+
+    def __init__(self, *, default_ttl: float = DEFAULT_KEY_TTL):
+        self.default_ttl = default_ttl
+        self._keys: Dict[str, Tuple[bytes, float]] = {}
+        self._lock = threading.Lock()
+
+    def add_key(self, private_key: bytes, ttl: float = None) -> str:
+        from eth_account import Account
+
+        if ttl is None:
+            ttl = self.default_ttl
+        address = Account.privateKeyToAccount(private_key).address
+        with self._lock:
+            self._keys[address] = (bytes(private_key), time.monotonic() + ttl)
+        return address
+
+    def addresses(self):
+        with self._lock:
+            self._remove_expired_keys()
+            return sorted(self._keys)
+
+    def remove_all_keys(self) -> None:
+        with self._lock:
+            self._keys.clear()
+
+    def sign_transaction(self, address: str, transaction: Dict):
+        from eth_account import Account
+
+        with self._lock:
+            self._remove_expired_keys()
+            if address not in self._keys:
+                raise AgentException(f"No key for {address}")
+            private_key = self._keys[address][0]
+        return Account.signTransaction(transaction, private_key)
+
+    def handle_request(self, request: Dict):
+        method = request.get("method")
+        if method == "add_key":
+            return self.add_key(
+                bytes.fromhex(request["privateKey"]), request.get("ttl")
+            )
+        elif method == "addresses":
+            return self.addresses()
+        elif method == "remove_all_keys":
+            return self.remove_all_keys()
+        elif method == "sign_transaction":
+            signed_transaction = self.sign_transaction(
+                request["address"], request["transaction"]
+            )
+            return {
+                "rawTransaction": bytes(signed_transaction.rawTransaction).hex(),
+                "hash": bytes(signed_transaction.hash).hex(),
+            }
+        else:
+            raise AgentException(f"Unknown method: {method}")
+
+    def _remove_expired_keys(self):
+        now = time.monotonic()
+        for address, (_, expiry) in list(self._keys.items()):
+            if expiry <= now:
+                del self._keys[address]
+
+
+def create_agent_server(socket_path: str, *, default_ttl: float = DEFAULT_KEY_TTL):
+    return IPCServer(socket_path, KeyAgent(default_ttl=default_ttl).handle_request)
+
+
+class AgentSignedTransaction(NamedTuple):
+    rawTransaction: bytes
+    hash: bytes
+
+
+class AgentAccount:
+    """
+    Account whose private key is held by the agent
+
+    It can be used instead of a private key for the functions of `deploy_tools.deploy`
+    """
+
+    def __init__(self, address: str, socket_path: str = None):
+        self.address = address
+        self.socket_path = socket_path or default_agent_socket_path()
+
+    def signTransaction(self, transaction: Dict) -> AgentSignedTransaction:
+        result = send_request(
+            self.socket_path,
+            {
+                "method": "sign_transaction",
+                "address": self.address,
+                "transaction": {
+                    key: "0x" + bytes(value).hex()
+                    if isinstance(value, bytes)
+                    else value
+                    for key, value in transaction.items()
+                },
+            },
+        )
+        return AgentSignedTransaction(
+            bytes.fromhex(result["rawTransaction"]), bytes.fromhex(result["hash"])
+        )
+
+
+class AgentClient:
+    def __init__(self, socket_path: str = None):
+        self.socket_path = socket_path or default_agent_socket_path()
+
+    def is_running(self) -> bool:
+        return is_server_running(self.socket_path)
+
+    def add_key(self, private_key: bytes, ttl: float = None) -> AgentAccount:
+        address = send_request(
+            self.socket_path,
+            {"method": "add_key", "privateKey": bytes(private_key).hex(), "ttl": ttl},
+        )
+        return AgentAccount(address, self.socket_path)
+
+    def get_account(self, address: str) -> Optional[AgentAccount]:
+        """Returns the account of the agent with the address or None if the agent has no key for it"""
+        if address not in send_request(self.socket_path, {"method": "addresses"}):
+            return None
+        return AgentAccount(address, self.socket_path)
+
+    def remove_all_keys(self) -> None:
+        send_request(self.socket_path, {"method": "remove_all_keys"})
@@ -0,0 +1,315 @@
+"""Loading single compiled contracts without loading all of them, either from contracts written to one file per
+contract together with an index, or lazily from the memory mapped json file of all contracts"""
+import hashlib
+import json
+import mmap
+import os
+import re
+from collections import Counter
+from typing import Dict, Iterator, Mapping, Tuple
+
+from .cache import CompilationCache, default_cache_dir
+from .files import ensure_path_for_file_exists, load_json_asset, replace_json_asset
+
+INDEX_FILE_NAME = "index.json"
+# the contracts are written to a subdirectory, so that their names can not collide with the index
+CONTRACTS_DIR_NAME = "contracts"
+OFFSET_INDEX_CACHE_DIR_NAME = "offsets"
+
+_WHITESPACE_PATTERN = re.compile(r"[ \t\n\r]*")
+
+
+class SplitContracts(Mapping):
+    """
+    Read only mapping of the compiled contracts written with `write_split_contracts` to the directory `path`.
+
+    Only the index is loaded up front, a contract is loaded when it is accessed.
+    """
+
+    def __init__(self, path: str):
+        if os.path.basename(path) == INDEX_FILE_NAME:
+            path = os.path.dirname(path)
+        self.path = path
+        self._index: Dict[str, Dict] = load_json_asset(get_index_path(path))[
+            "contracts"
+        ]
+        self._loaded_contracts: Dict[str, Dict] = {}
+
+    def __getitem__(self, contract_name: str) -> Dict:
+        if contract_name not in self._loaded_contracts:
+            entry = self._index[contract_name]
+            if "fields" in entry:
+                contract = {
+                    field: load_json_asset(os.path.join(self.path, field_path))
+                    for field, field_path in entry["fields"].items()
+                }
+            else:
+                contract = load_json_asset(os.path.join(self.path, entry["path"]))
+            self._loaded_contracts[contract_name] = contract
+        return self._loaded_contracts[contract_name]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._index)
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def __contains__(self, contract_name) -> bool:
+        return contract_name in self._index
+
+
+def get_index_path(output_dir: str) -> str:
+    return os.path.join(output_dir, INDEX_FILE_NAME)
+
+
+def is_split_contracts_path(path: str) -> bool:
+    """Returns whether `path` is the directory or index file of contracts written with `write_split_contracts`"""
+    if os.path.basename(path) == INDEX_FILE_NAME:
+        return os.path.isfile(path)
+    return os.path.isfile(get_index_path(path))
+
+
+class LazyContractAssets(Mapping):
+    """
+    Read only mapping of the compiled contracts in the json file at `path`, which is memory mapped.
+
+    The offsets of the contracts in the file are taken from the offset index of the file in `offset_index_cache`,
+    or are found by scanning the file once. A contract is only decoded when it is accessed.
+    The offset index is keyed by the path and the version of the file, so it is rebuilt when the file changes.
+    """
+
+    def __init__(self, path: str, *, offset_index_cache: CompilationCache = None):
+        self.path = path
+        if offset_index_cache is None:
+            offset_index_cache = CompilationCache(default_offset_index_cache_dir())
+        with open(path, "rb") as file:
+            stat = os.fstat(file.fileno())
+            if stat.st_size == 0:
+                raise ValueError(f"{path} is empty")
+            self._data = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        self._offsets = self._load_offset_index(stat, offset_index_cache)
+        self._loaded_contracts: Dict[str, Dict] = {}
+
+    def __getitem__(self, contract_name: str) -> Dict:
+        if contract_name not in self._loaded_contracts:
+            start, end = self._offsets[contract_name]
+            self._loaded_contracts[contract_name] = json.loads(self._data[start:end])
+        return self._loaded_contracts[contract_name]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._offsets)
+
+    def __len__(self) -> int:
+        return len(self._offsets)
+
+    def __contains__(self, contract_name) -> bool:
+        return contract_name in self._offsets
+
+    def close(self) -> None:
+        """Closes the memory map, contracts that were not accessed yet can not be loaded afterwards"""
+        self._data.close()
+
+    def _load_offset_index(
+        self, stat, offset_index_cache: CompilationCache
+    ) -> Dict[str, Tuple[int, int]]:
+        # assets are replaced by renaming a new file over them, which changes the inode
+        key = offset_index_key(self.path, [stat.st_ino, stat.st_size, stat.st_mtime_ns])
+        offset_index = offset_index_cache.get(key)
+        if offset_index is not None:
+            try:
+                return {
+                    name: (start, end)
+                    for name, (start, end) in offset_index["offsets"].items()
+                }
+            except (ValueError, KeyError, TypeError, AttributeError):
+                pass
+
+        offsets = build_offset_index(self._data)
+        try:
+            offset_index_cache.put(key, {"offsets": offsets})
+        except OSError:
+            # the index is only an optimization, the cache directory might not be writable
+            pass
+        return offsets
+
+
+def default_offset_index_cache_dir() -> str:
+    """Returns the directory of the offset indexes of compiled contracts files,
+    the subdirectory `offsets` of the cache directory, see `default_cache_dir`"""
+    return os.path.join(default_cache_dir(), OFFSET_INDEX_CACHE_DIR_NAME)
+
+
+def offset_index_key(path: str, version) -> str:
+    """Returns the key of the offset index of the compiled contracts file at `path` in the given version"""
+    return hashlib.sha256(
+        json.dumps([os.path.abspath(path), version]).encode("utf-8")
+    ).hexdigest()
+
+
+def build_offset_index(data: bytes) -> Dict[str, Tuple[int, int]]:
+    """Returns the start and end byte offsets of the values of the top level json object in `data` by their key
+
+    Will raise `ValueError` if `data` does not contain a valid json object
+    """
+    text = bytes(data).decode("utf-8")
+    decoder = json.JSONDecoder()
+    character_offsets: Dict[str, Tuple[int, int]] = {}
+
+    index = _skip_whitespace(text, 0)
+    if text[index : index + 1] != "{":
+        raise ValueError("The compiled contracts are not a json object")
+    index = _skip_whitespace(text, index + 1)
+    if text[index : index + 1] == "}":
+        return {}
+    while True:
+        if text[index : index + 1] != '"':
+            raise ValueError(f"Expected a key at {index}")
+        key, index = json.decoder.scanstring(text, index + 1)
+        index = _skip_whitespace(text, index)
+        if text[index : index + 1] != ":":
+            raise ValueError(f"Expected ':' at {index}")
+        start = _skip_whitespace(text, index + 1)
+        # decoding the value is the fastest way to find its end, the decoded value is dropped
+        _, end = decoder.raw_decode(text, start)
+        character_offsets[key] = (start, end)
+
+        index = _skip_whitespace(text, end)
+        if text[index : index + 1] == "}":
+            break
+        if text[index : index + 1] != ",":
+            raise ValueError(f"Expected ',' or '}}' at {index}")
+        index = _skip_whitespace(text, index + 1)
+
+    if len(text) == len(data):
+        # only ascii characters, every character is a single byte
+        return character_offsets
+    return _to_byte_offsets(text, character_offsets)
+
+
+def _skip_whitespace(text: str, index: int) -> int:
+    return _WHITESPACE_PATTERN.match(text, index).end()
+
+
+def _to_byte_offsets(
+    text: str, character_offsets: Dict[str, Tuple[int, int]]
+) -> Dict[str, Tuple[int, int]]:
+    byte_offsets = {}
+    character_offset = 0
+    byte_offset = 0
+
+    def to_byte_offset(offset):
+        nonlocal character_offset, byte_offset
+        byte_offset += len(text[character_offset:offset].encode("utf-8"))
+        character_offset = offset
+        return byte_offset
+
+    # the offsets are increasing in the order of the keys
+    for key, (start, end) in character_offsets.items():
+        byte_offsets[key] = (to_byte_offset(start), to_byte_offset(end))
+    return byte_offsets
+
+
+def load_compiled_contracts(path: str) -> Mapping[str, Dict]:
+    """Loads the compiled contracts lazily either from split contracts or from a json file"""
+    if is_split_contracts_path(path):
+        return SplitContracts(path)
+    return LazyContractAssets(path)
+
+
+def write_split_contracts(
+    compiled_contracts: Mapping[str, Dict],
+    output_dir: str,
+    *,
+    split_fields=False,
+    pretty=False,
+) -> bool:
+    """
+    Writes every contract to its own file in the subdirectory `contracts` of `output_dir`, or every field of a
+    contract if `split_fields`, and writes an index of the files. The index also holds a hash of every contract,
+    so it changes with any contract.
+    Only the files whose content changed are replaced, files of contracts that were removed are deleted.
+
+    Returns: Whether any file changed
+    """
+    index_path = get_index_path(output_dir)
+    try:
+        previous_index = load_json_asset(index_path)["contracts"]
+    except (OSError, ValueError, KeyError):
+        previous_index = {}
+
+    file_names = _contract_file_names(compiled_contracts)
+    index: Dict[str, Dict] = {}
+    changed = False
+    for contract_name, contract in compiled_contracts.items():
+        entry: Dict = {"hash": _hash_contract(contract)}
+        file_name = file_names[contract_name]
+        if split_fields:
+            entry["fields"] = {}
+            for field, value in contract.items():
+                field_path = f"{CONTRACTS_DIR_NAME}/{file_name}/{field}.json"
+                entry["fields"][field] = field_path
+                changed |= _write(value, os.path.join(output_dir, field_path), pretty)
+        else:
+            entry["path"] = f"{CONTRACTS_DIR_NAME}/{file_name}.json"
+            changed |= _write(contract, os.path.join(output_dir, entry["path"]), pretty)
+        index[contract_name] = entry
+
+    # the index is written last, so that it never refers to files that are not written yet
+    changed |= _write({"contracts": index}, index_path, pretty)
+
+    written_paths = set(_entry_paths(index))
+    written_paths.add(INDEX_FILE_NAME)
+    for path in _entry_paths(previous_index):
+        if path not in written_paths:
+            try:
+                os.remove(os.path.join(output_dir, path))
+                changed = True
+            except FileNotFoundError:
+                pass
+            _remove_empty_directories(output_dir, os.path.dirname(path))
+    return changed
+
+
+def _contract_file_names(compiled_contracts: Mapping[str, Dict]) -> Dict[str, str]:
+    """Returns the name of the file or directory of every contract by its name
+
+    Names that only differ in case would refer to the same file on case insensitive file systems,
+    such names get the start of the hash of the name appended.
+    """
+    name_counts = Counter(name.lower() for name in compiled_contracts)
+    return {
+        name: name
+        if name_counts[name.lower()] == 1
+        else f"{name}-{hashlib.sha256(name.encode('utf-8')).hexdigest()[:8]}"
+        for name in compiled_contracts
+    }
+
+
+def _remove_empty_directories(output_dir: str, directory: str) -> None:
+    """Removes `directory` within `output_dir` and its parents as long as they are empty"""
+    while directory:
+        try:
+            os.rmdir(os.path.join(output_dir, directory))
+        except OSError:
+            # not empty or already removed
+            return
+        directory = os.path.dirname(directory)
+
+
+def _write(json_data, path: str, pretty: bool) -> bool:
+    ensure_path_for_file_exists(path)
+    return replace_json_asset(json_data, path, pretty=pretty)
+
+
+def _entry_paths(index: Dict[str, Dict]) -> Iterator[str]:
+    for entry in index.values():
+        if "fields" in entry:
+            yield from entry["fields"].values()
+        else:
+            yield entry["path"]
+
+
+def _hash_contract(contract: Dict) -> str:
+    return hashlib.sha256(
+        json.dumps(contract, sort_keys=True, separators=(",", ":")).encode("utf-8")
+    ).hexdigest()
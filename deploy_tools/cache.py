@@ -0,0 +1,125 @@
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+from pathlib import Path
+from typing import Dict, Optional
+
+DEFAULT_MAX_ENTRIES = 64
+CACHE_DIR_ENVIRONMENT_VARIABLE = "DEPLOY_TOOLS_CACHE_DIR"
+
+
+def default_cache_dir() -> str:
+    """Returns the directory used to cache compilation results
+
+    Can be changed with the environment variable `DEPLOY_TOOLS_CACHE_DIR`,
+    defaults to `deploy-tools/compile` in the users cache directory.
+    """
+    if os.environ.get(CACHE_DIR_ENVIRONMENT_VARIABLE):
+        return os.environ[CACHE_DIR_ENVIRONMENT_VARIABLE]
+    cache_home = os.environ.get("XDG_CACHE_HOME") or os.path.join(
+        os.path.expanduser("~"), ".cache"
+    )
+    return os.path.join(cache_home, "deploy-tools", "compile")
+
+
+def get_solc_identifier() -> str:
+    """Returns a string identifying the solc binary used by py-solc
+
+    The identifier is derived from the path, size and modification time of the binary,
+    so that it changes whenever another version of solc gets installed without having
+    to spawn solc to ask for its version.
+    """
+    solc_binary = shutil.which(os.environ.get("SOLC_BINARY", "solc"))
+    if solc_binary is None:
+        return "solc:<NOT FOUND>"
+    solc_binary = os.path.realpath(solc_binary)
+    stat = os.stat(solc_binary)
+    return f"{solc_binary}:{stat.st_size}:{stat.st_mtime_ns}"
+
+
+def compute_compilation_key(std_input: Dict, solc_identifier: str) -> str:
+    """Computes the key of a compilation from the standard json input and the used solc"""
+    hasher = hashlib.sha256()
+    hasher.update(solc_identifier.encode("utf-8"))
+    hasher.update(json.dumps(std_input, sort_keys=True).encode("utf-8"))
+    return hasher.hexdigest()
+
+
+class CompilationCache:
+    """
+    Content addressed on-disk cache for the output of solc.
+
+    Every entry is stored as json file named after its key. The number of entries is bounded,
+    if the cache grows too big the least recently used entries are evicted.
+    """
+
+    def __init__(self, cache_dir: str, *, max_entries: int = DEFAULT_MAX_ENTRIES):
+        if max_entries < 1:
+            raise ValueError("The cache needs to be able to hold at least one entry")
+        self.cache_dir = Path(cache_dir)
+        self.max_entries = max_entries
+
+    def key(self, std_input: Dict) -> str:
+        return compute_compilation_key(std_input, get_solc_identifier())
+
+    def _entry_path(self, key: str) -> Path:
+        return self.cache_dir / f"{key}.json"
+
+    def get(self, key: str) -> Optional[Dict]:
+        """Returns the cached entry for `key` or None if there is none"""
+        entry_path = self._entry_path(key)
+        try:
+            with entry_path.open() as entry_file:
+                entry = json.load(entry_file)
+        except (OSError, ValueError):
+            return None
+
+        # mark the entry as recently used
+        try:
+            os.utime(entry_path)
+        except OSError:
+            pass
+        return entry
+
+    def put(self, key: str, entry: Dict) -> None:
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        file_descriptor, temporary_path = tempfile.mkstemp(
+            dir=self.cache_dir, suffix=".tmp"
+        )
+        try:
+            with os.fdopen(file_descriptor, "w") as temporary_file:
+                json.dump(entry, temporary_file, separators=(",", ":"))
+            os.replace(temporary_path, self._entry_path(key))
+        except BaseException:
+            os.unlink(temporary_path)
+            raise
+        self._evict()
+
+    def clear(self) -> None:
+        for entry_path in self._entry_paths():
+            try:
+                entry_path.unlink()
+            except FileNotFoundError:
+                pass
+
+    def _entry_paths(self):
+        if not self.cache_dir.is_dir():
+            return []
+        return list(self.cache_dir.glob("*.json"))
+
+    def _evict(self) -> None:
+        entries = []
+        for entry_path in self._entry_paths():
+            try:
+                entries.append((entry_path.stat().st_mtime_ns, entry_path))
+            except FileNotFoundError:
+                pass
+
+        entries.sort()
+        for _, entry_path in entries[: max(len(entries) - self.max_entries, 0)]:
+            try:
+                entry_path.unlink()
+            except FileNotFoundError:
+                pass
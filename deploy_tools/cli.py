@@ -1,13 +1,13 @@
-from typing import Sequence
+from itertools import islice
+from typing import Dict, List, Sequence, TYPE_CHECKING
 from pathlib import Path
 from os import path
 
 import json
 import click
-from web3 import Web3, EthereumTesterProvider, Account
-from web3._utils.abi import get_constructor_abi, get_abi_input_types
-from eth_utils import encode_hex
 
+# Only light modules are imported at the module level to keep the startup of the cli fast.
+# web3, solc and the modules depending on them are imported by the commands needing them.
 from .files import (
     write_pretty_json_asset,
     ensure_path_for_file_exists,
@@ -15,21 +15,32 @@ from .files import (
     validate_and_format_address,
     InvalidAddressException,
     load_json_asset,
+    replace_json_asset,
+    iterate_csv_rows,
 )
-from .deploy import (
-    decrypt_private_key,
-    build_transaction_options,
-    deploy_compiled_contract,
-    send_function_call_transaction,
+from .manifest import (
+    load_deployment_manifest,
+    resolve_manifest_args,
+    InvalidManifestException,
 )
-from .compile import filter_contracts, UnknownContractException, compile_project
+from .assets import load_compiled_contracts
+from .cache import CompilationCache, default_cache_dir
+from .server import (
+    FORWARDED_COMMANDS,
+    active_server,
+    compiled_contracts_key,
+    forward_command,
+    is_server_available,
+)
+
+if TYPE_CHECKING:
+    from web3 import Web3  # noqa: F401
 
 
-# we need test_provider and test_json_rpc for running the tests in test_cli
-# they need to persist between multiple calls to runner.invoke and are
-# therefore initialized on the module level.
-test_provider = EthereumTesterProvider()
-test_json_rpc = Web3(test_provider)
+# we need the test chain for running the tests in test_cli
+# it needs to persist between multiple calls to runner.invoke and is
+# therefore stored on the module level. It is only created when used the first time.
+_test_json_rpc = None
 
 CONTRACTS_DIR_DEFAULT = "contracts"
 KEYSTORE_FILE_SAVE_DEFAULT = "keystore.json"
@@ -44,6 +55,20 @@ def validate_address(ctx, param, value):
         ) from e
 
 
+def validate_salt(ctx, param, value):
+    if value is None:
+        return None
+    try:
+        salt = bytes.fromhex(value[2:]) if value.startswith("0x") else None
+    except ValueError:
+        salt = None
+    if salt is None or len(salt) > 32:
+        raise click.BadParameter(
+            f"The salt needs to be a '0x' prefixed hex string of up to 32 bytes: {value}"
+        )
+    return salt.rjust(32, b"\x00")
+
+
 jsonrpc_option = click.option(
     "--jsonrpc",
     help="JsonRPC URL of the ethereum client",
@@ -97,10 +122,17 @@ evm_version_option = click.option(
     show_default=True,
     default="byzantium",
 )
+no_cache_option = click.option(
+    "--no-cache",
+    default=False,
+    help="Do not use the cache of previous compilation results. "
+    "The cache directory can be set via the environment variable DEPLOY_TOOLS_CACHE_DIR",
+    is_flag=True,
+)
 compiled_contracts_path_option = click.option(
     "--compiled-contracts",
     "compiled_contracts_path",
-    help="Path to the compiled contracts json file",
+    help="Path to the compiled contracts json file, or the directory of contracts compiled with --output-dir",
     type=click.Path(file_okay=True, exists=True),
 )
 contract_address_option = click.option(
@@ -117,6 +149,28 @@ keystore_file_save_option = click.option(
     default=KEYSTORE_FILE_SAVE_DEFAULT,
     show_default=True,
 )
+confirmations_option = click.option(
+    "--confirmations",
+    help="Number of blocks a transaction needs to be included in to be considered successful, "
+    "the progress is printed to stderr if more than one confirmation is required",
+    type=click.IntRange(min=1),
+    default=1,
+    show_default=True,
+)
+gas_multiplier_option = click.option(
+    "--gas-multiplier",
+    help="Factor the cached gas estimates are multiplied with as safety margin",
+    type=click.FloatRange(min=1),
+    default=1.2,
+    show_default=True,
+)
+state_dir_option = click.option(
+    "--state-dir",
+    help="Directory to record the deployments in, one file per network. A recorded deployment with the same name, "
+    "bytecode and arguments is reused if its code is unchanged",
+    type=click.Path(file_okay=False, writable=True),
+    default=None,
+)
 private_key_option = click.option(
     "--private-key",
     help="Private key in hex string representation",
@@ -125,9 +179,53 @@ private_key_option = click.option(
 )
 
 
-@click.group()
-def main():
-    pass
+class ForwardingGroup(click.Group):
+    """Group keeping its command line arguments to forward the command to the server of `deploy-tools serve`"""
+
+    def parse_args(self, ctx, args):
+        ctx.meta["deploy_tools.args"] = list(args)
+        return super().parse_args(ctx, args)
+
+
+@click.group(cls=ForwardingGroup)
+@click.option(
+    "--rpc-stats",
+    help="Print the number of json rpc requests and their latency to stderr",
+    is_flag=True,
+)
+@click.option(
+    "--no-server",
+    help="Run the command in this process even if `deploy-tools serve` is running",
+    is_flag=True,
+)
+@click.pass_context
+def main(ctx, rpc_stats: bool, no_server: bool):
+    args = ctx.meta["deploy_tools.args"]
+    # commands asking for the password of a keystore are not forwarded, the server can not prompt for it
+    if (
+        no_server
+        or ctx.invoked_subcommand not in FORWARDED_COMMANDS
+        or any(arg.startswith("--keystore") for arg in args)
+    ):
+        return
+
+    from .ipc import IPCException, NoResponseException
+
+    try:
+        if not is_server_available():
+            return
+        result = forward_command(args)
+    except NoResponseException as e:
+        # the command might have been run, running it again could send its transaction twice
+        raise click.ClickException(
+            f"The server did not respond, the outcome of the command is unknown: {e}"
+        ) from e
+    except IPCException as e:
+        click.echo(f"Running the command without the server: {e}", err=True)
+        return
+    click.echo(result["stdout"], nl=False)
+    click.echo(result["stderr"], nl=False, err=True)
+    ctx.exit(result["exitCode"])
 
 
 @main.command(short_help="Compile all contracts")
@@ -159,11 +257,77 @@ def main():
     show_default=True,
     default="build/contracts.json",
 )
+@no_cache_option
+@click.option(
+    "--incremental",
+    default=False,
+    help="Only recompile the files that changed since the last compilation to the same output file "
+    "and the files depending on them",
+    is_flag=True,
+)
+@click.option(
+    "--jobs",
+    "-j",
+    default=1,
+    help="Number of solc processes used to compile independent groups of contracts in parallel",
+    type=click.IntRange(min=1),
+    show_default=True,
+)
+@click.option(
+    "--watch",
+    default=False,
+    help="Keep watching the contracts and recompile them incrementally when they change, "
+    "the output file is only replaced if the compiled contracts changed",
+    is_flag=True,
+)
+@click.option(
+    "--output-dir",
+    type=click.Path(file_okay=False, writable=True),
+    default=None,
+    help="Write every contract to its own file in the subdirectory contracts of this directory "
+    "together with an index.json instead of writing all contracts to the output file",
+)
+@click.option(
+    "--split-fields",
+    default=False,
+    help="Write every field of a contract, like abi or bytecode, to its own file, requires --output-dir",
+    is_flag=True,
+)
 def compile(
-    contracts_dir, optimize, evm_version, only_abi, minimize, contract_names, output
+    contracts_dir,
+    optimize,
+    evm_version,
+    only_abi,
+    minimize,
+    contract_names,
+    output,
+    no_cache,
+    incremental,
+    jobs,
+    watch,
+    output_dir,
+    split_fields,
 ):
+    from .compile import (
+        filter_contracts,
+        UnknownContractException,
+        compile_project,
+        compile_project_incrementally,
+    )
+
     if contract_names is not None:
+        if incremental or watch:
+            raise click.BadOptionUsage(
+                "--incremental",
+                "--incremental and --watch can not be used together with --contract-names",
+            )
         contract_names = contract_names.split(",")
+    if split_fields and output_dir is None:
+        raise click.BadOptionUsage(
+            "--split-fields", "--split-fields can only be used with --output-dir"
+        )
+    if output_dir is not None:
+        output = output_dir
 
     ensure_path_for_file_exists(output)
 
@@ -171,24 +335,63 @@ def compile(
         contracts_dir = CONTRACTS_DIR_DEFAULT
     verify_contracts_dir_exists(contracts_dir)
 
-    try:
-        compiled_contracts = filter_contracts(
-            contract_names,
-            compile_project(
-                contracts_dir,
-                optimize=optimize,
-                only_abi=only_abi,
-                evm_version=evm_version,
-            ),
+    if watch:
+        compile_on_change(
+            contracts_dir,
+            output=output,
+            split=output_dir is not None,
+            split_fields=split_fields,
+            optimize=optimize,
+            only_abi=only_abi,
+            evm_version=evm_version,
+            minimize=minimize,
+            no_cache=no_cache,
+            jobs=jobs,
         )
-    except UnknownContractException as e:
-        raise click.BadOptionUsage(
-            "contract-names", f"Could not find contract: {e.args[0]}"
+        return
+
+    if incremental:
+        state_path = get_incremental_state_path(output, split=output_dir is not None)
+        previous_contracts, previous_state = load_previous_compilation(
+            output, state_path
+        )
+        compiled_contracts, state = compile_project_incrementally(
+            contracts_dir,
+            previous_contracts=previous_contracts,
+            previous_state=previous_state,
+            optimize=optimize,
+            only_abi=only_abi,
+            evm_version=evm_version,
+            cache=get_compilation_cache(no_cache),
+            jobs=jobs,
         )
-    if minimize:
-        write_minified_json_asset(compiled_contracts, output)
     else:
-        write_pretty_json_asset(compiled_contracts, output)
+        try:
+            compiled_contracts = filter_contracts(
+                contract_names,
+                compile_project(
+                    contracts_dir,
+                    optimize=optimize,
+                    only_abi=only_abi,
+                    evm_version=evm_version,
+                    cache=get_compilation_cache(no_cache),
+                    jobs=jobs,
+                ),
+            )
+        except UnknownContractException as e:
+            raise click.BadOptionUsage(
+                "contract-names", f"Could not find contract: {e.args[0]}"
+            )
+    write_compiled_contracts(
+        compiled_contracts,
+        output,
+        split=output_dir is not None,
+        split_fields=split_fields,
+        minimize=minimize,
+    )
+
+    if incremental:
+        write_minified_json_asset(state, state_path)
 
 
 @main.command(short_help="Deploys a contract")
@@ -204,6 +407,17 @@ def compile(
 @optimize_option
 @evm_version_option
 @compiled_contracts_path_option
+@no_cache_option
+@confirmations_option
+@click.option(
+    "--salt",
+    help="Deploy with CREATE2 via the deterministic deployment factory with this salt, "
+    "'0x' prefixed hex string of up to 32 bytes. Nothing is deployed if the contract already exists",
+    type=str,
+    default=None,
+    callback=validate_salt,
+)
+@state_dir_option
 def deploy(
     contract_name: str,
     args: Sequence[str],
@@ -217,6 +431,10 @@ def deploy(
     optimize,
     evm_version,
     compiled_contracts_path: str,
+    no_cache: bool,
+    confirmations: int,
+    salt: bytes,
+    state_dir: str,
 ):
     """
     Deploys a contract
@@ -224,6 +442,18 @@ def deploy(
     Deploys a contract with the name CONTRACT_NAME and the constructor arguments ARGS.
 
     """
+    from .deploy import (
+        build_transaction_options,
+        deploy_compiled_contract,
+        deploy_compiled_contract_with_create2,
+    )
+    from .deployment_state import DeploymentState
+
+    if salt is not None and state_dir is not None:
+        raise click.BadOptionUsage(
+            "state-dir", "--state-dir can not be used together with --salt"
+        )
+
     web3 = connect_to_json_rpc(jsonrpc)
     private_key = retrieve_private_key(keystore)
 
@@ -239,6 +469,7 @@ def deploy(
         optimize=optimize,
         evm_version=evm_version,
         compiled_contracts_path=compiled_contracts_path,
+        no_cache=no_cache,
     )
 
     if contract_name not in compiled_contracts:
@@ -247,16 +478,262 @@ def deploy(
     abi = compiled_contracts[contract_name]["abi"]
     bytecode = compiled_contracts[contract_name]["bytecode"]
 
-    contract = deploy_compiled_contract(
-        abi=abi,
-        bytecode=bytecode,
-        constructor_args=parse_args_to_matching_types_for_constructor(args, abi),
+    constructor_args = parse_args_to_matching_types_for_constructor(args, abi)
+    receipt_tracker = create_receipt_tracker(web3, confirmations)
+    if salt is not None:
+        try:
+            contract = deploy_compiled_contract_with_create2(
+                abi=abi,
+                bytecode=bytecode,
+                constructor_args=constructor_args,
+                web3=web3,
+                salt=salt,
+                transaction_options=transaction_options,
+                private_key=private_key,
+                receipt_tracker=receipt_tracker,
+            )
+        except ValueError as e:
+            raise click.ClickException(str(e)) from e
+    else:
+        contract = deploy_compiled_contract(
+            abi=abi,
+            bytecode=bytecode,
+            constructor_args=constructor_args,
+            web3=web3,
+            transaction_options=transaction_options,
+            private_key=private_key,
+            receipt_tracker=receipt_tracker,
+            deployment_state=DeploymentState.for_chain(state_dir, web3)
+            if state_dir is not None
+            else None,
+            name=contract_name,
+        )
+
+    click.echo(contract.address)
+
+
+@main.command(short_help="Deploys all contracts of a deployment manifest")
+@click.argument("manifest", type=click.Path(exists=True, dir_okay=False))
+@gas_price_option
+@nonce_option
+@keystore_option
+@jsonrpc_option
+@contracts_dir_option
+@optimize_option
+@evm_version_option
+@compiled_contracts_path_option
+@no_cache_option
+@confirmations_option
+@click.option(
+    "--addresses-output",
+    "-o",
+    type=click.Path(dir_okay=False, writable=True),
+    help="Path of the json file to write the addresses of the deployed contracts to",
+    show_default=True,
+    default="addresses.json",
+)
+@click.option(
+    "--simulate-gas",
+    help="Deploy the manifest on a local test chain first to estimate the gas of all deployments in one pass",
+    default=False,
+    is_flag=True,
+)
+@gas_multiplier_option
+@click.option(
+    "--parallel",
+    help="Send all deployments at once, references are resolved to the precomputed addresses of the deployments. "
+    "Use --simulate-gas if a constructor calls a referenced contract",
+    default=False,
+    is_flag=True,
+)
+@state_dir_option
+def deploy_batch(
+    manifest: str,
+    gas_price: int,
+    nonce: int,
+    keystore: str,
+    jsonrpc: str,
+    contracts_dir,
+    optimize,
+    evm_version,
+    compiled_contracts_path: str,
+    no_cache: bool,
+    confirmations: int,
+    addresses_output: str,
+    simulate_gas: bool,
+    gas_multiplier: float,
+    parallel: bool,
+    state_dir: str,
+):
+    """
+    Deploys the contracts of a deployment manifest
+
+    Deploys all contracts listed in the json file MANIFEST in one go and writes their addresses to a json file.
+    Constructor arguments can reference the address of an earlier deployment with `{"ref": name}`.
+
+    """
+    from .deploy import (
+        build_transaction_options,
+        deploy_compiled_contract,
+        increase_transaction_options_nonce,
+    )
+    from .deployment_state import DeploymentState
+    from .gas import GasEstimator
+
+    try:
+        manifest_entries = load_deployment_manifest(manifest)
+    except InvalidManifestException as e:
+        raise click.BadParameter(str(e), param_hint="MANIFEST") from e
+
+    compiled_contracts = get_compiled_contracts(
+        contracts_dir=contracts_dir,
+        optimize=optimize,
+        evm_version=evm_version,
+        compiled_contracts_path=compiled_contracts_path,
+        no_cache=no_cache,
+    )
+    for entry in manifest_entries:
+        if entry.contract_name not in compiled_contracts:
+            raise click.BadParameter(
+                f"Contract {entry.contract_name} was not found.", param_hint="MANIFEST"
+            )
+
+    web3 = connect_to_json_rpc(jsonrpc)
+    # the addresses of the deployments by their name, filled while deploying
+    addresses: Dict[str, str] = {}
+    gas_estimator = None
+    if simulate_gas:
+        # the estimates of the deployments do not depend on the chain and can be used for the real deployment,
+        # the addresses of referenced deployments are matched by their name
+        gas_estimator = GasEstimator(
+            web3,
+            multiplier=gas_multiplier,
+            estimates=simulate_deployment_gas(
+                manifest_entries, compiled_contracts, gas_multiplier=gas_multiplier
+            ),
+            address_labels=addresses,
+        )
+    private_key = retrieve_private_key(keystore)
+
+    # the nonce of all transactions is allocated locally if a local key is used
+    nonce = get_nonce(
+        web3=web3,
+        nonce=nonce,
+        auto_nonce=nonce is None and private_key is not None,
+        private_key=private_key,
+    )
+    transaction_options = build_transaction_options(
+        gas=None, gas_price=gas_price, nonce=nonce
+    )
+
+    receipt_tracker = create_receipt_tracker(web3, confirmations)
+    deployment_state = (
+        DeploymentState.for_chain(state_dir, web3) if state_dir is not None else None
+    )
+    if parallel:
+        deploy_manifest_in_parallel(
+            manifest_entries,
+            compiled_contracts,
+            web3=web3,
+            transaction_options=transaction_options,
+            private_key=private_key,
+            receipt_tracker=receipt_tracker,
+            gas_estimator=gas_estimator,
+            deployment_state=deployment_state,
+            addresses=addresses,
+            addresses_output=addresses_output,
+        )
+        return
+
+    try:
+        for entry in manifest_entries:
+            abi = compiled_contracts[entry.contract_name]["abi"]
+            bytecode = compiled_contracts[entry.contract_name]["bytecode"]
+            constructor_args = parse_args_to_matching_types_for_constructor(
+                resolve_manifest_args(entry.args, addresses), abi
+            )
+            address = None
+            if deployment_state is not None:
+                address = deployment_state.find_deployment(
+                    web3,
+                    entry.name,
+                    bytecode=bytecode,
+                    constructor_args=constructor_args,
+                )
+            if address is None:
+                address = deploy_compiled_contract(
+                    abi=abi,
+                    bytecode=bytecode,
+                    constructor_args=constructor_args,
+                    web3=web3,
+                    transaction_options=transaction_options.copy(),
+                    private_key=private_key,
+                    receipt_tracker=receipt_tracker,
+                    gas_estimator=gas_estimator,
+                    deployment_state=deployment_state,
+                    name=entry.name,
+                ).address
+                # a reused deployment sends no transaction and takes no nonce
+                increase_transaction_options_nonce(transaction_options)
+
+            addresses[entry.name] = address
+            click.echo(f"{entry.name}: {address}")
+    finally:
+        ensure_path_for_file_exists(addresses_output)
+        write_pretty_json_asset(addresses, addresses_output)
+
+
+def deploy_manifest_in_parallel(
+    manifest_entries,
+    compiled_contracts,
+    *,
+    web3,
+    transaction_options,
+    private_key,
+    receipt_tracker,
+    gas_estimator,
+    deployment_state,
+    addresses,
+    addresses_output,
+):
+    """Sends all deployments of the manifest at once, the references are resolved to the precomputed addresses,
+    which are added to `addresses`"""
+    from .deploy import DeploymentPlanner
+
+    planner = DeploymentPlanner(
         web3=web3,
         transaction_options=transaction_options,
         private_key=private_key,
+        deployment_state=deployment_state,
     )
+    for entry in manifest_entries:
+        abi = compiled_contracts[entry.contract_name]["abi"]
+        addresses[entry.name] = planner.plan(
+            abi=abi,
+            bytecode=compiled_contracts[entry.contract_name]["bytecode"],
+            constructor_args=parse_args_to_matching_types_for_constructor(
+                resolve_manifest_args(entry.args, addresses), abi
+            ),
+            name=entry.name,
+        )
 
-    click.echo(contract.address)
+    try:
+        planner.deploy(receipt_tracker=receipt_tracker, gas_estimator=gas_estimator)
+    finally:
+        # if a deployment failed, only the addresses of the deployed contracts are written
+        deployed_addresses = {
+            contract.address
+            for contract in planner.reused_contracts + planner.deployed_contracts
+        }
+        deployed = {
+            name: address
+            for name, address in addresses.items()
+            if address in deployed_addresses
+        }
+        for name, address in deployed.items():
+            click.echo(f"{name}: {address}")
+        ensure_path_for_file_exists(addresses_output)
+        write_pretty_json_asset(deployed, addresses_output)
 
 
 @main.command(short_help="Sends a transaction to a contract function")
@@ -272,6 +749,8 @@ def deploy(
 @contracts_dir_option
 @compiled_contracts_path_option
 @contract_address_option
+@no_cache_option
+@confirmations_option
 def transact(
     contract_name: str,
     function_name: str,
@@ -285,7 +764,12 @@ def transact(
     contracts_dir,
     compiled_contracts_path,
     contract_address,
+    no_cache,
+    confirmations: int,
 ):
+    from eth_utils import encode_hex
+    from .deploy import build_transaction_options, send_function_call_transaction
+
     web3 = connect_to_json_rpc(jsonrpc)
     private_key = retrieve_private_key(keystore)
 
@@ -297,7 +781,9 @@ def transact(
     )
 
     compiled_contracts = get_compiled_contracts(
-        contracts_dir=contracts_dir, compiled_contracts_path=compiled_contracts_path
+        contracts_dir=contracts_dir,
+        compiled_contracts_path=compiled_contracts_path,
+        no_cache=no_cache,
     )
 
     if contract_name not in compiled_contracts:
@@ -314,11 +800,197 @@ def transact(
         web3=web3,
         transaction_options=transaction_options,
         private_key=private_key,
+        receipt_tracker=create_receipt_tracker(web3, confirmations),
     )
 
     click.echo(encode_hex(receipt.transactionHash))
 
 
+@main.command(
+    short_help="Sends a transaction to a contract function for every row of a csv file"
+)
+@click.argument("contract-name", type=str)
+@click.argument("function-name", type=str)
+@click.argument("csv-file", type=click.Path(exists=True, dir_okay=False))
+@gas_option
+@gas_price_option
+@nonce_option
+@keystore_option
+@jsonrpc_option
+@contracts_dir_option
+@compiled_contracts_path_option
+@contract_address_option
+@no_cache_option
+@confirmations_option
+@click.option(
+    "--window",
+    help="Maximum number of transactions waiting to be mined at the same time",
+    type=click.IntRange(min=1),
+    default=100,
+    show_default=True,
+)
+@click.option(
+    "--checkpoint",
+    "checkpoint_path",
+    help="Path of the file to record the progress in, to resume after a crash "
+    "[default: CSV_FILE.checkpoint.json]",
+    type=click.Path(dir_okay=False, writable=True),
+    default=None,
+)
+@click.option(
+    "--cache-gas-estimates",
+    help="Estimate the gas only once for all rows with the same arguments, if no gas is given",
+    default=False,
+    is_flag=True,
+)
+@gas_multiplier_option
+def transact_batch(
+    contract_name: str,
+    function_name: str,
+    csv_file: str,
+    gas: int,
+    gas_price: int,
+    nonce: int,
+    keystore: str,
+    jsonrpc: str,
+    contracts_dir,
+    compiled_contracts_path,
+    contract_address,
+    no_cache,
+    confirmations: int,
+    window: int,
+    checkpoint_path: str,
+    cache_gas_estimates: bool,
+    gas_multiplier: float,
+):
+    """
+    Sends a transaction for every row of a csv file
+
+    Calls the function FUNCTION_NAME of the contract CONTRACT_NAME with the values of every row of CSV_FILE
+    as arguments. The progress is recorded in a checkpoint file, a second run with the same checkpoint file
+    continues after the last processed row. Every transaction is recorded before waiting for it to be mined,
+    so that a second run only sends the rows again whose transactions can no longer be mined.
+
+    """
+    from eth_utils import encode_hex
+    from .deploy import (
+        build_transaction_options,
+        get_account,
+        pipeline_function_call_transactions,
+    )
+    from .gas import GasEstimator
+
+    if checkpoint_path is None:
+        checkpoint_path = f"{csv_file}.checkpoint.json"
+    checkpoint = load_checkpoint(checkpoint_path, csv_file)
+    if checkpoint["processedRows"] > 0:
+        click.echo(f"Resuming after row {checkpoint['processedRows']}", err=True)
+
+    web3 = connect_to_json_rpc(jsonrpc)
+    private_key = retrieve_private_key(keystore)
+
+    nonce = get_nonce(
+        web3=web3,
+        nonce=nonce,
+        auto_nonce=nonce is None and private_key is not None,
+        private_key=private_key,
+    )
+    transaction_options = build_transaction_options(
+        gas=gas, gas_price=gas_price, nonce=nonce
+    )
+
+    compiled_contracts = get_compiled_contracts(
+        contracts_dir=contracts_dir,
+        compiled_contracts_path=compiled_contracts_path,
+        no_cache=no_cache,
+    )
+
+    if contract_name not in compiled_contracts:
+        raise click.BadArgumentUsage(f"Contract {contract_name} was not found.")
+
+    contract_abi = compiled_contracts[contract_name]["abi"]
+    contract = web3.eth.contract(abi=contract_abi, address=contract_address)
+    # the row index of every function call by the index of the call
+    row_indices: List[int] = []
+
+    receipt_tracker = create_receipt_tracker(web3, confirmations)
+    if private_key is not None:
+        sender = get_account(private_key).address
+    else:
+        sender = web3.eth.defaultAccount or None
+    # the rows of a previous run whose transactions were mined are not sent again
+    completed_rows = resolve_sent_rows(
+        web3, checkpoint, sender=sender, receipt_tracker=receipt_tracker
+    )
+    replace_json_asset(checkpoint, checkpoint_path)
+
+    def function_calls():
+        for row_index, row in iterate_csv_rows(
+            csv_file, start_row=checkpoint["processedRows"]
+        ):
+            if not row or row_index in completed_rows:
+                continue
+            row_indices.append(row_index)
+            try:
+                function_abi = get_contract_matching_function(
+                    contract_abi, function_name, row
+                )
+                parsed_arguments = parse_args_to_matching_types_for_function(
+                    row, function_abi
+                )
+            except ValueError as e:
+                yield InvalidRowFunctionCall(e)
+            else:
+                yield contract.functions[function_name](*parsed_arguments)
+
+    def on_sent(index, transaction_hash, nonce):
+        checkpoint["sentRows"][str(row_indices[index])] = {
+            "transactionHash": encode_hex(transaction_hash),
+            "nonce": nonce,
+        }
+
+    def save_checkpoint():
+        # called before waiting for receipts, so the rows sent since the last wait are recorded before resuming
+        # could send them again
+        replace_json_asset(checkpoint, checkpoint_path)
+
+    outcomes = pipeline_function_call_transactions(
+        function_calls(),
+        web3=web3,
+        transaction_options=transaction_options,
+        private_key=private_key,
+        window=window,
+        receipt_tracker=receipt_tracker,
+        gas_estimator=GasEstimator(web3, multiplier=gas_multiplier)
+        if cache_gas_estimates
+        else None,
+        on_sent=on_sent,
+        before_wait=save_checkpoint,
+    )
+    try:
+        for outcome in outcomes:
+            row_index = row_indices[outcome.index]
+            if outcome.successful:
+                click.echo(encode_hex(outcome.transaction_hash))
+            else:
+                checkpoint["failedRows"].append(row_index)
+                click.echo(f"Row {row_index} failed: {outcome.error!r}", err=True)
+            set_processed_rows(checkpoint, row_index + 1)
+
+        if completed_rows:
+            set_processed_rows(
+                checkpoint, max(checkpoint["processedRows"], max(completed_rows) + 1)
+            )
+    finally:
+        save_checkpoint()
+
+    if checkpoint["failedRows"]:
+        raise click.ClickException(
+            f"Transactions of {len(checkpoint['failedRows'])} rows failed, "
+            f"see {checkpoint_path} for the failed rows"
+        )
+
+
 @main.command(short_help="Calls a contract function")
 @click.argument("contract-name", type=str)
 @click.argument("function-name", type=str)
@@ -327,6 +999,7 @@ def transact(
 @contracts_dir_option
 @compiled_contracts_path_option
 @contract_address_option
+@no_cache_option
 def call(
     contract_name: str,
     function_name: str,
@@ -335,11 +1008,14 @@ def call(
     contracts_dir,
     contract_address,
     compiled_contracts_path,
+    no_cache,
 ):
     web3 = connect_to_json_rpc(jsonrpc)
 
     compiled_contracts = get_compiled_contracts(
-        contracts_dir=contracts_dir, compiled_contracts_path=compiled_contracts_path
+        contracts_dir=contracts_dir,
+        compiled_contracts_path=compiled_contracts_path,
+        no_cache=no_cache,
     )
 
     if contract_name not in compiled_contracts:
@@ -354,12 +1030,136 @@ def call(
     click.echo(result)
 
 
+@main.command(short_help="Calls many contract functions at once")
+@click.argument("calls", type=click.File("r"), default="-")
+@jsonrpc_option
+@contracts_dir_option
+@compiled_contracts_path_option
+@no_cache_option
+@click.option(
+    "--batch-size",
+    help="Number of calls sent in one json rpc batch request",
+    type=click.IntRange(min=1),
+    default=100,
+    show_default=True,
+)
+def call_batch(
+    calls,
+    jsonrpc: str,
+    contracts_dir,
+    compiled_contracts_path,
+    no_cache,
+    batch_size: int,
+):
+    """
+    Calls contract functions in batches
+
+    Reads the calls from the file CALLS or stdin, one json object per line with the keys
+    `contract`, `address`, `function` and `args`. The calls are sent in json rpc batch requests
+    and every call is written to stdout as json object with its `result` or `error` added, in the order of CALLS.
+
+    """
+    from .rpc import call_functions
+
+    web3 = connect_to_json_rpc(jsonrpc)
+    compiled_contracts = get_compiled_contracts(
+        contracts_dir=contracts_dir,
+        compiled_contracts_path=compiled_contracts_path,
+        no_cache=no_cache,
+    )
+
+    failed_calls = 0
+    lines = (line for line in calls if line.strip())
+    while True:
+        parsed_calls = [
+            parse_batch_call(web3, compiled_contracts, line)
+            for line in islice(lines, batch_size)
+        ]
+        if not parsed_calls:
+            break
+
+        outcomes = iter(
+            call_functions(
+                web3,
+                [
+                    function_call
+                    for _, function_call, error in parsed_calls
+                    if error is None
+                ],
+            )
+        )
+        for entry, _, error in parsed_calls:
+            if error is None:
+                outcome = next(outcomes)
+                error = outcome.error
+            if error is None:
+                entry["result"] = to_json_compatible(outcome.result)
+            else:
+                entry["error"] = f"{type(error).__name__}: {error}"
+                failed_calls += 1
+            click.echo(json.dumps(entry))
+
+    if failed_calls:
+        raise click.ClickException(f"{failed_calls} calls failed")
+
+
+def parse_batch_call(web3, compiled_contracts, line: str):
+    """Parses a line of the input of call-batch
+
+    Returns: The entry of the line, its function call and None or the error if the line is invalid
+    """
+    try:
+        entry = json.loads(line)
+    except ValueError as e:
+        return {"line": line.strip()}, None, e
+    if not isinstance(entry, dict):
+        return {"line": line.strip()}, None, ValueError("Expected a json object")
+
+    try:
+        contract_name = entry["contract"]
+        if contract_name not in compiled_contracts:
+            raise ValueError(f"Contract {contract_name} was not found.")
+        # the arguments are parsed like command line arguments
+        args = [
+            arg if isinstance(arg, str) else json.dumps(arg)
+            for arg in entry.get("args", [])
+        ]
+
+        try:
+            address = validate_and_format_address(entry["address"])
+        except InvalidAddressException as e:
+            raise InvalidAddressException(
+                f"The address is not recognized to be an address: {entry['address']}"
+            ) from e
+
+        contract_abi = compiled_contracts[contract_name]["abi"]
+        contract = web3.eth.contract(abi=contract_abi, address=address)
+        function_abi = get_contract_matching_function(
+            contract_abi, entry["function"], args
+        )
+        parsed_arguments = parse_args_to_matching_types_for_function(args, function_abi)
+        return entry, contract.functions[entry["function"]](*parsed_arguments), None
+    except Exception as e:
+        return entry, None, e
+
+
+def to_json_compatible(value):
+    if isinstance(value, (bytes, bytearray)):
+        return "0x" + bytes(value).hex()
+    elif isinstance(value, (list, tuple)):
+        return [to_json_compatible(item) for item in value]
+    else:
+        return value
+
+
 @main.command(
     short_help="Generates an encrypted keystore file. Creates a new account if no private key is provided."
 )
 @keystore_file_save_option
 @private_key_option
 def generate_keystore(keystore_path: str, private_key: str):
+    from web3 import Account
+
     if path.exists(keystore_path):
         raise click.BadOptionUsage(  # type: ignore
             "--keystore-file", f"The file {keystore_path} does already exist!"
@@ -385,23 +1185,402 @@ def generate_keystore(keystore_path: str, private_key: str):
     click.echo(f"Stored keystore for {account.address} at {keystore_path}")
 
 
+agent_socket_option = click.option(
+    "--socket",
+    "socket_path",
+    help="Path of the socket of the agent [default: DEPLOY_TOOLS_AGENT_SOCKET or a socket in the runtime dir]",
+    type=click.Path(dir_okay=False),
+    default=None,
+)
+
+
+@main.group(short_help="Keeps decrypted keys in memory to sign transactions")
+def agent():
+    """
+    Keeps decrypted keys in memory to sign transactions
+
+    While the agent is running, commands using --keystore take the key from the agent instead of asking for the
+    password. Keys not yet known to the agent are added after they were decrypted.
+    """
+    pass
+
+
+@agent.command(short_help="Runs the agent")
+@agent_socket_option
+@click.option(
+    "--ttl",
+    help="Seconds after which the agent forgets a key",
+    type=click.IntRange(min=1),
+    default=3600,
+    show_default=True,
+)
+def start(socket_path: str, ttl: int):
+    """
+    Runs the agent until it is interrupted
+    """
+    from .agent import create_agent_server, default_agent_socket_path
+    from .ipc import IPCException
+
+    if socket_path is None:
+        socket_path = default_agent_socket_path()
+    try:
+        server = create_agent_server(socket_path, default_ttl=ttl)
+    except IPCException as e:
+        raise click.ClickException(str(e)) from e
+
+    click.echo(f"Agent listening on {socket_path}", err=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+@agent.command(short_help="Adds the key of a keystore to the agent")
+@click.argument("keystore", type=click.Path(exists=True, dir_okay=False))
+@agent_socket_option
+@click.option(
+    "--ttl",
+    help="Seconds after which the agent forgets the key [default: ttl of the agent]",
+    type=click.IntRange(min=1),
+    default=None,
+)
+def add(keystore: str, socket_path: str, ttl: int):
+    """
+    Decrypts the keystore KEYSTORE and adds its key to the agent
+    """
+    from .agent import AgentClient
+    from .ipc import IPCException
+
+    agent_client = AgentClient(socket_path)
+    try:
+        if not agent_client.is_running():
+            raise click.ClickException(
+                f"The agent is not running at {agent_client.socket_path}"
+            )
+        account = agent_client.add_key(decrypt_keystore(keystore), ttl)
+    except IPCException as e:
+        raise click.ClickException(str(e)) from e
+    click.echo(f"Added key for {account.address}")
+
+
+@agent.command(short_help="Removes all keys from the agent")
+@agent_socket_option
+def clear(socket_path: str):
+    from .agent import AgentClient
+    from .ipc import IPCException
+
+    try:
+        AgentClient(socket_path).remove_all_keys()
+    except IPCException as e:
+        raise click.ClickException(str(e)) from e
+
+
+@main.command(short_help="Runs forwarded commands in a long running process")
+@click.option(
+    "--socket",
+    "socket_path",
+    help="Path of the socket of the server [default: DEPLOY_TOOLS_SERVER_SOCKET or a socket in the runtime dir]",
+    type=click.Path(dir_okay=False),
+    default=None,
+)
+def serve(socket_path: str):
+    """
+    Runs the deploy, transact and call commands until it is interrupted
+
+    While the server is running, these commands are forwarded to it and run with the compiled contracts and
+    json rpc connections kept from earlier commands. Commands using --keystore are not forwarded,
+    use the agent to avoid decrypting the keystore every time. Use --no-server to not forward a command.
+    """
+    from .ipc import IPCException
+    from .server import create_command_server, default_server_socket_path
+
+    if socket_path is None:
+        socket_path = default_server_socket_path()
+    try:
+        server = create_command_server(socket_path)
+    except IPCException as e:
+        raise click.ClickException(str(e)) from e
+
+    # import the heavy modules now instead of in the first command
+    import web3  # noqa: F401
+    from .deploy import deploy_compiled_contract  # noqa: F401
+
+    click.echo(f"Server listening on {socket_path}", err=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
 def get_compiled_contracts(
-    *, contracts_dir, optimize=False, evm_version="byzantium", compiled_contracts_path
+    *,
+    contracts_dir,
+    optimize=False,
+    evm_version="byzantium",
+    compiled_contracts_path,
+    no_cache=False,
 ):
     if contracts_dir is not None and compiled_contracts_path is not None:
         raise click.BadOptionUsage(
             "--contracts-dir, --compiled-contracts",
             f"Both --contracts-dir and --compiled-contracts were specified. Please only use one of the two.",
         )
-    if compiled_contracts_path is not None:
-        return load_json_asset(compiled_contracts_path)
-    else:
+    if compiled_contracts_path is None:
         if contracts_dir is None:
             contracts_dir = CONTRACTS_DIR_DEFAULT
         verify_contracts_dir_exists(contracts_dir)
-        return compile_project(
-            contracts_dir, optimize=optimize, evm_version=evm_version
+
+    def load():
+        if compiled_contracts_path is not None:
+            # the contracts are loaded lazily, so that only the contracts used by the command are decoded
+            return load_compiled_contracts(compiled_contracts_path)
+        else:
+            from .compile import compile_project
+
+            return compile_project(
+                contracts_dir,
+                optimize=optimize,
+                evm_version=evm_version,
+                cache=get_compilation_cache(no_cache),
+            )
+
+    server = active_server()
+    if server is None or no_cache:
+        return load()
+    return server.get_compiled_contracts(
+        compiled_contracts_key(
+            contracts_dir=contracts_dir,
+            optimize=optimize,
+            evm_version=evm_version,
+            compiled_contracts_path=compiled_contracts_path,
+        ),
+        load,
+    )
+
+
+def compile_on_change(
+    contracts_dir,
+    *,
+    output,
+    split,
+    split_fields,
+    optimize,
+    only_abi,
+    evm_version,
+    minimize,
+    no_cache,
+    jobs,
+):
+    """Compiles the contracts incrementally every time they change until interrupted"""
+    from solc.exceptions import SolcError
+    from .compile import DuplicateContractException, compile_project_incrementally
+    from .watch import SourceWatcher
+
+    watcher = SourceWatcher(contracts_dir)
+    state_path = get_incremental_state_path(output, split=split)
+    previous_contracts, previous_state = load_previous_compilation(output, state_path)
+    cache = get_compilation_cache(no_cache)
+    try:
+        while True:
+            try:
+                compiled_contracts, state = compile_project_incrementally(
+                    contracts_dir if not watcher.file_paths else None,
+                    file_paths=watcher.file_paths,
+                    allow_paths=[contracts_dir],
+                    previous_contracts=previous_contracts,
+                    previous_state=previous_state,
+                    optimize=optimize,
+                    only_abi=only_abi,
+                    evm_version=evm_version,
+                    cache=cache,
+                    jobs=jobs,
+                )
+            except (SolcError, DuplicateContractException, OSError) as e:
+                # e.g. a source file removed while compiling, the next change is compiled again
+                click.echo(f"Compilation failed: {e}", err=True)
+            else:
+                if write_compiled_contracts(
+                    compiled_contracts,
+                    output,
+                    split=split,
+                    split_fields=split_fields,
+                    minimize=minimize,
+                ):
+                    click.echo(
+                        f"Wrote {len(compiled_contracts)} contracts to {output}",
+                        err=True,
+                    )
+                else:
+                    click.echo("Compiled contracts did not change", err=True)
+                replace_json_asset(state, state_path)
+                previous_contracts, previous_state = compiled_contracts, state
+
+            watcher.wait_for_change()
+    except KeyboardInterrupt:
+        pass
+
+
+def write_compiled_contracts(
+    compiled_contracts, output, *, split, split_fields, minimize
+) -> bool:
+    """Writes the compiled contracts either to the file or split into the directory `output`
+
+    Returns: Whether the output changed
+    """
+    if split:
+        from .assets import write_split_contracts
+
+        return write_split_contracts(
+            compiled_contracts, output, split_fields=split_fields, pretty=not minimize
         )
+    elif minimize:
+        return write_minified_json_asset(compiled_contracts, output)
+    else:
+        return write_pretty_json_asset(compiled_contracts, output)
+
+
+def get_incremental_state_path(output, *, split=False) -> str:
+    """Returns the path of the file to store the state of incremental compilations to `output`,
+    which is within the directory `output` for split contracts"""
+    if split:
+        return path.join(output, "state.json")
+    return str(Path(output).with_suffix(".state.json"))
+
+
+def load_previous_compilation(output, state_path):
+    """Returns the compiled contracts and the state of the last incremental compilation if available"""
+    from .assets import SplitContracts, is_split_contracts_path
+
+    try:
+        if is_split_contracts_path(output):
+            previous_contracts = dict(SplitContracts(output))
+        else:
+            previous_contracts = load_json_asset(output)
+        return previous_contracts, load_json_asset(state_path)
+    except (OSError, ValueError):
+        return None, None
+
+
+def get_compilation_cache(no_cache: bool):
+    if no_cache:
+        return None
+    return CompilationCache(default_cache_dir())
+
+
+def load_checkpoint(checkpoint_path, csv_file):
+    """Loads the progress of a previous run of transact-batch on the same csv file"""
+    try:
+        checkpoint = load_json_asset(checkpoint_path)
+    except FileNotFoundError:
+        return {
+            "csvFile": csv_file,
+            "processedRows": 0,
+            "failedRows": [],
+            "sentRows": {},
+        }
+    except ValueError as e:
+        raise click.BadOptionUsage(
+            "--checkpoint", f"Could not read checkpoint file {checkpoint_path}: {e}"
+        )
+
+    if checkpoint.get("csvFile") != csv_file:
+        raise click.BadOptionUsage(
+            "--checkpoint",
+            f"The checkpoint file {checkpoint_path} belongs to {checkpoint.get('csvFile')}",
+        )
+    checkpoint.setdefault("sentRows", {})
+    return checkpoint
+
+
+def set_processed_rows(checkpoint, processed_rows: int) -> None:
+    """Sets the number of processed rows and drops the sent rows that are processed"""
+    checkpoint["processedRows"] = processed_rows
+    checkpoint["sentRows"] = {
+        row: sent_row
+        for row, sent_row in checkpoint["sentRows"].items()
+        if int(row) >= processed_rows
+    }
+
+
+def resolve_sent_rows(web3, checkpoint, *, sender, receipt_tracker, timeout=180):
+    """
+    Finds out what happened to the transactions of the rows a previous run of transact-batch sent,
+    but did not see mined. A transaction that is still pending is waited for. A transaction that was dropped,
+    or whose nonce was used by another transaction, is removed from the sent rows, so that its row is sent again.
+
+    Returns: The rows whose transactions were mined, failed ones are added to the failed rows of `checkpoint`
+    """
+    from eth_utils import encode_hex
+    from web3.exceptions import TimeExhausted, TransactionNotFound
+    from .rpc import get_transaction_receipts
+
+    sent_rows = checkpoint["sentRows"]
+    rows = sorted(sent_rows, key=int)
+    if not rows:
+        return set()
+
+    receipts = get_transaction_receipts(
+        web3, [sent_rows[row]["transactionHash"] for row in rows]
+    )
+    mined_nonce = None
+    if sender is not None:
+        mined_nonce = web3.eth.getTransactionCount(sender, block_identifier="latest")
+
+    completed_rows = set()
+    for row, receipt in zip(rows, receipts):
+        transaction_hash = sent_rows[row]["transactionHash"]
+        nonce = sent_rows[row]["nonce"]
+        if receipt is None:
+            if mined_nonce is not None and nonce is not None and nonce < mined_nonce:
+                # another transaction with the same nonce was mined
+                del sent_rows[row]
+                continue
+            try:
+                web3.eth.getTransaction(transaction_hash)
+            except TransactionNotFound:
+                del sent_rows[row]
+                continue
+            try:
+                receipt = receipt_tracker.wait_for_receipt(
+                    transaction_hash, timeout=timeout
+                )
+            except TimeExhausted:
+                raise click.ClickException(
+                    f"The transaction {transaction_hash} of row {row} sent by a previous run is still pending, "
+                    f"run the command again once it was mined"
+                )
+
+        completed_rows.add(int(row))
+        status = receipt.get("status", None)
+        if status is not None and not status:
+            checkpoint["failedRows"].append(int(row))
+            click.echo(
+                f"Row {row} failed: transaction {transaction_hash} reverted", err=True
+            )
+        else:
+            click.echo(encode_hex(receipt["transactionHash"]))
+    return completed_rows
+
+
+class InvalidRowFunctionCall:
+    """Stands in for the function call of a csv row that could not be parsed,
+    so that the error gets reported as the outcome of the row"""
+
+    def __init__(self, error: Exception):
+        self.error = error
+
+    def buildTransaction(self, transaction_options):
+        raise self.error
+
+    def estimateGas(self, transaction_options):
+        raise self.error
+
+    def transact(self, transaction_options):
+        raise self.error
 
 
 def verify_contracts_dir_exists(contracts_dir):
@@ -411,33 +1590,153 @@ def verify_contracts_dir_exists(contracts_dir):
         )
 
 
-def connect_to_json_rpc(jsonrpc) -> Web3:
-    if jsonrpc == "test":
-        web3 = test_json_rpc
+def connect_to_json_rpc(jsonrpc) -> "Web3":
+    from .rpc import supports_batch_requests
+
+    server = active_server()
+    if server is None:
+        web3 = create_json_rpc_connection(jsonrpc)
     else:
-        web3 = Web3(Web3.HTTPProvider(jsonrpc, request_kwargs={"timeout": 180}))
+        web3 = server.connect(jsonrpc, lambda: create_json_rpc_connection(jsonrpc))
+
+    ctx = click.get_current_context(silent=True)
+    if (
+        supports_batch_requests(web3)
+        and ctx is not None
+        and ctx.find_root().params.get("rpc_stats")
+    ):
+        # the connection might be kept by the server, only the requests of this command are reported
+        statistics = web3.provider.statistics
+        start_statistics = statistics.copy()
+        ctx.call_on_close(
+            lambda: click.echo(f"RPC stats: {statistics - start_statistics}", err=True)
+        )
     return web3
 
 
+def create_json_rpc_connection(jsonrpc) -> "Web3":
+    from web3 import Web3
+    from .rpc import BatchingHTTPProvider
+
+    if jsonrpc == "test":
+        return get_test_json_rpc()
+    return Web3(BatchingHTTPProvider(jsonrpc, request_kwargs={"timeout": 180}))
+
+
+def simulate_deployment_gas(manifest_entries, compiled_contracts, *, gas_multiplier):
+    """Deploys the contracts of the manifest on a local test chain and returns the gas estimates of the deployments"""
+    from .deploy import deploy_compiled_contract
+    from .gas import GasEstimator, create_simulation_web3
+
+    web3 = create_simulation_web3()
+    addresses: Dict[str, str] = {}
+    gas_estimator = GasEstimator(
+        web3, multiplier=gas_multiplier, address_labels=addresses
+    )
+    for entry in manifest_entries:
+        abi = compiled_contracts[entry.contract_name]["abi"]
+        try:
+            contract = deploy_compiled_contract(
+                abi=abi,
+                bytecode=compiled_contracts[entry.contract_name]["bytecode"],
+                constructor_args=parse_args_to_matching_types_for_constructor(
+                    resolve_manifest_args(entry.args, addresses), abi
+                ),
+                web3=web3,
+                gas_estimator=gas_estimator,
+            )
+        except Exception as e:
+            raise click.ClickException(
+                f"Simulation of the deployment of {entry.name} failed: {e}"
+            ) from e
+        addresses[entry.name] = contract.address
+    return gas_estimator.estimates
+
+
+def create_receipt_tracker(web3: "Web3", confirmations: int):
+    """Creates a receipt tracker printing the reached confirmations to stderr if more than one is required"""
+    from .receipts import ReceiptTracker
+
+    if confirmations <= 1:
+        return ReceiptTracker(web3)
+
+    def on_confirmation(transaction_hash, reached_confirmations):
+        click.echo(
+            f"{transaction_hash.hex()}: {min(reached_confirmations, confirmations)}/{confirmations} confirmations",
+            err=True,
+        )
+
+    def on_reorganization(transaction_hash):
+        click.echo(
+            f"{transaction_hash.hex()}: removed from its block by a chain reorganization",
+            err=True,
+        )
+
+    return ReceiptTracker(
+        web3,
+        confirmations=confirmations,
+        on_confirmation=on_confirmation,
+        on_reorganization=on_reorganization,
+    )
+
+
+def get_test_json_rpc() -> "Web3":
+    global _test_json_rpc
+    if _test_json_rpc is None:
+        from web3 import Web3, EthereumTesterProvider
+
+        _test_json_rpc = Web3(EthereumTesterProvider())
+    return _test_json_rpc
+
+
 def retrieve_private_key(keystore_path):
     """
     return the private key corresponding to keystore or none if keystore is none
+
+    If the agent is running, the key is taken from the agent and an account of the agent is returned instead.
+    A key that is not yet known to the agent is decrypted and added to it.
+    The agent is not used if its socket might belong to another user.
     """
 
     private_key = None
 
     if keystore_path is not None:
-        password = click.prompt(
-            "Please enter the password to decrypt the keystore",
-            type=str,
-            hide_input=True,
-        )
-        private_key = decrypt_private_key(keystore_path, password)
+        from .agent import AgentClient, get_keystore_address
+        from .ipc import InsecureSocketException
+
+        agent_client = AgentClient()
+        try:
+            agent_running = agent_client.is_running()
+        except InsecureSocketException as e:
+            click.echo(f"Not using the agent: {e}", err=True)
+            agent_running = False
+        if agent_running:
+            address = get_keystore_address(keystore_path)
+            if address is not None:
+                account = agent_client.get_account(address)
+                if account is not None:
+                    return account
+
+        private_key = decrypt_keystore(keystore_path)
+
+        if agent_running:
+            return agent_client.add_key(private_key)
 
     return private_key
 
 
-def get_nonce(*, web3: Web3, nonce: int, auto_nonce: bool, private_key: bytes):
+def decrypt_keystore(keystore_path):
+    password = click.prompt(
+        "Please enter the password to decrypt the keystore",
+        type=str,
+        hide_input=True,
+    )
+    from .deploy import decrypt_private_key
+
+    return decrypt_private_key(keystore_path, password)
+
+
+def get_nonce(*, web3: "Web3", nonce: int, auto_nonce: bool, private_key: bytes):
     """get the nonce to be used as specified via command line options
 
      we do some option checking in this function. It would be better to do this
@@ -451,8 +1750,10 @@ def get_nonce(*, web3: Web3, nonce: int, auto_nonce: bool, private_key: bytes):
         )
 
     if auto_nonce:
+        from .deploy import get_account
+
         return web3.eth.getTransactionCount(
-            Account.privateKeyToAccount(private_key).address, block_identifier="pending"
+            get_account(private_key).address, block_identifier="pending"
         )
     else:
         return nonce
@@ -477,6 +1778,8 @@ def get_contract_matching_function(contract_abi, function_name, args):
 
 def parse_args_to_matching_types_for_constructor(args, contract_abi):
     """Parses a list of commandline arguments to the abi matching python types"""
+    from web3._utils.abi import get_constructor_abi
+
     constructor_abi = get_constructor_abi(contract_abi)
     if constructor_abi:
         return parse_args_to_matching_types_for_function(args, constructor_abi)
@@ -484,6 +1787,8 @@ def parse_args_to_matching_types_for_constructor(args, contract_abi):
 
 
 def parse_args_to_matching_types_for_function(args, function_abi):
+    from web3._utils.abi import get_abi_input_types
+
     types = get_abi_input_types(function_abi)
     return [parse_arg_to_matching_type(arg, type) for arg, type in zip(args, types)]
 
@@ -499,7 +1804,9 @@ def parse_arg_to_matching_type(arg, type: str):
             return False
         raise ValueError(f"Expected true or false, but got {arg}")
     if type.find("address") != -1:
-        return Web3.toChecksumAddress(arg)
+        from eth_utils import to_checksum_address
+
+        return to_checksum_address(arg)
     if type.find("bytes") != -1 or type.find("string") != -1:
         return arg
     raise ValueError(f"Cannot handle parameter of type {type} yet.")
@@ -1,11 +1,15 @@
+import hashlib
 import json
 import os
-from typing import List, Dict, Any
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from typing import List, Dict, Any, Optional, Tuple
 
-from solc import compile_standard
 from eth_utils import add_0x_prefix
 
 from .files import find_files
+from .cache import CompilationCache, compute_compilation_key, get_solc_identifier
+from .dependency_graph import DependencyGraph
 
 DEFAULT_OUTPUT_SELECTION = [
     "abi",
@@ -66,7 +70,9 @@ def normalize_compiled_contracts(compiled_contracts: Dict, file_paths: List[str]
             if contract_name not in result:
                 result[contract_name] = contract_data
             else:
-                raise BaseException("Can not compile two contracts with the same name")
+                raise DuplicateContractException(
+                    "Can not compile two contracts with the same name"
+                )
 
     return result
 
@@ -79,6 +85,139 @@ def log_compilation_errors(errors: List[Dict]):
             print(error["message"])
 
 
+def build_standard_input(
+    sources: Dict, *, optimize=False, only_abi=False, evm_version: str = "byzantium"
+) -> Dict:
+    """Builds the standard json input for solc from the loaded sources"""
+    if only_abi:
+        output_selection = ABI_OUTPUT_SELECTION
+    else:
+        output_selection = DEFAULT_OUTPUT_SELECTION
+
+    std_input = {
+        "language": "Solidity",
+        "sources": sources,
+        "settings": {
+            "outputSelection": {"*": {"*": output_selection}},
+            "evmVersion": evm_version,
+        },
+    }
+
+    if optimize:
+        std_input["settings"]["optimizer"] = {"enabled": True, "runs": 500}
+
+    return std_input
+
+
+def compile_standard_input(
+    std_input: Dict, *, allow_paths: List[str], cache: CompilationCache = None
+) -> Dict:
+    """
+    Compiles the standard json input with solc, or takes the result out of the cache if given
+
+    Only the sources in `std_input` are part of the cache key, files that solc loads
+    on its own from the `allow_paths` are not considered.
+
+    Returns: The `contracts` and `errors` of the solc output
+    """
+    if cache is not None:
+        cache_key = cache.key(std_input)
+        cached_result = cache.get(cache_key)
+        if cached_result is not None:
+            if cached_result.get("errors"):
+                log_compilation_errors(cached_result["errors"])
+            return cached_result
+
+    # solc is only imported if it is needed, see `deploy_tools.cli`
+    from solc import compile_standard
+
+    compilation_result = compile_standard(
+        std_input, allow_paths=",".join(os.path.abspath(path) for path in allow_paths)
+    )
+
+    if "errors" in compilation_result:
+        log_compilation_errors(compilation_result["errors"])
+
+    result = {
+        "contracts": compilation_result["contracts"],
+        "errors": compilation_result.get("errors", []),
+    }
+    if cache is not None:
+        cache.put(cache_key, result)
+    return result
+
+
+def compile_standard_input_in_parallel(
+    std_input: Dict,
+    *,
+    allow_paths: List[str],
+    cache: CompilationCache = None,
+    jobs: int = 1,
+) -> Dict:
+    """
+    Compiles the standard json input like `compile_standard_input`, but splits the sources into the groups
+    of files connected via imports and compiles up to `jobs` of these groups at the same time in separate
+    solc processes.
+    """
+    if jobs <= 1:
+        return compile_standard_input(std_input, allow_paths=allow_paths, cache=cache)
+    components = DependencyGraph.from_sources(
+        std_input["sources"]
+    ).connected_components()
+    if len(components) <= 1:
+        return compile_standard_input(std_input, allow_paths=allow_paths, cache=cache)
+
+    component_inputs = [
+        dict(
+            std_input,
+            sources={path: std_input["sources"][path] for path in component},
+        )
+        for component in components
+    ]
+    with ProcessPoolExecutor(max_workers=min(jobs, len(components))) as executor:
+        results = list(
+            executor.map(
+                partial(compile_standard_input, allow_paths=allow_paths, cache=cache),
+                component_inputs,
+            )
+        )
+
+    contracts: Dict[str, Dict] = {}
+    errors: List[Dict] = []
+    for result in results:
+        contracts.update(result["contracts"])
+        errors.extend(result["errors"])
+    # keep the order of a single compilation, solc sorts its output by path
+    return {
+        "contracts": {path: contracts[path] for path in sorted(contracts)},
+        "errors": errors,
+    }
+
+
+def collect_file_paths(
+    contracts_path: Optional[str],
+    *,
+    file_paths: List[str] = None,
+    allow_paths: List[str] = None,
+    pattern="*.sol",
+) -> Tuple[List[str], List[str]]:
+    """Returns the paths of the files to compile and the paths solc is allowed to load files from"""
+    if file_paths is None:
+        file_paths = []
+
+    if allow_paths is None:
+        allow_paths = []
+
+    if contracts_path is None and not file_paths:
+        contracts_path = "contracts"
+
+    if contracts_path is not None:
+        file_paths.extend(find_files(contracts_path, pattern=pattern))
+        allow_paths.append(contracts_path)
+
+    return file_paths, allow_paths
+
+
 def compile_project(
     contracts_path: str = None,
     *,
@@ -88,6 +227,8 @@ def compile_project(
     optimize=False,
     only_abi=False,
     evm_version: str = "byzantium",
+    cache: CompilationCache = None,
+    jobs: int = 1,
 ):
     """
     Compiles all contracts of the project into a single output
@@ -99,54 +240,160 @@ def compile_project(
         optimize: Whether to turn on the solidity optimizer
         only_abi: Whether to only create the abi or not
         evm_version: target evm version to use for generated code
+        cache: Cache to look up the compilation result before running solc (optional)
+        jobs: Number of solc processes used to compile independent groups of files in parallel
 
     Returns: A dictionary containing the compiled assets of the contracts
 
     """
 
-    if file_paths is None:
-        file_paths = []
+    file_paths, allow_paths = collect_file_paths(
+        contracts_path, file_paths=file_paths, allow_paths=allow_paths, pattern=pattern
+    )
 
-    if allow_paths is None:
-        allow_paths = []
+    sources = load_sources(file_paths)
 
-    if contracts_path is None and not file_paths:
-        contracts_path = "contracts"
+    std_input = build_standard_input(
+        sources, optimize=optimize, only_abi=only_abi, evm_version=evm_version
+    )
 
-    if contracts_path is not None:
-        file_paths.extend(find_files(contracts_path, pattern=pattern))
-        allow_paths.append(contracts_path)
+    compilation_result = compile_standard_input_in_parallel(
+        std_input, allow_paths=allow_paths, cache=cache, jobs=jobs
+    )
 
-    sources = load_sources(file_paths)
+    compiled_contracts = normalize_compiled_contracts(
+        compilation_result["contracts"], file_paths
+    )
+    return compiled_contracts
 
-    if only_abi:
-        output_selection = ABI_OUTPUT_SELECTION
-    else:
-        output_selection = DEFAULT_OUTPUT_SELECTION
 
-    std_input = {
-        "language": "Solidity",
-        "sources": sources,
-        "settings": {
-            "outputSelection": {"*": {"*": output_selection}},
-            "evmVersion": evm_version,
-        },
-    }
+def compile_project_incrementally(
+    contracts_path: str = None,
+    *,
+    previous_contracts: Optional[Dict] = None,
+    previous_state: Optional[Dict] = None,
+    file_paths: List[str] = None,
+    allow_paths: List[str] = None,
+    pattern="*.sol",
+    optimize=False,
+    only_abi=False,
+    evm_version: str = "byzantium",
+    cache: CompilationCache = None,
+    jobs: int = 1,
+) -> Tuple[Dict, Dict]:
+    """
+    Compiles the contracts of the project, but only recompiles the files that changed since the last
+    compilation together with the files depending on them. The compiled assets of all other contracts are
+    taken from `previous_contracts`. The result is the same as the one of `compile_project`.
 
-    if optimize:
-        std_input["settings"]["optimizer"] = {"enabled": True, "runs": 500}
+    Args:
+        previous_contracts: The result of the last compilation
+        previous_state: The state returned by the last compilation
+        For the other arguments see `compile_project`
 
-    compilation_result = compile_standard(
-        std_input, allow_paths=",".join(os.path.abspath(path) for path in allow_paths)
+    Returns: A tuple of the compiled assets of the contracts and the state to pass to the next compilation
+    """
+    file_paths, allow_paths = collect_file_paths(
+        contracts_path, file_paths=file_paths, allow_paths=allow_paths, pattern=pattern
     )
 
-    if "errors" in compilation_result:
-        log_compilation_errors(compilation_result["errors"])
-
-    compiled_contracts = normalize_compiled_contracts(
-        compilation_result["contracts"], file_paths
+    sources = load_sources(file_paths)
+    settings_key = compute_compilation_key(
+        build_standard_input(
+            {}, optimize=optimize, only_abi=only_abi, evm_version=evm_version
+        ),
+        get_solc_identifier(),
     )
-    return compiled_contracts
+    file_hashes = {
+        path: hashlib.sha256(source["content"].encode("utf-8")).hexdigest()
+        for path, source in sources.items()
+    }
+    graph = DependencyGraph.from_sources(sources)
+
+    if (
+        previous_contracts is None
+        or previous_state is None
+        or previous_state.get("settings") != settings_key
+        # the contracts might have been replaced by a compilation that did not update the state
+        or previous_state.get("contractsHash")
+        != _hash_compiled_contracts(previous_contracts)
+    ):
+        previous_contracts, previous_files = {}, {}
+    else:
+        previous_files = previous_state.get("files", {})
+
+    changed_paths = {
+        path
+        for path in file_paths
+        if path not in previous_files
+        or previous_files[path]["hash"] != file_hashes[path]
+        or any(
+            contract_name not in previous_contracts
+            for contract_name in previous_files[path]["contracts"]
+        )
+    }
+    changed_paths.update(path for path in previous_files if path not in sources)
+
+    paths_to_compile = set(changed_paths)
+    for path in changed_paths:
+        paths_to_compile.update(graph.dependents(path))
+    paths_to_compile.intersection_update(file_paths)
+
+    compiled_contracts: Dict[str, Dict] = {}
+    contract_names_by_path = {
+        path: previous_files[path]["contracts"]
+        for path in file_paths
+        if path not in paths_to_compile
+    }
+    if paths_to_compile:
+        needed_paths = set(paths_to_compile)
+        for path in paths_to_compile:
+            needed_paths.update(graph.dependencies(path))
+        std_input = build_standard_input(
+            {path: sources[path] for path in sorted(needed_paths) if path in sources},
+            optimize=optimize,
+            only_abi=only_abi,
+            evm_version=evm_version,
+        )
+        raw_contracts = compile_standard_input_in_parallel(
+            std_input, allow_paths=allow_paths, cache=cache, jobs=jobs
+        )["contracts"]
+        compiled_contracts = normalize_compiled_contracts(
+            raw_contracts, list(paths_to_compile)
+        )
+        for path in paths_to_compile:
+            contract_names_by_path[path] = list(raw_contracts.get(path, {}))
+
+    # keep the order of the output of solc, which is sorted by path and contract name
+    result: Dict[str, Dict] = {}
+    for path in sorted(contract_names_by_path):
+        for contract_name in contract_names_by_path[path]:
+            if contract_name in result:
+                raise DuplicateContractException(
+                    "Can not compile two contracts with the same name"
+                )
+            if path in paths_to_compile:
+                result[contract_name] = compiled_contracts[contract_name]
+            else:
+                result[contract_name] = previous_contracts[contract_name]
+
+    state = {
+        "settings": settings_key,
+        "contractsHash": _hash_compiled_contracts(result),
+        "files": {
+            path: {"hash": file_hashes[path], "contracts": contract_names_by_path[path]}
+            for path in file_paths
+        },
+    }
+    return result, state
+
+
+def _hash_compiled_contracts(compiled_contracts: Dict) -> str:
+    return hashlib.sha256(
+        json.dumps(compiled_contracts, sort_keys=True, separators=(",", ":")).encode(
+            "utf-8"
+        )
+    ).hexdigest()
 
 
 def compile_contract(
@@ -171,6 +418,10 @@ class UnknownContractException(Exception):
     pass
 
 
+class DuplicateContractException(Exception):
+    pass
+
+
 def filter_contracts(
     contract_names: List[str], contract_assets_in: Dict[str, Any]
 ) -> Dict[str, Any]:
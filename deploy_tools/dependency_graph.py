@@ -0,0 +1,133 @@
+import posixpath
+import re
+from collections import defaultdict
+from typing import Dict, Iterable, List, Set
+
+COMMENT_OR_STRING_PATTERN = re.compile(
+    r'//[^\n]*|/\*.*?\*/|"(?:\\.|[^"\\])*"|\'(?:\\.|[^\'\\])*\'', re.DOTALL
+)
+IMPORT_PATTERN = re.compile(
+    r'\bimport\s+(?:[^"\';]*?\s+from\s+)?["\']([^"\']+)["\']', re.DOTALL
+)
+
+
+def _remove_comments(source_code: str) -> str:
+    def replace(match):
+        if match.group(0).startswith("/"):
+            return " "
+        return match.group(0)
+
+    return COMMENT_OR_STRING_PATTERN.sub(replace, source_code)
+
+
+def parse_imports(source_code: str) -> List[str]:
+    """Returns the paths of all import statements in the solidity source code"""
+    return IMPORT_PATTERN.findall(_remove_comments(source_code))
+
+
+def normalize_path(path: str) -> str:
+    """Normalizes a source path, so that paths like `./contracts/A.sol` and `contracts/A.sol` are the same"""
+    return posixpath.normpath(path)
+
+
+def resolve_import(importing_path: str, import_path: str) -> str:
+    """Resolves the path of an import to the normalized source unit name used by solc
+
+    Relative imports are resolved relative to the directory of the importing file,
+    all other imports are only normalized.
+    """
+    if import_path.startswith("./") or import_path.startswith("../"):
+        return normalize_path(
+            posixpath.join(posixpath.dirname(importing_path), import_path)
+        )
+    return normalize_path(import_path)
+
+
+class DependencyGraph:
+    """
+    The graph of the imports between solidity source files
+
+    The nodes are the paths of the source files as used in the standard json input of solc.
+    """
+
+    def __init__(self, imports: Dict[str, Iterable[str]]):
+        self._imports: Dict[str, Set[str]] = {
+            path: set(imported_paths) for path, imported_paths in imports.items()
+        }
+        self._imported_by: Dict[str, Set[str]] = defaultdict(set)
+        for path, imported_paths in self._imports.items():
+            for imported_path in imported_paths:
+                self._imported_by[imported_path].add(path)
+
+    @classmethod
+    def from_sources(cls, sources: Dict[str, Dict]) -> "DependencyGraph":
+        """Creates the graph from the sources of a standard json input
+
+        The nodes keep the paths of `sources`, the imports are matched to them by their normalized paths.
+        """
+        paths_by_normalized_path = {normalize_path(path): path for path in sources}
+        return cls(
+            {
+                path: [
+                    paths_by_normalized_path.get(resolved_path, resolved_path)
+                    for resolved_path in (
+                        resolve_import(path, import_path)
+                        for import_path in parse_imports(source["content"])
+                    )
+                ]
+                for path, source in sources.items()
+            }
+        )
+
+    @property
+    def paths(self) -> Set[str]:
+        return set(self._imports)
+
+    def imports(self, path: str) -> Set[str]:
+        """Returns the paths directly imported by `path`"""
+        return set(self._imports.get(path, set()))
+
+    def imported_by(self, path: str) -> Set[str]:
+        """Returns the paths directly importing `path`"""
+        return set(self._imported_by.get(path, set()))
+
+    def dependencies(self, path: str) -> Set[str]:
+        """Returns all paths `path` depends on directly or indirectly"""
+        return self._reachable([path], self._imports)
+
+    def dependents(self, path: str) -> Set[str]:
+        """Returns all paths that depend directly or indirectly on `path`"""
+        return self._reachable([path], self._imported_by)
+
+    def connected_components(self) -> List[List[str]]:
+        """Returns the groups of paths that are connected via imports, ignoring the direction of the imports
+
+        Paths that are imported but not part of the graph are not included.
+        Every component is sorted and the components are sorted by their first path.
+        """
+        edges: Dict[str, Set[str]] = defaultdict(set)
+        for path, imported_paths in self._imports.items():
+            edges[path].update(imported_paths)
+            for imported_path in imported_paths:
+                edges[imported_path].add(path)
+
+        components = []
+        visited: Set[str] = set()
+        for path in sorted(self._imports):
+            if path in visited:
+                continue
+            component = self._reachable([path], edges) | {path}
+            visited.update(component)
+            components.append(sorted(component & self._imports.keys()))
+        return components
+
+    @staticmethod
+    def _reachable(start_paths: Iterable[str], edges: Dict[str, Set[str]]) -> Set[str]:
+        reached: Set[str] = set()
+        to_visit = list(start_paths)
+        while to_visit:
+            for next_path in edges.get(to_visit.pop(), set()):
+                if next_path not in reached:
+                    reached.add(next_path)
+                    to_visit.append(next_path)
+        return reached
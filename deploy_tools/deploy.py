@@ -1,12 +1,35 @@
-from typing import Dict
+from collections import deque
+from typing import (
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    NamedTuple,
+    Optional,
+    Sequence,
+    Tuple,
+)
 import pkg_resources
 import json
 
+import rlp
 from eth_keyfile import extract_key_from_keyfile
+from eth_utils import keccak, to_bytes, to_canonical_address, to_checksum_address
+from hexbytes import HexBytes
 from web3.contract import Contract
 from web3 import Web3
 from web3.eth import Account
-from web3._utils.transactions import fill_nonce
+from web3._utils.transactions import fill_nonce, fill_transaction_defaults
+
+from .deployment_state import DeploymentState
+from .gas import GasEstimator
+from .receipts import ReceiptTracker
+from .rpc import (
+    make_batch_request,
+    prefill_transaction_options,
+    supports_batch_requests,
+)
 
 
 def deploy_compiled_contract(
@@ -16,16 +39,32 @@ def deploy_compiled_contract(
     web3: Web3,
     constructor_args=(),
     transaction_options: Dict = None,
-    private_key=None
+    private_key=None,
+    receipt_tracker: ReceiptTracker = None,
+    gas_estimator: GasEstimator = None,
+    deployment_state: DeploymentState = None,
+    name: str = None,
 ) -> Contract:
     """
     Deploys a compiled contract either using an account of the node, or a local private key
-    It will block until the transaction was successfully mined.
+    It will block until the transaction was successfully mined, or reached the confirmations
+    required by `receipt_tracker` if given. If no gas is given, it is estimated with `gas_estimator` if given.
+    If `deployment_state` is given, the deployment is recorded in it as `name` and a recorded deployment
+    with the same bytecode and constructor arguments is reused instead of deploying the contract again.
 
     Returns: The deployed contract as a web3 contract
 
     """
     contract = web3.eth.contract(abi=abi, bytecode=bytecode)
+    if deployment_state is not None:
+        if name is None:
+            raise ValueError("A name is needed to record the deployment")
+        address = deployment_state.find_deployment(
+            web3, name, bytecode=bytecode, constructor_args=constructor_args
+        )
+        if address is not None:
+            return contract(address)
+
     constuctor_call = contract.constructor(*constructor_args)
 
     receipt = send_function_call_transaction(
@@ -33,19 +72,286 @@ def deploy_compiled_contract(
         web3=web3,
         transaction_options=transaction_options,
         private_key=private_key,
+        receipt_tracker=receipt_tracker,
+        gas_estimator=gas_estimator,
     )
 
     address = receipt["contractAddress"]
+    if deployment_state is not None:
+        deployment_state.record_deployment(
+            name,
+            bytecode=bytecode,
+            constructor_args=constructor_args,
+            address=address,
+            transaction_hash=receipt["transactionHash"],
+            code=web3.eth.getCode(address),
+        )
     return contract(address)
 
 
+# factory deployed at the same address on most chains, see https://github.com/Arachnid/deterministic-deployment-proxy
+# It deploys the init code following the 32 byte salt in the call data with CREATE2
+DETERMINISTIC_DEPLOYMENT_FACTORY = "0x4e59b44847b379578588920cA78FbF26c0B4956C"
+
+
+def deploy_compiled_contract_with_create2(
+    *,
+    abi,
+    bytecode,
+    web3: Web3,
+    salt: bytes,
+    constructor_args=(),
+    transaction_options: Dict = None,
+    private_key=None,
+    factory: str = DETERMINISTIC_DEPLOYMENT_FACTORY,
+    receipt_tracker: ReceiptTracker = None,
+    gas_estimator: GasEstimator = None,
+) -> Contract:
+    """
+    Deploys a compiled contract with CREATE2 via `factory` like `deploy_compiled_contract`.
+    The address of the contract only depends on the factory, the 32 byte `salt`, the bytecode and the constructor
+    arguments. If there is already code at this address, the contract is not deployed again.
+
+    Returns: The deployed contract as a web3 contract
+    """
+    if len(salt) != 32:
+        raise ValueError("The salt needs to be 32 bytes long")
+
+    contract = web3.eth.contract(abi=abi, bytecode=bytecode)
+    init_code = to_bytes(
+        hexstr=contract.constructor(*constructor_args).data_in_transaction
+    )
+    address = compute_create2_address(factory, salt, init_code)
+    if web3.eth.getCode(address):
+        return contract(address)
+
+    if not web3.eth.getCode(factory):
+        raise ValueError(f"There is no CREATE2 factory deployed at {factory}")
+
+    send_function_call_transaction(
+        _TransactionCall(web3, to=factory, data=salt + init_code),
+        web3=web3,
+        transaction_options=transaction_options,
+        private_key=private_key,
+        receipt_tracker=receipt_tracker,
+        gas_estimator=gas_estimator,
+    )
+    if not web3.eth.getCode(address):
+        raise TransactionFailed(f"The factory did not deploy the contract at {address}")
+    return contract(address)
+
+
+def compute_create2_address(factory: str, salt: bytes, init_code: bytes) -> str:
+    """Returns the address of the contract deployed by `factory` with CREATE2"""
+    return to_checksum_address(
+        keccak(b"\xff" + to_canonical_address(factory) + salt + keccak(init_code))[12:]
+    )
+
+
+def compute_contract_address(sender: str, nonce: int) -> str:
+    """Returns the address of the contract deployed by `sender` with the transaction with `nonce`"""
+    return to_checksum_address(
+        keccak(rlp.encode([to_canonical_address(sender), nonce]))[12:]
+    )
+
+
+class DeploymentPlanner:
+    """
+    Plans the deployment of many contracts, which are then sent all at once without waiting for one to be mined
+    before sending the next one.
+
+    The address of a contract is known before it is deployed, as it only depends on the sender and the nonce of
+    the deployment transaction. The nonces are handed out from a local counter starting at the nonce in
+    `transaction_options` or the transaction count of the sender. The constructor arguments of a contract can
+    therefore contain the address of a contract planned before it.
+    If `deployment_state` is given, the deployments are recorded in it by their name and a recorded deployment
+    with the same bytecode and constructor arguments is reused instead of being planned, so it takes no nonce.
+    """
+
+    def __init__(
+        self,
+        *,
+        web3: Web3,
+        transaction_options: Dict = None,
+        private_key=None,
+        deployment_state: DeploymentState = None,
+    ):
+        if transaction_options is None:
+            transaction_options = {}
+        self.web3 = web3
+        self.transaction_options = transaction_options.copy()
+        self.private_key = private_key
+        self.deployment_state = deployment_state
+
+        if private_key is not None:
+            self.sender = get_account(private_key).address
+        else:
+            # the node sends from its coinbase if no sender is given
+            self.sender = (
+                transaction_options.get("from")
+                or web3.eth.defaultAccount
+                or web3.eth.coinbase
+            )
+            self.transaction_options["from"] = self.sender
+        self.transaction_options.setdefault(
+            "nonce", web3.eth.getTransactionCount(self.sender, "pending")
+        )
+        self._constructor_calls: List = []
+        # the name, bytecode and constructor arguments of every planned deployment to record it
+        self._planned_deployments: List[Tuple[Optional[str], str, Sequence]] = []
+        # the recorded deployments that are reused instead of being deployed
+        self.reused_contracts: List[Contract] = []
+        # the contracts that were deployed as planned, even if others failed
+        self.deployed_contracts: List[Contract] = []
+
+    @property
+    def addresses(self) -> List[str]:
+        """The addresses of the planned contracts in the order they were planned"""
+        return [
+            compute_contract_address(
+                self.sender, self.transaction_options["nonce"] + index
+            )
+            for index in range(len(self._constructor_calls))
+        ]
+
+    def plan(self, *, abi, bytecode, constructor_args=(), name: str = None) -> str:
+        """Plans the deployment of a contract, `name` is needed to record the deployment in the deployment state
+
+        Returns: The address the contract will be deployed at, or the address of the reused deployment
+        """
+        contract = self.web3.eth.contract(abi=abi, bytecode=bytecode)
+        if self.deployment_state is not None:
+            if name is None:
+                raise ValueError("A name is needed to record the deployment")
+            address = self.deployment_state.find_deployment(
+                self.web3, name, bytecode=bytecode, constructor_args=constructor_args
+            )
+            if address is not None:
+                self.reused_contracts.append(contract(address))
+                return address
+
+        self._constructor_calls.append(contract.constructor(*constructor_args))
+        self._planned_deployments.append((name, bytecode, constructor_args))
+        return compute_contract_address(
+            self.sender,
+            self.transaction_options["nonce"] + len(self._constructor_calls) - 1,
+        )
+
+    def deploy(
+        self,
+        *,
+        receipt_tracker: ReceiptTracker = None,
+        gas_estimator: GasEstimator = None,
+        timeout=180,
+    ) -> List[Contract]:
+        """
+        Sends the transactions of all planned deployments at once and blocks until all of them were mined.
+        If a transaction can not be sent, no further transactions are sent as their addresses would not match the plan.
+        The transactions sent before are still waited for. The contracts deployed as planned are available
+        via `deployed_contracts`, also if the deployment failed.
+
+        Returns: The deployed contracts as web3 contracts in the order they were planned
+        """
+        if receipt_tracker is None:
+            receipt_tracker = ReceiptTracker(self.web3)
+
+        self.deployed_contracts = []
+        tx_hashes = []
+        try:
+            for index, constructor_call in enumerate(self._constructor_calls):
+                transaction_options = self.transaction_options.copy()
+                transaction_options["nonce"] += index
+                tx_hash = _send_function_call_transaction(
+                    constructor_call,
+                    web3=self.web3,
+                    transaction_options=transaction_options,
+                    private_key=self.private_key,
+                    gas_estimator=gas_estimator,
+                )
+                receipt_tracker.track(tx_hash)
+                tx_hashes.append(tx_hash)
+        except Exception:
+            try:
+                self._wait_for_deployments(tx_hashes, receipt_tracker, timeout)
+            except Exception:
+                # the error of sending the transaction is the one to report
+                pass
+            raise
+
+        return self._wait_for_deployments(tx_hashes, receipt_tracker, timeout)
+
+    def _wait_for_deployments(
+        self, tx_hashes: List, receipt_tracker: ReceiptTracker, timeout
+    ) -> List[Contract]:
+        """Waits for the deployments sent with `tx_hashes` and adds the successful ones to `deployed_contracts`
+
+        Will raise an error of the first failed deployment after all deployments were checked
+        """
+        receipts = receipt_tracker.wait_for_receipts(tx_hashes, timeout=timeout)
+        errors: List[Exception] = []
+        for constructor_call, tx_hash, address in zip(
+            self._constructor_calls, tx_hashes, self.addresses
+        ):
+            receipt = receipts[HexBytes(tx_hash)]
+            if not receipt.get("status", True):
+                errors.append(TransactionFailed(f"Deployment of {address} failed"))
+            elif receipt["contractAddress"] != address:
+                errors.append(
+                    ValueError(
+                        f"Contract was deployed at {receipt['contractAddress']} instead of {address}"
+                    )
+                )
+            else:
+                self.deployed_contracts.append(
+                    self.web3.eth.contract(address=address, abi=constructor_call.abi)
+                )
+
+        if self.deployment_state is not None:
+            self._record_deployments(tx_hashes)
+        if errors:
+            raise errors[0]
+        return list(self.deployed_contracts)
+
+    def _record_deployments(self, tx_hashes: List) -> None:
+        deployed_addresses = {contract.address for contract in self.deployed_contracts}
+        deployments = [
+            (planned_deployment, tx_hash, address)
+            for planned_deployment, tx_hash, address in zip(
+                self._planned_deployments, tx_hashes, self.addresses
+            )
+            if address in deployed_addresses
+        ]
+        codes = make_batch_request(
+            self.web3,
+            [("eth_getCode", [address, "latest"]) for _, _, address in deployments],
+        )
+        for ((name, bytecode, constructor_args), tx_hash, address), code in zip(
+            deployments, codes
+        ):
+            self.deployment_state.record_deployment(
+                name,
+                bytecode=bytecode,
+                constructor_args=constructor_args,
+                address=address,
+                transaction_hash=tx_hash,
+                code=code,
+            )
+
+
 def send_function_call_transaction(
-    function_call, *, web3: Web3, transaction_options: Dict = None, private_key=None
+    function_call,
+    *,
+    web3: Web3,
+    transaction_options: Dict = None,
+    private_key=None,
+    receipt_tracker: ReceiptTracker = None,
+    gas_estimator: GasEstimator = None,
 ):
     """
     Creates, signs and sends a transaction from a function call (for example created with `contract.functions.foo()`.
     Will either use an account of the node(default), or a local private key(if given) to sign the transaction.
-    It will block until the transaction was successfully mined.
+    It will block until the transaction was successfully mined, or reached the confirmations
+    required by `receipt_tracker` if given. If no gas is given, it is estimated with `gas_estimator` if given.
 
     Returns: The transaction receipt
 
@@ -53,29 +359,205 @@ def send_function_call_transaction(
     if transaction_options is None:
         transaction_options = {}
 
+    tx_hash = _send_function_call_transaction(
+        function_call,
+        web3=web3,
+        transaction_options=transaction_options,
+        private_key=private_key,
+        gas_estimator=gas_estimator,
+    )
+
+    return wait_for_successful_transaction_receipt(
+        web3, tx_hash, receipt_tracker=receipt_tracker
+    )
+
+
+class TransactionOutcome(NamedTuple):
+    """The outcome of a transaction sent by `pipeline_function_call_transactions`"""
+
+    index: int
+    transaction_hash: Optional[bytes]
+    receipt: Optional[Dict]
+    error: Optional[Exception]
+
+    @property
+    def successful(self) -> bool:
+        return self.error is None
+
+
+def pipeline_function_call_transactions(
+    function_calls: Iterable,
+    *,
+    web3: Web3,
+    transaction_options: Dict = None,
+    private_key=None,
+    window: int = None,
+    timeout=180,
+    receipt_tracker: ReceiptTracker = None,
+    gas_estimator: GasEstimator = None,
+    on_sent: Callable[[int, bytes, Optional[int]], None] = None,
+    before_wait: Callable[[], None] = None,
+) -> Iterator[TransactionOutcome]:
+    """
+    Creates, signs and sends the transactions of many function calls back to back without waiting
+    for a transaction to be mined before sending the next one. The nonces are handed out from a local counter
+    starting at the nonce in `transaction_options` or the transaction count of the sender.
+    At most `window` transactions are in flight at the same time, if `window` is None all transactions
+    are sent before waiting for the first receipt. The receipts of all transactions in flight are fetched together
+    by `receipt_tracker`, which also defines the number of confirmations to wait for. If no gas is given,
+    it is estimated with `gas_estimator` if given, which only estimates once for calls of the same shape.
+    `on_sent` is called with the index, the transaction hash and the nonce (None if the node fills it in)
+    of every transaction right after it was sent, `before_wait` is called whenever the sending stops to wait
+    for receipts, so that the sent transactions can be recorded once per batch instead of for every transaction.
+    After waiting, the outcomes of all transactions whose receipts arrived with the same poll are returned
+    at once, so that the next batch of transactions is sent back to back.
+
+    Returns: An iterator over the outcomes of the transactions in the order of `function_calls`.
+    A failed transaction is reported via the error of its outcome and does not stop the other transactions.
+
+    """
+    if window is not None and window < 1:
+        raise ValueError("The window needs to allow at least one transaction in flight")
+
+    if transaction_options is None:
+        transaction_options = {}
+    transaction_options = transaction_options.copy()
+    if receipt_tracker is None:
+        receipt_tracker = ReceiptTracker(web3)
+
     if private_key is not None:
-        signed_transaction = _build_and_sign_transaction(
-            function_call,
+        sender = get_account(private_key).address
+    else:
+        sender = transaction_options.get("from", web3.eth.defaultAccount)
+    # fetch the values shared by all transactions once instead of for every transaction
+    transaction_options = prefill_transaction_options(
+        web3,
+        transaction_options,
+        sender=sender or None,
+        include_chain_id=private_key is not None,
+    )
+
+    in_flight: deque = deque()
+    for index, function_call in enumerate(function_calls):
+        try:
+            tx_hash = _send_function_call_transaction(
+                function_call,
+                web3=web3,
+                transaction_options=transaction_options.copy(),
+                private_key=private_key,
+                gas_estimator=gas_estimator,
+            )
+        except Exception as error:
+            # the nonce was not used and is handed out to the next transaction
+            in_flight.append(TransactionOutcome(index, None, None, error))
+        else:
+            in_flight.append(TransactionOutcome(index, tx_hash, None, None))
+            receipt_tracker.track(tx_hash)
+            if on_sent is not None:
+                on_sent(index, tx_hash, transaction_options.get("nonce"))
+            increase_transaction_options_nonce(transaction_options)
+
+        if window is not None and len(in_flight) >= window:
+            yield from _wait_for_transaction_outcomes(
+                receipt_tracker, in_flight, timeout, before_wait
+            )
+
+    while in_flight:
+        yield from _wait_for_transaction_outcomes(
+            receipt_tracker, in_flight, timeout, before_wait
+        )
+
+
+def send_function_call_transactions(
+    function_calls: Iterable,
+    *,
+    web3: Web3,
+    transaction_options: Dict = None,
+    private_key=None,
+    window: int = None,
+    timeout=180,
+    receipt_tracker: ReceiptTracker = None,
+    gas_estimator: GasEstimator = None,
+) -> List[TransactionOutcome]:
+    """
+    Sends the transactions of many function calls pipelined, see `pipeline_function_call_transactions`.
+    It will block until all transactions were mined.
+
+    Returns: The outcomes of the transactions in the order of `function_calls`
+
+    """
+    return list(
+        pipeline_function_call_transactions(
+            function_calls,
             web3=web3,
             transaction_options=transaction_options,
             private_key=private_key,
+            window=window,
+            timeout=timeout,
+            receipt_tracker=receipt_tracker,
+            gas_estimator=gas_estimator,
         )
-        tx_hash = web3.eth.sendRawTransaction(signed_transaction.rawTransaction)
-    else:
-        tx_hash = function_call.transact(transaction_options)
+    )
+
+
+def _wait_for_transaction_outcomes(
+    receipt_tracker: ReceiptTracker,
+    in_flight: deque,
+    timeout,
+    before_wait: Optional[Callable[[], None]],
+) -> Iterator[TransactionOutcome]:
+    """Waits for the outcome of the first transaction in flight and takes all following transactions
+    out of `in_flight`, whose outcome is known without waiting"""
+    if before_wait is not None and not _is_outcome_known(receipt_tracker, in_flight[0]):
+        before_wait()
+    yield _wait_for_transaction_outcome(receipt_tracker, in_flight.popleft(), timeout)
+    while in_flight and _is_outcome_known(receipt_tracker, in_flight[0]):
+        yield _wait_for_transaction_outcome(
+            receipt_tracker, in_flight.popleft(), timeout
+        )
+
+
+def _is_outcome_known(
+    receipt_tracker: ReceiptTracker, outcome: TransactionOutcome
+) -> bool:
+    return outcome.error is not None or receipt_tracker.is_confirmed(
+        outcome.transaction_hash
+    )
 
-    return wait_for_successful_transaction_receipt(web3, tx_hash)
+
+def _wait_for_transaction_outcome(
+    receipt_tracker: ReceiptTracker, outcome: TransactionOutcome, timeout
+) -> TransactionOutcome:
+    if outcome.error is not None:
+        return outcome
+
+    try:
+        receipt = receipt_tracker.wait_for_receipt(
+            outcome.transaction_hash, timeout=timeout
+        )
+    except Exception as error:
+        return outcome._replace(error=error)
+
+    status = receipt.get("status", None)
+    if status is not None and not status:
+        return outcome._replace(receipt=receipt, error=TransactionFailed())
+    return outcome._replace(receipt=receipt)
 
 
 class TransactionFailed(Exception):
     pass
 
 
-def wait_for_successful_transaction_receipt(web3: Web3, txid: str, timeout=180) -> dict:
+def wait_for_successful_transaction_receipt(
+    web3: Web3, txid: str, timeout=180, receipt_tracker: ReceiptTracker = None
+) -> dict:
     """See if transaction went through (Solidity code did not throw).
+    Waits for the confirmations required by `receipt_tracker` if given, otherwise until the transaction is mined.
     :return: Transaction receipt
     """
-    receipt = web3.eth.waitForTransactionReceipt(txid, timeout=timeout)
+    if receipt_tracker is None:
+        receipt_tracker = ReceiptTracker(web3)
+    receipt = receipt_tracker.wait_for_receipt(txid, timeout=timeout)
     status = receipt.get("status", None)
     if status is False:
         raise TransactionFailed
@@ -114,10 +596,34 @@ def increase_transaction_options_nonce(transaction_options: Dict) -> None:
         transaction_options["nonce"] = transaction_options["nonce"] + 1
 
 
+def _send_function_call_transaction(
+    function_call, *, web3, transaction_options, private_key, gas_estimator=None
+):
+    if gas_estimator is not None and "gas" not in transaction_options:
+        estimate_options = transaction_options.copy()
+        if private_key is not None:
+            estimate_options.setdefault("from", get_account(private_key).address)
+        transaction_options = dict(
+            transaction_options,
+            gas=gas_estimator.estimate_gas(function_call, estimate_options),
+        )
+
+    if private_key is not None:
+        signed_transaction = _build_and_sign_transaction(
+            function_call,
+            web3=web3,
+            transaction_options=transaction_options,
+            private_key=private_key,
+        )
+        return web3.eth.sendRawTransaction(signed_transaction.rawTransaction)
+    else:
+        return function_call.transact(transaction_options)
+
+
 def _build_and_sign_transaction(
     function_call, *, web3, transaction_options, private_key
 ):
-    account = Account.privateKeyToAccount(private_key)
+    account = get_account(private_key)
 
     if "from" in transaction_options and transaction_options["from"] != account.address:
         raise ValueError(
@@ -125,6 +631,42 @@ def _build_and_sign_transaction(
         )
     transaction_options["from"] = account.address
 
+    if supports_batch_requests(web3):
+        transaction_options = prefill_transaction_options(
+            web3, transaction_options, sender=account.address, include_chain_id=True
+        )
+
     transaction = fill_nonce(web3, function_call.buildTransaction(transaction_options))
 
     return account.signTransaction(transaction)
+
+
+def get_account(private_key):
+    """Returns the account of `private_key`, which can also be an account like object
+    with an `address` and a `signTransaction` method, for example of the agent"""
+    if hasattr(private_key, "address") and hasattr(private_key, "signTransaction"):
+        return private_key
+    return Account.privateKeyToAccount(private_key)
+
+
+class _TransactionCall:
+    """Stands in for a function call to send a transaction with plain data"""
+
+    def __init__(self, web3, *, to, data: bytes):
+        self.web3 = web3
+        self.to = to
+        self.data = data
+
+    def buildTransaction(self, transaction_options):
+        return fill_transaction_defaults(
+            self.web3, self._transaction(transaction_options)
+        )
+
+    def estimateGas(self, transaction_options):
+        return self.web3.eth.estimateGas(self._transaction(transaction_options))
+
+    def transact(self, transaction_options):
+        return self.web3.eth.sendTransaction(self._transaction(transaction_options))
+
+    def _transaction(self, transaction_options):
+        return dict(transaction_options, to=self.to, data=self.data)
@@ -0,0 +1,189 @@
+import asyncio
+import threading
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Dict, Optional
+
+from hexbytes import HexBytes
+from web3 import Web3
+from web3.contract import Contract
+
+from .deploy import TransactionFailed, _send_function_call_transaction
+from .receipts import DEFAULT_POLL_INTERVAL, ReceiptTracker
+
+# web3 is not thread safe, the requests of the same web3 instance, sending transactions and polling for receipts,
+# are made one after the other by a single thread, which also makes sure the nonces fetched from the node do not
+# collide. Unlike a lock, the thread can be shared by all event loops.
+_web3_executors: "weakref.WeakKeyDictionary[Web3, ThreadPoolExecutor]" = (
+    weakref.WeakKeyDictionary()
+)
+_web3_executors_lock = threading.Lock()
+# the receipt watcher shared by default by all transactions of a web3 instance within an event loop
+_receipt_watchers: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+
+
+class ReceiptWatcher:
+    """
+    Waits for the receipts of many transactions at the same time without blocking the event loop.
+
+    The polling is done by a `ReceiptTracker`, which polls the latest block once per `poll_interval` and fetches
+    the receipts of all pending transactions with a single request whenever a new block arrived.
+    """
+
+    def __init__(
+        self,
+        web3: Web3,
+        *,
+        confirmations: int = 1,
+        poll_interval: float = DEFAULT_POLL_INTERVAL,
+    ):
+        self.receipt_tracker = ReceiptTracker(
+            web3, confirmations=confirmations, poll_interval=poll_interval
+        )
+        self._futures: Dict[HexBytes, asyncio.Future] = {}
+        self._polling_task: Optional[asyncio.Future] = None
+
+    @property
+    def pending_transaction_hashes(self):
+        return list(self._futures)
+
+    async def wait_for_receipt(self, transaction_hash, timeout=180):
+        """Waits until the transaction reached the required number of confirmations
+
+        Returns: The transaction receipt
+        Will raise `asyncio.TimeoutError` if the transaction was not confirmed within `timeout` seconds
+        """
+        transaction_hash = HexBytes(transaction_hash)
+        future = self._futures.get(transaction_hash)
+        if future is None:
+            future = asyncio.get_event_loop().create_future()
+            self._futures[transaction_hash] = future
+            self.receipt_tracker.track(transaction_hash)
+        if self._polling_task is None or self._polling_task.done():
+            self._polling_task = asyncio.ensure_future(self._poll())
+
+        try:
+            return await asyncio.wait_for(asyncio.shield(future), timeout)
+        except asyncio.TimeoutError:
+            if self._futures.get(transaction_hash) is future:
+                del self._futures[transaction_hash]
+                self.receipt_tracker.untrack(transaction_hash)
+            raise
+
+    async def _poll(self):
+        try:
+            await self._poll_until_confirmed()
+        finally:
+            # the finished task would keep its event loop alive
+            self._polling_task = None
+
+    async def _poll_until_confirmed(self):
+        loop = asyncio.get_event_loop()
+        while self._futures:
+            try:
+                confirmed = await loop.run_in_executor(
+                    _get_web3_executor(self.receipt_tracker.web3),
+                    self.receipt_tracker.poll,
+                )
+            except Exception as error:
+                for transaction_hash, future in self._futures.items():
+                    self.receipt_tracker.untrack(transaction_hash)
+                    if not future.done():
+                        future.set_exception(error)
+                self._futures.clear()
+                return
+
+            for transaction_hash, receipt in confirmed.items():
+                self.receipt_tracker.untrack(transaction_hash)
+                future = self._futures.pop(transaction_hash, None)
+                if future is not None and not future.done():
+                    future.set_result(receipt)
+            if self._futures:
+                await asyncio.sleep(self.receipt_tracker.poll_interval)
+
+
+async def deploy_compiled_contract_async(
+    *,
+    abi,
+    bytecode,
+    web3: Web3,
+    constructor_args=(),
+    transaction_options: Dict = None,
+    private_key=None,
+    receipt_watcher: ReceiptWatcher = None,
+    timeout=180,
+) -> Contract:
+    """
+    Deploys a compiled contract like `deploy_compiled_contract`, but without blocking the event loop.
+
+    Returns: The deployed contract as a web3 contract
+    """
+    contract = web3.eth.contract(abi=abi, bytecode=bytecode)
+    constuctor_call = contract.constructor(*constructor_args)
+
+    receipt = await send_function_call_transaction_async(
+        constuctor_call,
+        web3=web3,
+        transaction_options=transaction_options,
+        private_key=private_key,
+        receipt_watcher=receipt_watcher,
+        timeout=timeout,
+    )
+
+    address = receipt["contractAddress"]
+    return contract(address)
+
+
+async def send_function_call_transaction_async(
+    function_call,
+    *,
+    web3: Web3,
+    transaction_options: Dict = None,
+    private_key=None,
+    receipt_watcher: ReceiptWatcher = None,
+    timeout=180,
+):
+    """
+    Creates, signs and sends a transaction from a function call like `send_function_call_transaction`,
+    but without blocking the event loop. The receipt is awaited with `receipt_watcher`, pass the same
+    watcher to all concurrent transactions of a chain to share the polling for the receipts.
+    If no watcher is given, one watcher is shared by all transactions of web3 in the event loop.
+
+    Returns: The transaction receipt
+    """
+    if transaction_options is None:
+        transaction_options = {}
+    loop = asyncio.get_event_loop()
+    if receipt_watcher is None:
+        watchers_of_loop = _receipt_watchers.setdefault(
+            loop, weakref.WeakKeyDictionary()
+        )
+        if web3 not in watchers_of_loop:
+            watchers_of_loop[web3] = ReceiptWatcher(web3)
+        receipt_watcher = watchers_of_loop[web3]
+
+    tx_hash = await loop.run_in_executor(
+        _get_web3_executor(web3),
+        partial(
+            _send_function_call_transaction,
+            function_call,
+            web3=web3,
+            transaction_options=transaction_options.copy(),
+            private_key=private_key,
+        ),
+    )
+
+    receipt = await receipt_watcher.wait_for_receipt(tx_hash, timeout=timeout)
+    status = receipt.get("status", None)
+    if status is not None and not status:
+        raise TransactionFailed
+    return receipt
+
+
+def _get_web3_executor(web3: Web3) -> ThreadPoolExecutor:
+    """Returns the thread making all requests of `web3`"""
+    with _web3_executors_lock:
+        if web3 not in _web3_executors:
+            _web3_executors[web3] = ThreadPoolExecutor(max_workers=1)
+        return _web3_executors[web3]
@@ -0,0 +1,113 @@
+"""State of the deployments on a chain, recorded to reuse unchanged deployments when deploying again"""
+import os
+from typing import Dict, Optional, Sequence
+
+from eth_utils import keccak
+from hexbytes import HexBytes
+from web3 import Web3
+
+from .files import ensure_path_for_file_exists, load_json_asset, replace_json_asset
+from .rpc import make_batch_request, supports_batch_requests
+
+
+class DeploymentState:
+    """
+    Deployments recorded in the json file at `path` by their name.
+
+    Every deployment records the hash of the bytecode and the constructor arguments it was deployed with,
+    the address and transaction hash of the deployment and the hash of the code at the address.
+    A deployment is reused if it was deployed with the same bytecode and constructor arguments
+    and the code at its address still has the recorded hash. The code of a deployment is fetched when it is looked up,
+    if the provider supports batch requests, the code of all deployments is fetched at once with a single request.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        if os.path.exists(path):
+            self.deployments: Dict[str, Dict] = load_json_asset(path)["deployments"]
+        else:
+            self.deployments = {}
+        # the hash of the current code of the deployments by their name, None if there is no code
+        self._code_hashes: Dict[str, Optional[str]] = {}
+
+    @classmethod
+    def for_chain(cls, state_dir: str, web3: Web3) -> "DeploymentState":
+        """Returns the state of the chain of web3 recorded in `state_dir`, one file per network id"""
+        return cls(os.path.join(state_dir, f"{web3.net.version}.json"))
+
+    def find_deployment(
+        self, web3: Web3, name: str, *, bytecode, constructor_args: Sequence = ()
+    ) -> Optional[str]:
+        """Returns the address of the deployment `name` if it can be reused, otherwise None"""
+        deployment = self.deployments.get(name)
+        if (
+            deployment is None
+            or deployment["bytecodeHash"] != _hash(HexBytes(bytecode))
+            or deployment["constructorArgs"] != _to_json_args(constructor_args)
+        ):
+            return None
+
+        if name not in self._code_hashes:
+            self._fetch_code_hashes(web3, name)
+        if self._code_hashes[name] != deployment["codeHash"]:
+            return None
+        return deployment["address"]
+
+    def record_deployment(
+        self,
+        name: str,
+        *,
+        bytecode,
+        constructor_args: Sequence = (),
+        address: str,
+        transaction_hash: bytes,
+        code: bytes,
+    ) -> None:
+        """Records the deployment `name` and writes the state to its file"""
+        self.deployments[name] = {
+            "bytecodeHash": _hash(HexBytes(bytecode)),
+            "constructorArgs": _to_json_args(constructor_args),
+            "address": address,
+            "transactionHash": "0x" + bytes(transaction_hash).hex(),
+            "codeHash": _hash(code),
+        }
+        self._code_hashes[name] = _hash(code)
+        self.save()
+
+    def save(self) -> None:
+        ensure_path_for_file_exists(self.path)
+        replace_json_asset({"deployments": self.deployments}, self.path)
+
+    def _fetch_code_hashes(self, web3: Web3, name: str) -> None:
+        """Fetches the code of the deployment `name`, or of all deployments not fetched yet if it takes
+        a single request"""
+        if supports_batch_requests(web3):
+            names = [
+                deployment_name
+                for deployment_name in self.deployments
+                if deployment_name not in self._code_hashes
+            ]
+        else:
+            names = [name]
+        codes = make_batch_request(
+            web3,
+            [
+                ("eth_getCode", [self.deployments[name]["address"], "latest"])
+                for name in names
+            ],
+        )
+        for name, code in zip(names, codes):
+            self._code_hashes[name] = _hash(code) if code else None
+
+
+def _hash(data: bytes) -> str:
+    return "0x" + keccak(data).hex()
+
+
+def _to_json_args(args):
+    if isinstance(args, (bytes, bytearray)):
+        return "0x" + bytes(args).hex()
+    elif isinstance(args, (list, tuple)):
+        return [_to_json_args(arg) for arg in args]
+    else:
+        return args
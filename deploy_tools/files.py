@@ -1,11 +1,15 @@
 import os
 import csv
 import fnmatch
+import hashlib
 import json
+import tempfile
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from itertools import islice
 from pathlib import Path
-from typing import Dict
-
-from eth_utils import is_address, to_checksum_address
+from typing import Dict, Iterator, List, NamedTuple, Optional, Tuple
 
 
 def find_files(dir: str, pattern: str):
@@ -19,14 +23,113 @@ def ensure_path_for_file_exists(file_path):
     Path(file_path).parent.mkdir(parents=True, exist_ok=True)
 
 
-def write_pretty_json_asset(json_data: Dict, asset_path: str):
-    with open(asset_path, "w") as file:
-        json.dump(json_data, file, indent=4)
-
-
-def write_minified_json_asset(json_data: Dict, compiled_contracts_asset_path: str):
-    with open(compiled_contracts_asset_path, "w") as file:
-        json.dump(json_data, file, separators=(",", ":"))
+@contextmanager
+def file_lock(lock_path):
+    """Holds an exclusive lock on the file at `lock_path` while in the context,
+    blocks until the lock can be acquired. Works across processes."""
+    import fcntl
+
+    with open(lock_path, "a") as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def write_pretty_json_asset(json_data: Dict, asset_path: str) -> bool:
+    """Writes the json data indented to `asset_path` with `replace_json_asset`
+
+    Returns: Whether the content of the file changed
+    """
+    return replace_json_asset(json_data, asset_path, pretty=True)
+
+
+def write_minified_json_asset(
+    json_data: Dict, compiled_contracts_asset_path: str
+) -> bool:
+    """Writes the json data without whitespace to `asset_path` with `replace_json_asset`
+
+    Returns: Whether the content of the file changed
+    """
+    return replace_json_asset(json_data, compiled_contracts_asset_path)
+
+
+class _HashingWriter:
+    """Text file wrapper computing the sha256 hash of the written content"""
+
+    def __init__(self, file):
+        self.file = file
+        self.hasher = hashlib.sha256()
+        self.size = 0
+
+    def write(self, text: str) -> None:
+        data = text.encode("utf-8")
+        self.hasher.update(data)
+        self.size += len(data)
+        self.file.write(data)
+
+
+def _file_has_content(path: str, size: int, content_hash: bytes) -> bool:
+    """Returns whether the file at `path` exists with the given size and sha256 hash"""
+    try:
+        if os.path.getsize(path) != size:
+            return False
+        hasher = hashlib.sha256()
+        with open(path, "rb") as file:
+            for chunk in iter(lambda: file.read(1 << 16), b""):
+                hasher.update(chunk)
+    except OSError:
+        return False
+    return hasher.digest() == content_hash
+
+
+def _new_file_mode(path: str) -> int:
+    """Returns the mode of the file at `path`, or the mode a new file gets from the umask"""
+    try:
+        return os.stat(path).st_mode & 0o777
+    except FileNotFoundError:
+        umask = os.umask(0)
+        os.umask(umask)
+        return 0o666 & ~umask
+
+
+def replace_json_asset(json_data: Dict, asset_path: str, *, pretty=False) -> bool:
+    """Writes the json data to a temporary file first and then replaces the file at `asset_path` with it,
+    so that the file always contains either the old or the new data.
+    The file is not touched if its content would not change, so that its modification time stays the same.
+
+    Returns: Whether the content of the file changed
+    """
+    file_descriptor, temporary_path = tempfile.mkstemp(
+        dir=os.path.dirname(os.path.abspath(asset_path)), suffix=".tmp"
+    )
+    try:
+        with os.fdopen(file_descriptor, "wb") as file:
+            writer = _HashingWriter(file)
+            if pretty:
+                json.dump(json_data, writer, indent=4)
+            else:
+                json.dump(json_data, writer, separators=(",", ":"))
+
+            unchanged = _file_has_content(
+                asset_path, writer.size, writer.hasher.digest()
+            )
+            if not unchanged:
+                # the temporary file is only readable by the current user
+                os.fchmod(file.fileno(), _new_file_mode(asset_path))
+                file.flush()
+                os.fsync(file.fileno())
+
+        if unchanged:
+            os.unlink(temporary_path)
+        else:
+            os.replace(temporary_path, asset_path)
+        return not unchanged
+    except BaseException:
+        if os.path.exists(temporary_path):
+            os.unlink(temporary_path)
+        raise
 
 
 def load_json_asset(asset_path: str):
@@ -44,9 +147,89 @@ def read_addresses_in_csv(file_path: str):
         return addresses
 
 
+def iterate_csv_rows(file_path: str, *, start_row=0) -> Iterator[Tuple[int, List[str]]]:
+    """Iterates lazily over the rows of the csv file starting with the row at index `start_row`
+
+    Returns: An iterator over tuples of the index of the row and the row"""
+    for row_index, (_, row) in enumerate(
+        _iterate_csv_rows_with_line_numbers(file_path)
+    ):
+        if row_index >= start_row:
+            yield row_index, row
+
+
+def _iterate_csv_rows_with_line_numbers(
+    file_path: str,
+) -> Iterator[Tuple[int, List[str]]]:
+    """Iterates lazily over the rows of the csv file together with the number of the line each row starts on,
+    which differ once a quoted value contains a line break"""
+    with open(file_path, newline="") as f:
+        reader = csv.reader(f)
+        line_number = 1
+        for row in reader:
+            yield line_number, row
+            line_number = reader.line_num + 1
+
+
+class InvalidAddressRow(NamedTuple):
+    line_number: int
+    value: str
+
+
+class AddressChunk(NamedTuple):
+    addresses: List[str]
+    invalid_rows: List[InvalidAddressRow]
+
+
+def iterate_addresses_in_csv(
+    file_path: str, *, chunk_size=10000, processes: Optional[int] = None
+) -> Iterator[AddressChunk]:
+    """Reads the addresses in the first column of the csv file lazily in chunks of `chunk_size` rows
+
+    The addresses are validated and checksummed, if `processes` is given this is done in a pool of
+    that many processes. Only a few chunks are held in memory at the same time.
+
+    Returns: An iterator over the chunks in the order of the file. Every chunk contains the valid addresses
+    and the line numbers and values of the invalid rows.
+    """
+    rows = (
+        (line_number, row[0] if row else "")
+        for line_number, row in _iterate_csv_rows_with_line_numbers(file_path)
+    )
+    chunks = iter(lambda: list(islice(rows, chunk_size)), [])
+
+    if processes is None:
+        yield from map(_validate_address_chunk, chunks)
+        return
+
+    with ProcessPoolExecutor(max_workers=processes) as executor:
+        in_progress: deque = deque()
+        for chunk in chunks:
+            in_progress.append(executor.submit(_validate_address_chunk, chunk))
+            if len(in_progress) >= 2 * processes:
+                yield in_progress.popleft().result()
+        while in_progress:
+            yield in_progress.popleft().result()
+
+
+def _validate_address_chunk(rows: List[Tuple[int, str]]) -> AddressChunk:
+    from eth_utils import is_address, to_checksum_address
+
+    addresses = []
+    invalid_rows = []
+    for line_number, value in rows:
+        if is_address(value):
+            addresses.append(to_checksum_address(value))
+        else:
+            invalid_rows.append(InvalidAddressRow(line_number, value))
+    return AddressChunk(addresses, invalid_rows)
+
+
 def validate_and_format_address(address):
     """Validates the address and formats it into the internal format
     Will raise `InvalidAddressException, if the address is invalid"""
+    from eth_utils import is_address, to_checksum_address
+
     if is_address(address):
         return to_checksum_address(address)
     else:
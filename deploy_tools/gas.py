@@ -0,0 +1,101 @@
+from typing import Dict, Hashable, Mapping, Optional, Tuple
+
+from eth_utils import keccak, to_canonical_address
+from hexbytes import HexBytes
+from web3 import Web3
+
+DEFAULT_GAS_MULTIPLIER = 1.2
+
+
+class GasEstimator:
+    """
+    Estimates the gas of function calls and caches the estimates.
+
+    Function calls share an estimate if they call the same code with the same encoded call data, that is the same
+    function with the same arguments. The estimate is multiplied by `multiplier` as safety margin for a state of the
+    chain that changed between estimating and sending, for example writing to an empty instead of a used storage slot.
+    The cached estimates are independent of the chain, they can be taken over from the estimator of another chain
+    via `estimates`, for example from a simulation on a local test chain. Addresses that differ between the chains,
+    like the ones of contracts deployed from a manifest, can be given by a label in `address_labels`. An argument
+    holding such an address is then matched by its label instead of the address.
+    """
+
+    def __init__(
+        self,
+        web3: Web3,
+        *,
+        multiplier: float = DEFAULT_GAS_MULTIPLIER,
+        estimates: Dict[Hashable, int] = None,
+        address_labels: Mapping[str, str] = None,
+    ):
+        self.web3 = web3
+        self.multiplier = multiplier
+        self.estimates: Dict[Hashable, int] = dict(estimates or {})
+        # the labels are looked up on every estimate, the mapping may be filled while deploying
+        self.address_labels: Mapping[str, str] = (
+            address_labels if address_labels is not None else {}
+        )
+        self._code_hashes: Dict[str, bytes] = {}
+
+    def estimate_gas(self, function_call, transaction_options: Dict = None) -> int:
+        """Returns the gas to send the transaction of `function_call` with, which includes the safety margin"""
+        key = self.key(function_call)
+        if key is not None and key in self.estimates:
+            return self.estimates[key]
+
+        estimate_options = {
+            option: value
+            for option, value in (transaction_options or {}).items()
+            if option in ("from", "value", "gasPrice")
+        }
+        gas = int(function_call.estimateGas(estimate_options) * self.multiplier)
+        if key is not None:
+            self.estimates[key] = gas
+        return gas
+
+    def key(self, function_call) -> Optional[Tuple[bytes, bytes, bytes]]:
+        """Returns the key of the estimate of the function call made of the hash of the code, the function selector
+        and the hash of the encoded arguments, or None if the function call is neither a contract function
+        nor a constructor call"""
+        if hasattr(function_call, "data_in_transaction"):
+            # constructor: the code is the bytecode, the arguments follow it
+            bytecode = HexBytes(function_call.bytecode)
+            data = HexBytes(function_call.data_in_transaction)
+            return keccak(bytecode), b"", self._hash_arguments(data[len(bytecode) :])
+        elif hasattr(function_call, "address") and hasattr(
+            function_call, "_encode_transaction_data"
+        ):
+            data = HexBytes(function_call._encode_transaction_data())
+            return (
+                self._code_hash(function_call.address),
+                bytes(data[:4]),
+                self._hash_arguments(data[4:]),
+            )
+        else:
+            return None
+
+    def _hash_arguments(self, encoded_arguments: bytes) -> bytes:
+        # an address argument is encoded as a word of 32 bytes, padded with zeros on the left
+        labels_by_word = {
+            bytes(12) + to_canonical_address(address): keccak(text=label)
+            for label, address in self.address_labels.items()
+        }
+        words = (
+            bytes(encoded_arguments[index : index + 32])
+            for index in range(0, len(encoded_arguments), 32)
+        )
+        return keccak(b"".join(labels_by_word.get(word, word) for word in words))
+
+    def _code_hash(self, address: str) -> bytes:
+        if address not in self._code_hashes:
+            self._code_hashes[address] = keccak(self.web3.eth.getCode(address))
+        return self._code_hashes[address]
+
+
+def create_simulation_web3() -> Web3:
+    """Creates a web3 object connected to a new local test chain to simulate transactions on"""
+    from web3 import EthereumTesterProvider
+
+    web3 = Web3(EthereumTesterProvider())
+    web3.eth.defaultAccount = web3.eth.accounts[0]
+    return web3
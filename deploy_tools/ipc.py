@@ -0,0 +1,163 @@
+"""Json requests between the processes of deploy-tools over a local unix socket
+
+Every request and response is a json object on a single line.
+The socket and its directory have to be owned by the current user and must not be accessible by anyone else,
+so that no other user can run a server receiving the requests, which might contain private keys.
+"""
+import json
+import os
+import socket
+import socketserver
+import stat
+import struct
+import tempfile
+from typing import Callable, Dict
+
+
+class IPCException(Exception):
+    pass
+
+
+class InsecureSocketException(IPCException):
+    pass
+
+
+class NoResponseException(IPCException):
+    """The request was sent, but the server did not respond, so it is unknown whether it was handled"""
+
+    pass
+
+
+def default_socket_path(socket_name: str) -> str:
+    """Returns the path of the socket `socket_name` in the runtime dir of the user given by XDG_RUNTIME_DIR,
+    or in a directory of the user in the temporary directory if there is no runtime dir"""
+    runtime_dir = os.environ.get("XDG_RUNTIME_DIR")
+    if not runtime_dir:
+        runtime_dir = os.path.join(tempfile.gettempdir(), f"deploy-tools-{os.getuid()}")
+    return os.path.join(runtime_dir, socket_name)
+
+
+def check_socket_is_private(socket_path: str) -> None:
+    """Checks that the socket and its directory are owned by the current user and not accessible by anyone else
+
+    Will raise `InsecureSocketException` if they are not
+    """
+    _check_is_private(os.path.dirname(os.path.abspath(socket_path)), stat.S_ISDIR)
+    _check_is_private(socket_path, stat.S_ISSOCK)
+
+
+def _check_is_private(path: str, has_type: Callable[[int], bool]) -> None:
+    path_stat = os.lstat(path)
+    if not has_type(path_stat.st_mode):
+        raise InsecureSocketException(f"{path} has an unexpected file type")
+    if path_stat.st_uid != os.getuid():
+        raise InsecureSocketException(f"{path} is not owned by the current user")
+    if path_stat.st_mode & 0o077:
+        raise InsecureSocketException(
+            f"{path} is accessible by other users, only the current user may have permissions"
+        )
+
+
+def _check_peer(client: socket.socket) -> None:
+    """Checks that the server is run by the current user, where the credentials of the peer are available"""
+    if not hasattr(socket, "SO_PEERCRED"):
+        return
+    credentials = client.getsockopt(
+        socket.SOL_SOCKET, socket.SO_PEERCRED, struct.calcsize("3i")
+    )
+    _, uid, _ = struct.unpack("3i", credentials)
+    if uid != os.getuid():
+        raise InsecureSocketException("The server is not run by the current user")
+
+
+class _RequestHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        for line in self.rfile:
+            try:
+                request = json.loads(line)
+                response = {"result": self.server.handle_request(request)}
+            except Exception as e:
+                response = {"error": f"{type(e).__name__}: {e}"}
+            self.wfile.write(json.dumps(response).encode("utf-8") + b"\n")
+            self.wfile.flush()
+
+
+class IPCServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """
+    Serves the json requests sent to the unix socket at `socket_path` with `handle_request`.
+
+    The socket is only accessible by the current user. The result of `handle_request` is sent back to the client,
+    exceptions are sent back as error and raised as `IPCException` by `send_request`.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, socket_path: str, handle_request: Callable[[Dict], object]):
+        self.socket_path = socket_path
+        self.handle_request = handle_request
+        if is_server_running(socket_path):
+            raise IPCException(f"A server is already running at {socket_path}")
+        socket_dir = os.path.dirname(os.path.abspath(socket_path))
+        os.makedirs(socket_dir, mode=0o700, exist_ok=True)
+        _check_is_private(socket_dir, stat.S_ISDIR)
+        if os.path.lexists(socket_path):
+            os.remove(socket_path)
+
+        old_umask = os.umask(0o177)
+        try:
+            super().__init__(socket_path, _RequestHandler)
+        finally:
+            os.umask(old_umask)
+
+    def server_close(self):
+        super().server_close()
+        if os.path.exists(self.socket_path):
+            os.remove(self.socket_path)
+
+
+def send_request(socket_path: str, request: Dict, *, timeout=None):
+    """Sends the request to the server at `socket_path` and returns the result
+
+    Will raise `IPCException` if there is no server or the request failed,
+    `InsecureSocketException` if the socket or the server might belong to another user
+    and `NoResponseException` if the request was sent but not answered
+    """
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+        try:
+            check_socket_is_private(socket_path)
+            client.settimeout(timeout)
+            client.connect(socket_path)
+            _check_peer(client)
+            client.sendall(json.dumps(request).encode("utf-8") + b"\n")
+        except OSError as e:
+            raise IPCException(f"Could not connect to {socket_path}: {e}") from e
+        try:
+            with client.makefile("rb") as response_file:
+                line = response_file.readline()
+        except OSError as e:
+            raise NoResponseException(f"No response from {socket_path}: {e}") from e
+
+    if not line:
+        raise NoResponseException(f"No response from {socket_path}")
+    response = json.loads(line)
+    if "error" in response:
+        raise IPCException(response["error"])
+    return response["result"]
+
+
+def is_server_running(socket_path: str) -> bool:
+    """Returns whether a server is listening at `socket_path`
+
+    Will raise `InsecureSocketException` if the socket or the server might belong to another user
+    """
+    if not os.path.lexists(socket_path):
+        return False
+    try:
+        check_socket_is_private(socket_path)
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+            client.settimeout(1)
+            client.connect(socket_path)
+            _check_peer(client)
+    except OSError:
+        return False
+    return True
@@ -0,0 +1,91 @@
+import json
+from typing import Any, Dict, List, NamedTuple
+
+REFERENCE_KEY = "ref"
+
+
+class InvalidManifestException(Exception):
+    pass
+
+
+class ManifestEntry(NamedTuple):
+    name: str
+    contract_name: str
+    args: List[Any]
+
+
+def is_reference(arg) -> bool:
+    return isinstance(arg, dict) and set(arg.keys()) == {REFERENCE_KEY}
+
+
+def load_deployment_manifest(manifest_path: str) -> List[ManifestEntry]:
+    """
+    Loads and validates the deployment manifest at `manifest_path`
+
+    A manifest is a json file of the form:
+    ```
+    {
+        "deployments": [
+            {"name": "other", "contractName": "OtherContract"},
+            {"contractName": "TestContract", "args": [4]},
+            {"contractName": "ManyArgumentsContract", "args": [0, -1, -2, true, {"ref": "other"}, "0x00"]}
+        ]
+    }
+    ```
+    The name of a deployment defaults to its contract name. Arguments of the form `{"ref": name}` are
+    replaced by the address of the earlier deployment with this name.
+
+    Will raise `InvalidManifestException` if the manifest is invalid
+    """
+    try:
+        with open(manifest_path) as manifest_file:
+            manifest = json.load(manifest_file)
+    except ValueError as e:
+        raise InvalidManifestException(f"Manifest is not valid json: {e}") from e
+
+    if not isinstance(manifest, dict) or not isinstance(
+        manifest.get("deployments"), list
+    ):
+        raise InvalidManifestException("Manifest needs to contain a list 'deployments'")
+
+    entries: List[ManifestEntry] = []
+    names = set()
+    for deployment in manifest["deployments"]:
+        if not isinstance(deployment, dict) or "contractName" not in deployment:
+            raise InvalidManifestException(
+                f"Deployment needs to specify its contractName: {deployment}"
+            )
+        name = deployment.get("name", deployment["contractName"])
+        if name in names:
+            raise InvalidManifestException(f"Duplicated deployment name: {name}")
+
+        args = deployment.get("args", [])
+        if not isinstance(args, list):
+            raise InvalidManifestException(f"Args of {name} need to be a list")
+        for arg in args:
+            if is_reference(arg):
+                if arg[REFERENCE_KEY] not in names:
+                    raise InvalidManifestException(
+                        f"{name} references {arg[REFERENCE_KEY]}, which is not deployed before"
+                    )
+            elif isinstance(arg, (dict, list)):
+                raise InvalidManifestException(f"Unsupported argument of {name}: {arg}")
+
+        names.add(name)
+        entries.append(ManifestEntry(name, deployment["contractName"], args))
+
+    return entries
+
+
+def resolve_manifest_args(args: List[Any], addresses: Dict[str, str]) -> List[str]:
+    """Resolves the references in `args` to the addresses of the deployments and converts all
+    arguments to the string representation used on the command line"""
+    resolved_args = []
+    for arg in args:
+        if is_reference(arg):
+            resolved_args.append(addresses[arg[REFERENCE_KEY]])
+        elif isinstance(arg, bool):
+            resolved_args.append(str(arg).lower())
+        else:
+            resolved_args.append(str(arg))
+    return resolved_args
@@ -1,5 +1,6 @@
 """Pytest plugins"""
 from pathlib import Path
+from typing import Any, Callable, Dict, Tuple
 
 import io
 import shutil
@@ -12,6 +13,8 @@ from web3.providers.eth_tester import EthereumTesterProvider
 
 
 from deploy_tools import compile_project, deploy_compiled_contract
+from deploy_tools.cache import CompilationCache
+from deploy_tools.files import file_lock
 
 
 CONTRACTS_FOLDER_OPTION = "--contracts-dir"
@@ -21,6 +24,13 @@ EVM_VERSION_OPTION_HELP = (
     "The evm target version one of: "
     "petersburg, constantinople, byzantium, spuriousDragon, tangerineWhistle, or homestead"
 )
+RECOMPILE_CONTRACTS_OPTION = "--recompile-contracts"
+RECOMPILE_CONTRACTS_OPTION_HELP = (
+    "Compile the contracts instead of reusing the compiled contracts of a previous run"
+)
+COMPILATION_CACHE_NAME = "deploy-tools"
+COMPILATION_CACHE_MAX_ENTRIES = 8
+COMPILATION_LOCK_FILE_NAME = "compile.lock"
 
 
 def pytest_addoption(parser):
@@ -28,6 +38,24 @@ def pytest_addoption(parser):
     parser.addini(CONTRACTS_FOLDER_OPTION, CONTRACTS_FOLDER_OPTION_HELP)
     parser.addoption(EVM_VERSION_OPTION, help=EVM_VERSION_OPTION_HELP)
     parser.addini(EVM_VERSION_OPTION, EVM_VERSION_OPTION_HELP)
+    parser.addoption(
+        RECOMPILE_CONTRACTS_OPTION,
+        action="store_true",
+        default=False,
+        help=RECOMPILE_CONTRACTS_OPTION_HELP,
+    )
+
+
+@pytest.hookimpl(trylast=True)
+def pytest_configure(config):
+    # With pytest-xdist only the controller process clears the cache, so that the workers
+    # compile the contracts only once
+    if config.getoption(RECOMPILE_CONTRACTS_OPTION) and not hasattr(
+        config, "workerinput"
+    ):
+        compilation_cache = get_compilation_cache(config)
+        if compilation_cache is not None:
+            compilation_cache.clear()
 
 
 def get_contracts_folder(pytestconfig):
@@ -42,18 +70,48 @@ def get_evm_version(pytestconfig):
     return "byzantium"
 
 
+def get_compilation_cache(pytestconfig):
+    """Returns the cache for compiled contracts inside of the pytest cache directory
+
+    Returns None if the pytest cache is disabled.
+    """
+    cache = getattr(pytestconfig, "cache", None)
+    if cache is None:
+        return None
+
+    if hasattr(cache, "mkdir"):
+        cache_dir = cache.mkdir(COMPILATION_CACHE_NAME)
+    else:
+        cache_dir = cache.makedir(COMPILATION_CACHE_NAME)
+    return CompilationCache(str(cache_dir), max_entries=COMPILATION_CACHE_MAX_ENTRIES)
+
+
 @pytest.fixture(scope="session")
 def contract_assets(pytestconfig):
     """
     Returns the compilation assets (dict containing the content of `contracts.json`) of all compiled contracts
     To change the directory of the contracts, use the pytest option --contracts-dir
     To change the target evm version, use the pytest option --evm-version
+    The compiled contracts are reused in the next run if neither the contracts nor solc changed,
+    to always compile the contracts, use the pytest option --recompile-contracts
+    When running with pytest-xdist, only the first worker compiles the contracts and the others reuse
+    its result.
     """
     contracts_path = get_contracts_folder(pytestconfig)
     evm_version = get_evm_version(pytestconfig)
-    return compile_project(
-        contracts_path=contracts_path, optimize=True, evm_version=evm_version
-    )
+    compilation_cache = get_compilation_cache(pytestconfig)
+    if compilation_cache is None:
+        return compile_project(
+            contracts_path=contracts_path, optimize=True, evm_version=evm_version
+        )
+
+    with file_lock(compilation_cache.cache_dir / COMPILATION_LOCK_FILE_NAME):
+        return compile_project(
+            contracts_path=contracts_path,
+            optimize=True,
+            evm_version=evm_version,
+            cache=compilation_cache,
+        )
 
 
 @pytest.fixture(scope="session")
@@ -76,6 +134,36 @@ def deploy_contract(web3, contract_assets):
     return deploy_contract_function
 
 
+@pytest.fixture(scope="session")
+def deployment_scenario(chain):
+    """Fixture to set up a deployment scenario only once per session
+
+    Usage:
+    ```
+    @pytest.fixture()
+    def token_system(deployment_scenario, deploy_contract):
+        return deployment_scenario("token_system", lambda: deploy_token_system(deploy_contract))
+    ```
+
+    The first time a scenario is requested, the setup function is called and a snapshot of the chain
+    is taken. Every later request reverts the chain to this snapshot instead and returns the result of
+    the first setup. The setup function should therefore only depend on session scoped fixtures.
+    """
+    scenarios: Dict[str, Tuple[int, Any]] = {}
+
+    def deployment_scenario_function(name: str, setup_function: Callable[[], Any]):
+        if name in scenarios:
+            snapshot, result = scenarios[name]
+            chain.revert_to_snapshot(snapshot)
+            return result
+
+        result = setup_function()
+        scenarios[name] = (chain.take_snapshot(), result)
+        return result
+
+    return deployment_scenario_function
+
+
 @pytest.fixture(scope="session")
 def chain():
     """
@@ -0,0 +1,173 @@
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, Optional
+
+from hexbytes import HexBytes
+from web3 import Web3
+from web3.exceptions import TimeExhausted
+
+from .rpc import get_transaction_receipts, make_batch_request
+
+DEFAULT_POLL_INTERVAL = 1.0
+
+
+class ReceiptTracker:
+    """
+    Tracks the receipts of many transactions until they reached the required number of confirmations.
+
+    The tracker polls the latest block once per `poll_interval`. Only when a new block arrived, the receipts of all
+    tracked transactions are fetched with a single batch request. A transaction has one confirmation once it is mined,
+    every following block adds one confirmation. If a chain reorganization removes a transaction from its block,
+    it is tracked again until it is mined in the new chain.
+
+    `on_confirmation` is called with the transaction hash and its number of confirmations whenever it increased,
+    `on_reorganization` is called with the transaction hash if the transaction was removed from its block.
+    """
+
+    def __init__(
+        self,
+        web3: Web3,
+        *,
+        confirmations: int = 1,
+        poll_interval: float = DEFAULT_POLL_INTERVAL,
+        on_confirmation: Callable[[HexBytes, int], None] = None,
+        on_reorganization: Callable[[HexBytes], None] = None,
+    ):
+        if confirmations < 1:
+            raise ValueError("At least one confirmation is required")
+        self.web3 = web3
+        self.confirmations = confirmations
+        self.poll_interval = poll_interval
+        self.on_confirmation = on_confirmation
+        self.on_reorganization = on_reorganization
+
+        self._lock = threading.Lock()
+        # the last known receipt of every tracked transaction, None if it is not mined yet
+        self._receipts: Dict[HexBytes, Optional[Dict]] = {}
+        self._reached_confirmations: Dict[HexBytes, int] = {}
+        self._confirmed: Dict[HexBytes, Dict] = {}
+        self._latest_block_hash: Optional[bytes] = None
+
+    @property
+    def pending_transaction_hashes(self) -> List[HexBytes]:
+        with self._lock:
+            return list(self._receipts)
+
+    def is_confirmed(self, transaction_hash) -> bool:
+        """Returns whether the transaction reached the required confirmations with the polls so far"""
+        with self._lock:
+            return HexBytes(transaction_hash) in self._confirmed
+
+    def track(self, transaction_hash) -> None:
+        """Starts to track the transaction, its receipt is available via `poll` or `wait_for_receipt`"""
+        transaction_hash = HexBytes(transaction_hash)
+        with self._lock:
+            if transaction_hash not in self._confirmed:
+                self._receipts.setdefault(transaction_hash, None)
+                # fetch the receipts again for the new transaction
+                self._latest_block_hash = None
+
+    def untrack(self, transaction_hash) -> None:
+        transaction_hash = HexBytes(transaction_hash)
+        with self._lock:
+            self._receipts.pop(transaction_hash, None)
+            self._reached_confirmations.pop(transaction_hash, None)
+            self._confirmed.pop(transaction_hash, None)
+
+    def poll(self) -> Dict[HexBytes, Dict]:
+        """Checks for a new block and updates the receipts of the tracked transactions
+
+        Returns: The receipts of the transactions that reached the required confirmations with this poll
+        """
+        (latest_block,) = make_batch_request(
+            self.web3, [("eth_getBlockByNumber", ["latest", False])]
+        )
+        with self._lock:
+            if latest_block["hash"] == self._latest_block_hash:
+                return {}
+            self._latest_block_hash = latest_block["hash"]
+            transaction_hashes = list(self._receipts)
+
+        if not transaction_hashes:
+            return {}
+        receipts = get_transaction_receipts(self.web3, transaction_hashes)
+
+        newly_confirmed = {}
+        with self._lock:
+            for transaction_hash, receipt in zip(transaction_hashes, receipts):
+                if transaction_hash not in self._receipts:
+                    continue
+                if receipt is not None and receipt.get("blockNumber") is None:
+                    receipt = None
+
+                previous_receipt = self._receipts[transaction_hash]
+                if previous_receipt is not None and (
+                    receipt is None
+                    or receipt["blockHash"] != previous_receipt["blockHash"]
+                ):
+                    self._reached_confirmations.pop(transaction_hash, None)
+                    if self.on_reorganization is not None:
+                        self.on_reorganization(transaction_hash)
+                self._receipts[transaction_hash] = receipt
+                if receipt is None:
+                    continue
+
+                confirmations = latest_block["number"] - receipt["blockNumber"] + 1
+                if confirmations > self._reached_confirmations.get(transaction_hash, 0):
+                    self._reached_confirmations[transaction_hash] = confirmations
+                    if self.on_confirmation is not None:
+                        self.on_confirmation(transaction_hash, confirmations)
+
+                if confirmations >= self.confirmations:
+                    del self._receipts[transaction_hash]
+                    del self._reached_confirmations[transaction_hash]
+                    self._confirmed[transaction_hash] = receipt
+                    newly_confirmed[transaction_hash] = receipt
+
+        return newly_confirmed
+
+    def wait_for_receipts(
+        self, transaction_hashes: Iterable, timeout=180
+    ) -> Dict[HexBytes, Dict]:
+        """Waits until all transactions reached the required number of confirmations
+
+        Returns: The receipts of the transactions by their hash
+        Will raise `TimeExhausted` if not all transactions were confirmed within `timeout` seconds
+        """
+        transaction_hashes = list(
+            dict.fromkeys(HexBytes(tx_hash) for tx_hash in transaction_hashes)
+        )
+        for transaction_hash in transaction_hashes:
+            self.track(transaction_hash)
+
+        deadline = time.monotonic() + timeout
+        polled = False
+        while True:
+            with self._lock:
+                if all(tx_hash in self._confirmed for tx_hash in transaction_hashes):
+                    return {
+                        tx_hash: self._confirmed.pop(tx_hash)
+                        for tx_hash in transaction_hashes
+                    }
+            if polled:
+                if time.monotonic() >= deadline:
+                    for transaction_hash in transaction_hashes:
+                        self.untrack(transaction_hash)
+                    raise TimeExhausted(
+                        f"Transactions {[tx_hash.hex() for tx_hash in transaction_hashes]} "
+                        f"were not confirmed after {timeout} seconds"
+                    )
+                time.sleep(min(self.poll_interval, max(deadline - time.monotonic(), 0)))
+            self.poll()
+            polled = True
+
+    def wait_for_receipt(self, transaction_hash, timeout=180) -> Dict:
+        """Waits until the transaction reached the required number of confirmations
+
+        Returns: The transaction receipt
+        Will raise `TimeExhausted` if the transaction was not confirmed within `timeout` seconds
+        """
+        transaction_hash = HexBytes(transaction_hash)
+        return self.wait_for_receipts([transaction_hash], timeout=timeout)[
+            transaction_hash
+        ]
@@ -0,0 +1,346 @@
+import json
+import time
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+import requests
+from eth_utils import to_checksum_address
+from hexbytes import HexBytes
+from web3 import Web3, HTTPProvider
+from web3.datastructures import AttributeDict
+
+DEFAULT_POOL_SIZE = 10
+
+
+class RequestStatistics:
+    """Counts the json rpc requests sent by a provider and their latency"""
+
+    def __init__(self):
+        self.request_count = 0
+        self.call_count = 0
+        self.total_latency = 0.0
+
+    def record(self, latency: float, call_count: int = 1) -> None:
+        self.request_count += 1
+        self.call_count += call_count
+        self.total_latency += latency
+
+    def copy(self) -> "RequestStatistics":
+        statistics = RequestStatistics()
+        statistics.request_count = self.request_count
+        statistics.call_count = self.call_count
+        statistics.total_latency = self.total_latency
+        return statistics
+
+    def __sub__(self, other: "RequestStatistics") -> "RequestStatistics":
+        """Returns the statistics of the requests recorded since `other` was copied from these statistics"""
+        statistics = RequestStatistics()
+        statistics.request_count = self.request_count - other.request_count
+        statistics.call_count = self.call_count - other.call_count
+        statistics.total_latency = self.total_latency - other.total_latency
+        return statistics
+
+    def __str__(self):
+        return (
+            f"{self.request_count} json rpc requests with {self.call_count} calls, "
+            f"total latency {self.total_latency:.3f}s"
+        )
+
+
+class BatchingHTTPProvider(HTTPProvider):
+    """
+    HTTP provider keeping its connections alive in a pool and supporting json rpc batch requests.
+    The number of requests and their latency is recorded in `statistics`.
+    """
+
+    def __init__(
+        self, endpoint_uri: str, request_kwargs=None, *, pool_size=DEFAULT_POOL_SIZE
+    ):
+        super().__init__(endpoint_uri, request_kwargs=request_kwargs)
+        self.session = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(
+            pool_connections=1, pool_maxsize=pool_size
+        )
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.statistics = RequestStatistics()
+
+    def make_request(self, method, params):
+        raw_response = self._post(self.encode_rpc_request(method, params))
+        return self.decode_rpc_response(raw_response)
+
+    def make_batch_request(self, calls: Sequence[Tuple[str, Any]]) -> List[Dict]:
+        """Sends the calls, given as tuples of method and params, in a single batch request
+
+        Returns: The responses in the order of `calls`
+        """
+        if not calls:
+            return []
+
+        requests_data = [
+            {
+                "jsonrpc": "2.0",
+                "method": method,
+                "params": params or [],
+                "id": next(self.request_counter),
+            }
+            for method, params in calls
+        ]
+        raw_response = self._post(
+            json.dumps(requests_data).encode("utf-8"), call_count=len(calls)
+        )
+        responses = json.loads(raw_response)
+        if not isinstance(responses, list):
+            raise ValueError(f"Batch request failed: {responses}")
+
+        responses_by_id = {response.get("id"): response for response in responses}
+        return [responses_by_id[request["id"]] for request in requests_data]
+
+    def _post(self, data: bytes, call_count: int = 1) -> bytes:
+        start = time.perf_counter()
+        response = self.session.post(
+            self.endpoint_uri, data=data, **self.get_request_kwargs()
+        )
+        response.raise_for_status()
+        self.statistics.record(time.perf_counter() - start, call_count)
+        return response.content
+
+
+def supports_batch_requests(web3: Web3) -> bool:
+    return isinstance(web3.provider, BatchingHTTPProvider)
+
+
+def _to_int(value):
+    if isinstance(value, str):
+        return int(value, 16) if value.startswith("0x") else int(value)
+    return value
+
+
+def _to_bytes(value):
+    if value is None:
+        return None
+    return HexBytes(value)
+
+
+RECEIPT_FORMATTERS: Dict[str, Callable] = {
+    "blockHash": _to_bytes,
+    "blockNumber": _to_int,
+    "transactionHash": _to_bytes,
+    "transactionIndex": _to_int,
+    "cumulativeGasUsed": _to_int,
+    "gasUsed": _to_int,
+    "status": _to_int,
+    "contractAddress": lambda value: value and to_checksum_address(value),
+}
+
+
+def _format_receipt(receipt):
+    if receipt is None:
+        return None
+    return AttributeDict(
+        {
+            key: RECEIPT_FORMATTERS.get(key, lambda value: value)(value)
+            for key, value in receipt.items()
+        }
+    )
+
+
+BLOCK_FORMATTERS: Dict[str, Callable] = {
+    "number": _to_int,
+    "hash": _to_bytes,
+    "parentHash": _to_bytes,
+    "timestamp": _to_int,
+    "gasLimit": _to_int,
+    "gasUsed": _to_int,
+}
+
+
+def _format_block(block):
+    if block is None:
+        return None
+    return AttributeDict(
+        {
+            key: BLOCK_FORMATTERS.get(key, lambda value: value)(value)
+            for key, value in block.items()
+        }
+    )
+
+
+# Formatters turning the results of a batch request into the types returned by web3.
+# They accept already formatted results as well.
+RESULT_FORMATTERS: Dict[str, Callable] = {
+    "eth_blockNumber": _to_int,
+    "eth_chainId": _to_int,
+    "eth_estimateGas": _to_int,
+    "eth_gasPrice": _to_int,
+    "eth_getTransactionCount": _to_int,
+    "net_version": _to_int,
+    "eth_call": _to_bytes,
+    "eth_getCode": _to_bytes,
+    "eth_getTransactionReceipt": _format_receipt,
+    "eth_getBlockByNumber": _format_block,
+}
+
+
+def make_batch_request(
+    web3: Web3, calls: Sequence[Tuple[str, Any]], *, return_exceptions=False
+) -> List[Any]:
+    """
+    Sends the json rpc calls, given as tuples of method and params, in a single batch request
+    if the provider of web3 supports it, otherwise one after the other.
+    Will raise `ValueError` if any of the calls failed, unless `return_exceptions` is set,
+    in which case the `ValueError` of a failed call is returned in place of its result.
+
+    Returns: The formatted results in the order of `calls`
+    """
+    raw_results: List[Any] = []
+    if supports_batch_requests(web3):
+        for response in web3.provider.make_batch_request(calls):
+            if "error" in response:
+                error = ValueError(response["error"])
+                if not return_exceptions:
+                    raise error
+                raw_results.append(error)
+            else:
+                raw_results.append(response.get("result"))
+    else:
+        for method, params in calls:
+            try:
+                raw_results.append(web3.manager.request_blocking(method, params))
+            except ValueError as error:
+                if not return_exceptions:
+                    raise
+                raw_results.append(error)
+
+    return [
+        result
+        if isinstance(result, ValueError)
+        else RESULT_FORMATTERS.get(method, lambda value: value)(result)
+        for (method, _), result in zip(calls, raw_results)
+    ]
+
+
+def prefill_transaction_options(
+    web3: Web3, transaction_options: Dict, *, sender=None, include_chain_id=False
+) -> Dict:
+    """
+    Fills in the nonce (if `sender` is given), the gas price and the chain id (if `include_chain_id`),
+    which would otherwise be fetched one after the other when building the transaction.
+    All missing values are fetched with a single batch request if the provider supports it.
+    The chain id is left out if the node does not support `eth_chainId`.
+
+    Returns: A copy of `transaction_options` with the missing values filled in
+    """
+    transaction_options = transaction_options.copy()
+    calls = []
+    if sender is not None and "nonce" not in transaction_options:
+        calls.append(("nonce", ("eth_getTransactionCount", [sender, "pending"])))
+    if (
+        "gasPrice" not in transaction_options
+        and getattr(web3.eth, "gasPriceStrategy", None) is None
+    ):
+        calls.append(("gasPrice", ("eth_gasPrice", [])))
+    if include_chain_id and "chainId" not in transaction_options:
+        calls.append(("chainId", ("eth_chainId", [])))
+
+    results = make_batch_request(
+        web3, [call for _, call in calls], return_exceptions=True
+    )
+    for (key, _), result in zip(calls, results):
+        if isinstance(result, ValueError):
+            if key == "chainId":
+                # old nodes do not support eth_chainId
+                continue
+            raise result
+        transaction_options[key] = result
+    return transaction_options
+
+
+def get_transaction_receipts(
+    web3: Web3, transaction_hashes: Sequence[bytes]
+) -> List[Optional[AttributeDict]]:
+    """Fetches the receipts of all transactions with a single batch request if possible
+
+    Returns: The receipts in the order of `transaction_hashes`, None for transactions that are not mined yet
+    """
+    return make_batch_request(
+        web3,
+        [
+            ("eth_getTransactionReceipt", [HexBytes(transaction_hash).hex()])
+            for transaction_hash in transaction_hashes
+        ],
+    )
+
+
+class CallOutcome(NamedTuple):
+    successful: bool
+    result: Any = None
+    error: Optional[Exception] = None
+
+
+def call_functions(
+    web3: Web3, function_calls: Sequence, *, block_identifier="latest"
+) -> List[CallOutcome]:
+    """
+    Calls the contract functions with `eth_call` in a single batch request if the provider supports it,
+    otherwise one after the other. A failed call does not affect the other calls.
+
+    Returns: The outcomes with the decoded results in the order of `function_calls`
+    """
+    calls = [
+        (
+            "eth_call",
+            [
+                {
+                    "to": function_call.address,
+                    "data": function_call._encode_transaction_data(),
+                },
+                block_identifier,
+            ],
+        )
+        for function_call in function_calls
+    ]
+
+    if supports_batch_requests(web3):
+        raw_outcomes = []
+        for response in web3.provider.make_batch_request(calls):
+            if "error" in response:
+                raw_outcomes.append(
+                    CallOutcome(False, error=ValueError(response["error"]))
+                )
+            else:
+                raw_outcomes.append(CallOutcome(True, response.get("result")))
+    else:
+        raw_outcomes = []
+        for method, params in calls:
+            try:
+                raw_outcomes.append(
+                    CallOutcome(True, web3.manager.request_blocking(method, params))
+                )
+            except Exception as e:
+                raw_outcomes.append(CallOutcome(False, error=e))
+
+    outcomes = []
+    for function_call, outcome in zip(function_calls, raw_outcomes):
+        if outcome.successful:
+            try:
+                outcome = CallOutcome(
+                    True,
+                    _decode_function_result(web3, function_call.abi, outcome.result),
+                )
+            except Exception as e:
+                outcome = CallOutcome(False, error=e)
+        outcomes.append(outcome)
+    return outcomes
+
+
+def _decode_function_result(web3: Web3, function_abi: Dict, data):
+    """Decodes the return data of a function call like web3 does for `call()`"""
+    from web3._utils.abi import get_abi_output_types, map_abi_data
+    from web3._utils.normalizers import BASE_RETURN_NORMALIZERS
+
+    output_types = get_abi_output_types(function_abi)
+    result = web3.codec.decode_abi(output_types, HexBytes(data))
+    result = map_abi_data(BASE_RETURN_NORMALIZERS, output_types, result)
+    if len(result) == 1:
+        return result[0]
+    return result
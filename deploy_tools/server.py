@@ -0,0 +1,243 @@
+"""Server running commands of the cli in a long running process, similar to the agent
+
+Compiled contracts and json rpc connections are kept between the commands, so that a command forwarded to the server
+neither has to import web3 nor to compile or load the contracts again.
+"""
+import io
+import os
+import sys
+import threading
+from contextlib import contextmanager, redirect_stderr, redirect_stdout
+from typing import Callable, Dict, Hashable, List, Optional, Tuple
+
+from .assets import get_index_path, is_split_contracts_path
+from .cache import CACHE_DIR_ENVIRONMENT_VARIABLE
+from .files import find_files
+from .ipc import IPCServer, default_socket_path, is_server_running, send_request
+
+# commands forwarded to the server if it is running
+FORWARDED_COMMANDS = ("deploy", "transact", "call")
+# environment variables changing the behaviour of the commands, a forwarded command runs with the ones of the client
+FORWARDED_ENVIRONMENT_VARIABLES = (
+    CACHE_DIR_ENVIRONMENT_VARIABLE,
+    "XDG_CACHE_HOME",
+    "SOLC_BINARY",
+)
+
+
+def default_server_socket_path() -> str:
+    """Returns the path of the socket of the server
+
+    The path can be set via the environment variable DEPLOY_TOOLS_SERVER_SOCKET
+    """
+    socket_path = os.environ.get("DEPLOY_TOOLS_SERVER_SOCKET")
+    if socket_path:
+        return socket_path
+    return default_socket_path("deploy-tools-server.sock")
+
+
+class CommandServer:
+    """Runs commands of the cli one at a time and keeps their connections and compiled contracts"""
+
+    def __init__(self):
+        self.web3_connections: Dict[str, object] = {}
+        # the version and the compiled contracts by their path, only the newest version of a path is kept
+        self.compiled_contracts: Dict[Hashable, Tuple[Hashable, Dict]] = {}
+        # commands change the working directory and the standard streams of the process
+        self._lock = threading.Lock()
+
+    def connect(self, jsonrpc: str, connect: Callable[[], object]):
+        """Returns the kept connection to `jsonrpc` or the one created with `connect`"""
+        if jsonrpc not in self.web3_connections:
+            self.web3_connections[jsonrpc] = connect()
+        return self.web3_connections[jsonrpc]
+
+    def get_compiled_contracts(
+        self, key: Tuple[Hashable, Hashable], load: Callable[[], Dict]
+    ) -> Dict:
+        """Returns the kept compiled contracts of `key` or the ones loaded with `load`
+
+        The key is made of the path and the version of the compiled contracts, see `compiled_contracts_key`.
+        Loaded contracts replace the kept ones of an older version of the same path, which are closed
+        if they hold resources like a memory map of their file.
+        """
+        path, version = key
+        kept = self.compiled_contracts.get(path)
+        if kept is None or kept[0] != version:
+            self.compiled_contracts[path] = (version, load())
+            if kept is not None and hasattr(kept[1], "close"):
+                kept[1].close()
+        return self.compiled_contracts[path][1]
+
+    def run_command(
+        self, args: List[str], cwd: str, environment: Dict[str, Optional[str]] = None
+    ) -> Dict:
+        """Runs the cli with `args` in `cwd` with the environment variables in `environment` set,
+        a variable set to None is removed
+
+        Returns: The exit code of the command and what it wrote to stdout and stderr
+        """
+        import click
+        from .cli import main
+
+        stdout = io.StringIO()
+        stderr = io.StringIO()
+        with self._lock, _running_in(self), _working_directory(cwd), _environment(
+            environment or {}
+        ), _no_stdin(), redirect_stdout(stdout), redirect_stderr(stderr):
+            try:
+                result = main.main(
+                    args=args, prog_name="deploy-tools", standalone_mode=False
+                )
+                # click returns the exit code instead of raising `Exit` in some versions
+                exit_code = result if isinstance(result, int) else 0
+            except click.ClickException as e:
+                e.show()
+                exit_code = e.exit_code
+            except click.exceptions.Exit as e:
+                exit_code = e.exit_code
+            except click.Abort:
+                click.echo("Aborted!", err=True)
+                exit_code = 1
+            except Exception as e:
+                click.echo(f"Error: {type(e).__name__}: {e}", err=True)
+                exit_code = 1
+
+        return {
+            "exitCode": exit_code,
+            "stdout": stdout.getvalue(),
+            "stderr": stderr.getvalue(),
+        }
+
+    def handle_request(self, request: Dict):
+        method = request.get("method")
+        if method == "run_command":
+            return self.run_command(
+                request["args"], request["cwd"], request.get("environment")
+            )
+        else:
+            raise ValueError(f"Unknown method: {method}")
+
+
+_running_command = threading.local()
+
+
+def active_server() -> Optional[CommandServer]:
+    """Returns the server if the current thread runs a command of the server"""
+    return getattr(_running_command, "server", None)
+
+
+def create_command_server(socket_path: str) -> IPCServer:
+    return IPCServer(socket_path, CommandServer().handle_request)
+
+
+def compiled_contracts_key(
+    *, contracts_dir, optimize, evm_version, compiled_contracts_path
+) -> Tuple[Hashable, Hashable]:
+    """Returns the path of the compiled contracts and their version,
+    which changes with the contracts or their compilation settings"""
+    if compiled_contracts_path is not None:
+        # the index of split contracts changes with every contract
+        if is_split_contracts_path(compiled_contracts_path) and os.path.isdir(
+            compiled_contracts_path
+        ):
+            compiled_contracts_path = get_index_path(compiled_contracts_path)
+        return (
+            ("compiled", os.path.abspath(compiled_contracts_path)),
+            _file_version(compiled_contracts_path),
+        )
+    return (
+        ("contracts", os.path.abspath(contracts_dir)),
+        (
+            optimize,
+            evm_version,
+            os.environ.get("SOLC_BINARY"),
+            tuple(
+                (os.path.abspath(path), _file_version(path))
+                for path in sorted(find_files(contracts_dir, "*.sol"))
+            ),
+        ),
+    )
+
+
+def _file_version(path: str):
+    stat = os.stat(path)
+    return stat.st_ino, stat.st_mtime_ns, stat.st_size
+
+
+def is_server_available(socket_path: str = None) -> bool:
+    """Returns whether commands can be forwarded to a server, which is never the case within the server itself
+
+    Will raise `InsecureSocketException` if the socket of the server might belong to another user
+    """
+    return active_server() is None and is_server_running(
+        socket_path or default_server_socket_path()
+    )
+
+
+def forward_command(args: List[str], *, socket_path: str = None) -> Dict:
+    """Runs the command with `args` in the server with the current working directory and environment variables,
+    see `FORWARDED_ENVIRONMENT_VARIABLES`
+
+    Returns: The exit code of the command and what it wrote to stdout and stderr
+    Will raise `IPCException` if the command could not be forwarded, see `send_request`
+    """
+    return send_request(
+        socket_path or default_server_socket_path(),
+        {
+            "method": "run_command",
+            "args": args,
+            "cwd": os.getcwd(),
+            "environment": {
+                name: os.environ.get(name) for name in FORWARDED_ENVIRONMENT_VARIABLES
+            },
+        },
+    )
+
+
+@contextmanager
+def _running_in(server: CommandServer):
+    _running_command.server = server
+    try:
+        yield
+    finally:
+        _running_command.server = None
+
+
+@contextmanager
+def _working_directory(path: str):
+    previous_path = os.getcwd()
+    os.chdir(path)
+    try:
+        yield
+    finally:
+        os.chdir(previous_path)
+
+
+@contextmanager
+def _environment(environment: Dict[str, Optional[str]]):
+    previous_environment = {name: os.environ.get(name) for name in environment}
+    _set_environment(environment)
+    try:
+        yield
+    finally:
+        _set_environment(previous_environment)
+
+
+def _set_environment(environment: Dict[str, Optional[str]]) -> None:
+    for name, value in environment.items():
+        if value is None:
+            os.environ.pop(name, None)
+        else:
+            os.environ[name] = value
+
+
+@contextmanager
+def _no_stdin():
+    """Replaces stdin with an empty stream, so that prompts of a command fail instead of blocking the server"""
+    previous_stdin = sys.stdin
+    sys.stdin = io.StringIO()
+    try:
+        yield
+    finally:
+        sys.stdin = previous_stdin
@@ -0,0 +1,88 @@
+"""Watching the source files of the contracts for changes"""
+import fnmatch
+import os
+import time
+from typing import Dict, List, Tuple
+
+DEFAULT_POLL_INTERVAL = 0.5
+DEFAULT_DEBOUNCE_TIME = 0.2
+
+
+class SourceWatcher:
+    """
+    Watches the files matching `pattern` in `directory` and its subdirectories for changes by polling.
+
+    A poll only lists the directories again whose modification time changed, because a file was added or removed.
+    All other files are checked by their modification time and size, so the directory tree is not walked every time.
+    """
+
+    def __init__(self, directory: str, *, pattern="*.sol"):
+        self.directory = directory
+        self.pattern = pattern
+        self._directory_versions: Dict[str, int] = {}
+        self._file_versions: Dict[str, Tuple[int, int]] = {}
+        self._scan_directory(directory)
+
+    @property
+    def file_paths(self) -> List[str]:
+        return sorted(self._file_versions)
+
+    def poll(self) -> bool:
+        """Returns whether a file was added, removed or changed since the last poll"""
+        previous_file_versions = dict(self._file_versions)
+
+        for directory, version in list(self._directory_versions.items()):
+            try:
+                current_version = os.stat(directory).st_mtime_ns
+            except FileNotFoundError:
+                del self._directory_versions[directory]
+                continue
+            if current_version != version:
+                self._scan_directory(directory)
+
+        for path in list(self._file_versions):
+            try:
+                self._file_versions[path] = _file_version(path)
+            except FileNotFoundError:
+                del self._file_versions[path]
+
+        return self._file_versions != previous_file_versions
+
+    def wait_for_change(
+        self,
+        *,
+        poll_interval: float = DEFAULT_POLL_INTERVAL,
+        debounce_time: float = DEFAULT_DEBOUNCE_TIME,
+    ) -> None:
+        """Blocks until a file changed and no further change followed within `debounce_time`,
+        so that a burst of saves is seen as a single change"""
+        while not self.poll():
+            time.sleep(poll_interval)
+        while True:
+            time.sleep(debounce_time)
+            if not self.poll():
+                return
+
+    def _scan_directory(self, directory: str) -> None:
+        try:
+            version = os.stat(directory).st_mtime_ns
+            entries = list(os.scandir(directory))
+        except FileNotFoundError:
+            return
+        self._directory_versions[directory] = version
+
+        for entry in entries:
+            if entry.is_dir():
+                if entry.path not in self._directory_versions:
+                    self._scan_directory(entry.path)
+            elif fnmatch.fnmatch(entry.name, self.pattern):
+                if entry.path not in self._file_versions:
+                    try:
+                        self._file_versions[entry.path] = _file_version(entry.path)
+                    except FileNotFoundError:
+                        pass
+
+
+def _file_version(path: str) -> Tuple[int, int]:
+    stat = os.stat(path)
+    return stat.st_mtime_ns, stat.st_size
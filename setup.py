@@ -12,6 +12,8 @@ setup(
         "eth-utils",
         "eth-keyfile",
         "click",
+        "rlp",
+        "hexbytes",
     ],
     entry_points="""
     [console_scripts]
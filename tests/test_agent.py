@@ -0,0 +1,124 @@
+import os
+import shutil
+import tempfile
+import threading
+import time
+
+import pytest
+from eth_account import Account
+
+from deploy_tools.agent import (
+    AgentClient,
+    create_agent_server,
+    default_agent_socket_path,
+)
+from deploy_tools.deploy import send_function_call_transaction
+from deploy_tools.ipc import IPCException, InsecureSocketException
+
+
+@pytest.fixture()
+def agent_socket_path():
+    # the path of a unix socket is limited to about 100 characters, which tmp_path might exceed
+    socket_dir = tempfile.mkdtemp()
+    socket_path = os.path.join(socket_dir, "agent.sock")
+    server = create_agent_server(socket_path, default_ttl=60)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield socket_path
+    server.shutdown()
+    server.server_close()
+    shutil.rmtree(socket_dir)
+
+
+@pytest.fixture()
+def agent_client(agent_socket_path):
+    return AgentClient(agent_socket_path)
+
+
+@pytest.fixture()
+def transaction():
+    return {
+        "to": "0x" + "11" * 20,
+        "value": 1,
+        "gas": 21000,
+        "gasPrice": 1,
+        "nonce": 0,
+        "chainId": 1,
+        "data": b"\x01\x02",
+    }
+
+
+def test_agent_signs_like_local_key(agent_client, account_keys, transaction):
+    private_key = account_keys[0].to_bytes()
+    account = agent_client.add_key(private_key)
+
+    signed_transaction = account.signTransaction(transaction)
+
+    local_signed_transaction = Account.signTransaction(transaction, private_key)
+    assert signed_transaction.rawTransaction == bytes(
+        local_signed_transaction.rawTransaction
+    )
+    assert account.address == Account.privateKeyToAccount(private_key).address
+
+
+def test_agent_get_account(agent_client, account_keys):
+    address = agent_client.add_key(account_keys[0].to_bytes()).address
+
+    assert agent_client.get_account(address).address == address
+    assert agent_client.get_account("0x" + "00" * 20) is None
+
+
+def test_agent_forgets_key_after_ttl(agent_client, account_keys, transaction):
+    account = agent_client.add_key(account_keys[0].to_bytes(), ttl=0.05)
+    time.sleep(0.1)
+
+    assert agent_client.get_account(account.address) is None
+    with pytest.raises(IPCException):
+        account.signTransaction(transaction)
+
+
+def test_agent_is_not_running(tmp_path):
+    assert not AgentClient(str(tmp_path / "missing.sock")).is_running()
+
+
+def test_agent_socket_accessible_by_others(
+    agent_client, agent_socket_path, account_keys
+):
+    os.chmod(os.path.dirname(agent_socket_path), 0o755)
+
+    with pytest.raises(InsecureSocketException):
+        agent_client.is_running()
+    with pytest.raises(InsecureSocketException):
+        agent_client.add_key(account_keys[0].to_bytes())
+
+
+def test_agent_refuses_shared_socket_directory():
+    socket_dir = tempfile.mkdtemp()
+    os.chmod(socket_dir, 0o777)
+    try:
+        with pytest.raises(InsecureSocketException):
+            create_agent_server(os.path.join(socket_dir, "agent.sock"))
+    finally:
+        shutil.rmtree(socket_dir)
+
+
+def test_default_agent_socket_path_without_runtime_dir(monkeypatch):
+    monkeypatch.delenv("DEPLOY_TOOLS_AGENT_SOCKET", raising=False)
+    monkeypatch.delenv("XDG_RUNTIME_DIR", raising=False)
+
+    socket_dir = os.path.dirname(default_agent_socket_path())
+
+    assert os.path.basename(socket_dir) == f"deploy-tools-{os.getuid()}"
+
+
+def test_send_transaction_with_agent_account(
+    agent_client, account_keys, deploy_contract
+):
+    test_contract = deploy_contract("TestContract", constructor_args=(4,))
+    account = agent_client.add_key(account_keys[1].to_bytes())
+
+    send_function_call_transaction(
+        test_contract.functions.set(200), web3=test_contract.web3, private_key=account
+    )
+
+    assert test_contract.functions.state().call() == 200
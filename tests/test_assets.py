@@ -0,0 +1,169 @@
+import json
+import os
+
+import pytest
+
+from deploy_tools.assets import (
+    LazyContractAssets,
+    SplitContracts,
+    load_compiled_contracts,
+    write_split_contracts,
+)
+from deploy_tools.cache import CompilationCache
+from deploy_tools.files import (
+    load_json_asset,
+    replace_json_asset,
+    write_pretty_json_asset,
+)
+
+
+@pytest.fixture(autouse=True)
+def cache_dir(tmp_path_factory, monkeypatch):
+    cache_dir = tmp_path_factory.mktemp("cache")
+    monkeypatch.setenv("DEPLOY_TOOLS_CACHE_DIR", str(cache_dir))
+    return cache_dir
+
+
+@pytest.fixture()
+def compiled_contracts():
+    return {
+        "A": {"abi": [{"type": "fallback"}], "bytecode": "0x00"},
+        "B": {"abi": [], "bytecode": "0x01"},
+    }
+
+
+@pytest.mark.parametrize("split_fields", [False, True])
+def test_split_contracts(tmp_path, compiled_contracts, split_fields):
+    assert write_split_contracts(
+        compiled_contracts, str(tmp_path), split_fields=split_fields
+    )
+
+    split_contracts = SplitContracts(str(tmp_path))
+    assert dict(split_contracts) == compiled_contracts
+    assert "C" not in split_contracts
+
+
+def test_split_contracts_loads_only_accessed_contract(tmp_path, compiled_contracts):
+    write_split_contracts(compiled_contracts, str(tmp_path))
+    os.remove(tmp_path / "contracts" / "B.json")
+
+    split_contracts = SplitContracts(str(tmp_path / "index.json"))
+
+    assert list(split_contracts) == ["A", "B"]
+    assert split_contracts["A"] == compiled_contracts["A"]
+
+
+def test_write_unchanged_split_contracts(tmp_path, compiled_contracts):
+    write_split_contracts(compiled_contracts, str(tmp_path))
+
+    assert not write_split_contracts(compiled_contracts, str(tmp_path))
+
+
+def test_write_split_contracts_removes_old_contracts(tmp_path, compiled_contracts):
+    write_split_contracts(compiled_contracts, str(tmp_path), split_fields=True)
+    del compiled_contracts["B"]
+
+    assert write_split_contracts(compiled_contracts, str(tmp_path), split_fields=True)
+    assert not (tmp_path / "contracts" / "B").exists()
+    assert dict(SplitContracts(str(tmp_path))) == compiled_contracts
+
+
+@pytest.mark.parametrize("split_fields", [False, True])
+def test_split_contracts_with_colliding_names(tmp_path, split_fields):
+    compiled_contracts = {
+        "index": {"abi": [], "bytecode": "0x00"},
+        "Token": {"abi": [], "bytecode": "0x01"},
+        "token": {"abi": [], "bytecode": "0x02"},
+    }
+    write_split_contracts(compiled_contracts, str(tmp_path), split_fields=split_fields)
+
+    file_names = {path.name.lower() for path in (tmp_path / "contracts").iterdir()}
+    assert len(file_names) == 3
+    assert dict(SplitContracts(str(tmp_path))) == compiled_contracts
+
+
+def test_load_compiled_contracts(tmp_path, compiled_contracts):
+    contracts_path = str(tmp_path / "contracts.json")
+    split_path = str(tmp_path / "split")
+    write_pretty_json_asset(compiled_contracts, contracts_path)
+    write_split_contracts(compiled_contracts, split_path)
+
+    assert isinstance(load_compiled_contracts(contracts_path), LazyContractAssets)
+    assert load_compiled_contracts(contracts_path) == compiled_contracts
+    assert isinstance(load_compiled_contracts(split_path), SplitContracts)
+
+
+@pytest.fixture()
+def compiled_contracts_with_special_strings(compiled_contracts):
+    compiled_contracts["C"] = {
+        "devdoc": {"details": 'a "quoted" {brace}, [bracket]: \\\\'}
+    }
+    return compiled_contracts
+
+
+@pytest.mark.parametrize("pretty", [False, True])
+def test_lazy_contract_assets(
+    tmp_path, compiled_contracts_with_special_strings, pretty
+):
+    contracts_path = str(tmp_path / "contracts.json")
+    replace_json_asset(
+        compiled_contracts_with_special_strings, contracts_path, pretty=pretty
+    )
+
+    lazy_contract_assets = LazyContractAssets(contracts_path)
+
+    assert list(lazy_contract_assets) == ["A", "B", "C"]
+    assert dict(lazy_contract_assets) == compiled_contracts_with_special_strings
+    assert "D" not in lazy_contract_assets
+
+
+def test_lazy_contract_assets_uses_offset_index(tmp_path, compiled_contracts):
+    contracts_path = str(tmp_path / "contracts.json")
+    offset_index_cache = CompilationCache(str(tmp_path / "offsets"))
+    replace_json_asset(compiled_contracts, contracts_path)
+    LazyContractAssets(contracts_path, offset_index_cache=offset_index_cache)
+    (offset_index_path,) = (tmp_path / "offsets").glob("*.json")
+    offset_index = load_json_asset(str(offset_index_path))
+    offset_index["offsets"].pop("B")
+    replace_json_asset(offset_index, str(offset_index_path))
+
+    assert list(
+        LazyContractAssets(contracts_path, offset_index_cache=offset_index_cache)
+    ) == ["A"]
+    # nothing is written next to the compiled contracts
+    assert sorted(os.listdir(tmp_path)) == ["contracts.json", "offsets"]
+
+    replace_json_asset({"B": compiled_contracts["B"]}, contracts_path)
+    assert dict(
+        LazyContractAssets(contracts_path, offset_index_cache=offset_index_cache)
+    ) == {"B": compiled_contracts["B"]}
+
+
+def test_lazy_contract_assets_keeps_offset_index_in_cache_dir(
+    tmp_path, cache_dir, compiled_contracts
+):
+    contracts_path = str(tmp_path / "contracts.json")
+    replace_json_asset(compiled_contracts, contracts_path)
+
+    assert dict(LazyContractAssets(contracts_path)) == compiled_contracts
+    assert len(list((cache_dir / "offsets").glob("*.json"))) == 1
+    assert os.listdir(tmp_path) == ["contracts.json"]
+
+
+@pytest.mark.parametrize("content", [b"[]", b"", b'{"A": {'])
+def test_lazy_contract_assets_invalid(tmp_path, content):
+    contracts_path = tmp_path / "contracts.json"
+    contracts_path.write_bytes(content)
+
+    with pytest.raises(ValueError):
+        LazyContractAssets(str(contracts_path))
+
+
+def test_lazy_contract_assets_with_non_ascii_characters(tmp_path):
+    compiled_contracts = {"A": {"userdoc": "Grüße"}, "B": {"userdoc": "€"}}
+    contracts_path = tmp_path / "contracts.json"
+    contracts_path.write_bytes(
+        json.dumps(compiled_contracts, ensure_ascii=False).encode("utf-8")
+    )
+
+    assert dict(LazyContractAssets(str(contracts_path))) == compiled_contracts
@@ -0,0 +1,84 @@
+import os
+
+import pytest
+
+from deploy_tools.cache import CompilationCache, compute_compilation_key
+
+
+@pytest.fixture()
+def cache(tmp_path):
+    return CompilationCache(tmp_path / "cache", max_entries=2)
+
+
+@pytest.fixture()
+def std_input():
+    return {
+        "language": "Solidity",
+        "sources": {"A.sol": {"content": "contract A {}"}},
+        "settings": {"evmVersion": "byzantium"},
+    }
+
+
+def test_get_missing_entry(cache):
+    assert cache.get("missing") is None
+
+
+def test_put_and_get_entry(cache):
+    cache.put("key", {"contracts": {}, "errors": []})
+
+    assert cache.get("key") == {"contracts": {}, "errors": []}
+
+
+def test_evict_least_recently_used_entry(cache):
+    cache.put("first", {"value": 1})
+    cache.put("second", {"value": 2})
+    os.utime(cache.cache_dir / "first.json", (1, 1))
+    os.utime(cache.cache_dir / "second.json", (2, 2))
+
+    cache.put("third", {"value": 3})
+
+    assert cache.get("first") is None
+    assert cache.get("second") == {"value": 2}
+    assert cache.get("third") == {"value": 3}
+
+
+def test_clear_cache(cache):
+    cache.put("key", {"value": 1})
+    cache.clear()
+
+    assert cache.get("key") is None
+
+
+def test_key_depends_on_sources(std_input):
+    changed_input = dict(std_input, sources={"A.sol": {"content": "contract B {}"}})
+
+    assert compute_compilation_key(std_input, "solc") != compute_compilation_key(
+        changed_input, "solc"
+    )
+
+
+def test_key_depends_on_solc(std_input):
+    assert compute_compilation_key(std_input, "solc-1") != compute_compilation_key(
+        std_input, "solc-2"
+    )
+
+
+def test_cached_compilation_without_jobs_does_not_parse_imports(
+    cache, std_input, monkeypatch
+):
+    from deploy_tools import compile as compile_module
+
+    result = {"contracts": {"A.sol": {"A": {"abi": []}}}, "errors": []}
+    cache.put(cache.key(std_input), result)
+
+    def from_sources(sources):
+        raise AssertionError("The imports should not be parsed")
+
+    monkeypatch.setattr(compile_module.DependencyGraph, "from_sources", from_sources)
+
+    assert (
+        compile_module.compile_standard_input_in_parallel(
+            std_input, allow_paths=[], cache=cache, jobs=1
+        )
+        == result
+    )
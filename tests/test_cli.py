@@ -1,4 +1,9 @@
 import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
 from pathlib import Path
 import json
 
@@ -8,7 +13,9 @@ from eth_keyfile import create_keyfile_json
 from eth_utils import is_address, is_hex, is_0x_prefixed
 from eth_utils.exceptions import ValidationError
 
-from deploy_tools.cli import main
+from deploy_tools.agent import create_agent_server
+from deploy_tools.cli import main, parse_batch_call, resolve_sent_rows
+from deploy_tools.receipts import ReceiptTracker
 
 
 @pytest.fixture()
@@ -110,6 +117,152 @@ def test_default_compile(runner):
         assert "TestContract" in contract_assets
 
 
+@pytest.mark.usefixtures("go_to_root_dir")
+def test_compile_uses_cache(runner, tmp_path, monkeypatch):
+    cache_dir = tmp_path / "cache"
+    monkeypatch.setenv("DEPLOY_TOOLS_CACHE_DIR", str(cache_dir))
+
+    result = runner.invoke(main, "compile -d testcontracts")
+    assert result.exit_code == 0
+    assert len(list(cache_dir.glob("*.json"))) == 1
+
+    result = runner.invoke(main, "compile -d testcontracts")
+    assert result.exit_code == 0
+    with open("build/contracts.json") as f:
+        contract_assets = json.load(f)
+        assert "TestContract" in contract_assets
+
+
+@pytest.mark.usefixtures("go_to_root_dir")
+def test_compile_no_cache(runner, tmp_path, monkeypatch):
+    cache_dir = tmp_path / "cache"
+    monkeypatch.setenv("DEPLOY_TOOLS_CACHE_DIR", str(cache_dir))
+
+    result = runner.invoke(main, "compile -d testcontracts --no-cache")
+    assert result.exit_code == 0
+    assert not cache_dir.exists()
+
+
+@pytest.fixture()
+def contracts_copy_dir(tmp_path):
+    contracts_dir = tmp_path / "contracts"
+    shutil.copytree(Path(__file__).parent.parent / "testcontracts", contracts_dir)
+    return contracts_dir
+
+
+def test_incremental_compile_same_as_full_compile(runner, contracts_copy_dir, tmp_path):
+    full_output = tmp_path / "full.json"
+    incremental_output = tmp_path / "incremental.json"
+
+    result = runner.invoke(
+        main, f"compile -d {contracts_copy_dir} -o {incremental_output} --incremental"
+    )
+    assert result.exit_code == 0
+
+    other_contract_path = contracts_copy_dir / "subfolder" / "OtherContract.sol"
+    other_contract_path.write_text(
+        other_contract_path.read_text().replace(
+            "contract OtherContract {}",
+            "contract OtherContract { uint public value; }",
+        )
+    )
+
+    result = runner.invoke(
+        main, f"compile -d {contracts_copy_dir} -o {incremental_output} --incremental"
+    )
+    assert result.exit_code == 0
+    result = runner.invoke(main, f"compile -d {contracts_copy_dir} -o {full_output}")
+    assert result.exit_code == 0
+
+    assert incremental_output.read_bytes() == full_output.read_bytes()
+
+
+def test_parallel_compile_same_as_full_compile(runner, contracts_copy_dir, tmp_path):
+    full_output = tmp_path / "full.json"
+    parallel_output = tmp_path / "parallel.json"
+
+    result = runner.invoke(
+        main, f"compile -d {contracts_copy_dir} -o {parallel_output} --jobs 2"
+    )
+    assert result.exit_code == 0
+    result = runner.invoke(main, f"compile -d {contracts_copy_dir} -o {full_output}")
+    assert result.exit_code == 0
+
+    assert parallel_output.read_bytes() == full_output.read_bytes()
+
+
+@pytest.fixture()
+def mocked_solc(monkeypatch):
+    """replaces solc with a function compiling every source to one contract with a bytecode
+    depending on whether the optimizer is enabled"""
+    import solc
+
+    def compile_standard(std_input, allow_paths):
+        bytecode = "0P" if "optimizer" in std_input["settings"] else "00"
+        return {
+            "contracts": {
+                path: {
+                    source["content"].split()[1]: {
+                        "abi": [],
+                        "evm": {"bytecode": {"object": bytecode}},
+                    }
+                }
+                for path, source in std_input["sources"].items()
+            }
+        }
+
+    monkeypatch.setattr(solc, "compile_standard", compile_standard)
+
+
+@pytest.mark.usefixtures("mocked_solc")
+def test_incremental_compile_after_compile_with_other_settings(runner, tmp_path):
+    contracts_dir = tmp_path / "contracts"
+    contracts_dir.mkdir()
+    (contracts_dir / "A.sol").write_text("contract A {}")
+    full_output = tmp_path / "full.json"
+    incremental_output = tmp_path / "incremental.json"
+
+    for options in ["--incremental", "-O", "--incremental"]:
+        result = runner.invoke(
+            main,
+            f"compile -d {contracts_dir} -o {incremental_output} --no-cache {options}",
+        )
+        assert result.exit_code == 0
+    result = runner.invoke(
+        main, f"compile -d {contracts_dir} -o {full_output} --no-cache"
+    )
+    assert result.exit_code == 0
+
+    assert incremental_output.read_bytes() == full_output.read_bytes()
+
+
+@pytest.mark.usefixtures("mocked_solc")
+def test_incremental_compile_to_output_dir(runner, tmp_path, monkeypatch):
+    contracts_dir = tmp_path / "contracts"
+    contracts_dir.mkdir()
+    (contracts_dir / "A.sol").write_text("contract A {}")
+    output_dir = tmp_path / "build"
+    output_dir.mkdir()
+    monkeypatch.chdir(output_dir)
+
+    for _ in range(2):
+        result = runner.invoke(
+            main, f"compile -d {contracts_dir} --output-dir . --incremental --no-cache"
+        )
+        assert result.exit_code == 0
+
+    assert sorted(os.listdir(tmp_path)) == ["build", "contracts"]
+    assert (output_dir / "state.json").exists()
+
+
+@pytest.mark.usefixtures("go_to_root_dir")
+def test_incremental_compile_with_contract_names(runner):
+    result = runner.invoke(
+        main, "compile -d testcontracts --incremental --contract-names OtherContract"
+    )
+    assert result.exit_code == 2
+
+
 @pytest.mark.usefixtures("go_to_root_dir")
 def test_minimize_compile(runner):
     result = runner.invoke(main, "compile -d testcontracts --minimize")
@@ -143,6 +296,62 @@ def test_contract_output_file(runner, output_file):
         assert "TestContract" in contract_assets
 
 
+@pytest.mark.usefixtures("go_to_root_dir")
+def test_compile_output_dir(runner, tmp_path, compiled_contracts_path):
+    output_dir = tmp_path / "contracts"
+    result = runner.invoke(
+        main, f"compile -d testcontracts --output-dir {output_dir} --split-fields"
+    )
+    assert result.exit_code == 0
+
+    with open(compiled_contracts_path) as f:
+        contract_assets = json.load(f)
+    with (output_dir / "contracts" / "TestContract" / "abi.json").open() as f:
+        assert json.load(f) == contract_assets["TestContract"]["abi"]
+
+
+def test_compile_watch_keeps_watching_after_source_file_is_deleted(
+    runner, tmp_path, monkeypatch
+):
+    from deploy_tools.watch import SourceWatcher
+
+    contracts_dir = tmp_path / "contracts"
+    contracts_dir.mkdir()
+    (contracts_dir / "A.sol").write_text("pragma solidity ^0.5.8;\ncontract A {}\n")
+    (contracts_dir / "B.sol").write_text("pragma solidity ^0.5.8;\ncontract B {}\n")
+    output = tmp_path / "contracts.json"
+    wait_count = 0
+
+    def wait_for_change(watcher, **kwargs):
+        nonlocal wait_count
+        wait_count += 1
+        if wait_count == 1:
+            # deleted after the watcher saw it, so the next compilation still includes it
+            (contracts_dir / "B.sol").unlink()
+        elif wait_count == 2:
+            assert watcher.poll()
+        else:
+            raise KeyboardInterrupt
+
+    monkeypatch.setattr(SourceWatcher, "wait_for_change", wait_for_change)
+    result = runner.invoke(
+        main, f"compile -d {contracts_dir} -o {output} --watch --no-cache"
+    )
+    assert result.exit_code == 0
+    assert "Compilation failed" in result.output
+    assert "B.sol" in result.output
+    assert wait_count == 3
+
+    with output.open() as f:
+        assert list(json.load(f)) == ["A"]
+
+
+@pytest.mark.usefixtures("go_to_root_dir")
+def test_split_fields_without_output_dir(runner):
+    result = runner.invoke(main, "compile -d testcontracts --split-fields")
+    assert result.exit_code == 2
+
+
 @pytest.mark.usefixtures("go_to_root_dir")
 def test_unknown_contract_names_compile(runner):
     result = runner.invoke(
@@ -243,6 +452,62 @@ def test_deploy_keystore(runner, keystore_file_path, key_password):
     assert result.exit_code == 0
 
 
+@pytest.fixture()
+def agent_socket_path(monkeypatch):
+    # the path of a unix socket is limited to about 100 characters, which tmp_path might exceed
+    socket_dir = tempfile.mkdtemp()
+    socket_path = os.path.join(socket_dir, "agent.sock")
+    server = create_agent_server(socket_path)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    monkeypatch.setenv("DEPLOY_TOOLS_AGENT_SOCKET", socket_path)
+    yield socket_path
+    server.shutdown()
+    server.server_close()
+    shutil.rmtree(socket_dir)
+
+
+@pytest.mark.usefixtures("go_to_root_dir", "agent_socket_path")
+def test_deploy_keystore_with_agent(runner, keystore_file_path, key_password):
+    command = f"deploy OtherContract -d testcontracts --jsonrpc test --keystore {keystore_file_path}"
+    first_result = runner.invoke(main, command, input=key_password)
+    second_result = runner.invoke(main, command)
+
+    assert first_result.exit_code == 0
+    assert second_result.exit_code == 0
+    assert "password" not in second_result.output
+    assert is_address(second_result.output.strip())
+
+
+@pytest.mark.usefixtures("go_to_root_dir")
+def test_deploy_salt_without_factory(runner):
+    result = runner.invoke(
+        main, "deploy OtherContract -d testcontracts --jsonrpc test --salt 0x01"
+    )
+    assert result.exit_code == 1
+    assert "factory" in result.output
+
+
+@pytest.mark.usefixtures("go_to_root_dir")
+def test_deploy_invalid_salt(runner):
+    result = runner.invoke(
+        main, "deploy OtherContract -d testcontracts --jsonrpc test --salt 01"
+    )
+    assert result.exit_code == 2
+
+
+@pytest.mark.usefixtures("go_to_root_dir")
+def test_deploy_with_state_dir_records_deployment(runner, tmp_path):
+    result = runner.invoke(
+        main,
+        f"deploy OtherContract -d testcontracts --jsonrpc test --state-dir {tmp_path}",
+    )
+    assert result.exit_code == 0
+
+    (state_path,) = tmp_path.glob("*.json")
+    deployment = json.loads(state_path.read_text())["deployments"]["OtherContract"]
+    assert deployment["address"] == result.output.strip()
+
+
 @pytest.mark.usefixtures("go_to_root_dir")
 def test_deploy_keystore_wrong_nonce(runner, keystore_file_path, key_password):
     result = runner.invoke(
@@ -253,6 +518,112 @@ def test_deploy_keystore_wrong_nonce(runner, keystore_file_path, key_password):
     assert result.exit_code == 1
 
 
+@pytest.fixture()
+def manifest_path(tmp_path):
+    manifest_path = tmp_path / "manifest.json"
+    manifest_path.write_text(
+        json.dumps(
+            {
+                "deployments": [
+                    {"name": "other", "contractName": "OtherContract"},
+                    {"contractName": "TestContract", "args": [4]},
+                    {
+                        "contractName": "ManyArgumentsContract",
+                        "args": [0, -1, -2, True, {"ref": "other"}, "0x00"],
+                    },
+                ]
+            }
+        )
+    )
+    return manifest_path
+
+
+@pytest.mark.usefixtures("go_to_root_dir")
+def test_deploy_batch(runner, manifest_path, tmp_path):
+    addresses_path = tmp_path / "addresses.json"
+    result = runner.invoke(
+        main,
+        f"deploy-batch {manifest_path} -d testcontracts --jsonrpc test -o {addresses_path}",
+    )
+    assert result.exit_code == 0
+
+    addresses = json.loads(addresses_path.read_text())
+    assert list(addresses) == ["other", "TestContract", "ManyArgumentsContract"]
+    assert all(is_address(address) for address in addresses.values())
+
+
+@pytest.mark.usefixtures("go_to_root_dir")
+def test_deploy_batch_keystore(
+    runner, manifest_path, tmp_path, keystore_file_path, key_password
+):
+    addresses_path = tmp_path / "addresses.json"
+    result = runner.invoke(
+        main,
+        f"deploy-batch {manifest_path} -d testcontracts --jsonrpc test -o {addresses_path} "
+        f"--keystore {keystore_file_path}",
+        input=key_password,
+    )
+    assert result.exit_code == 0
+    assert len(json.loads(addresses_path.read_text())) == 3
+
+
+@pytest.mark.usefixtures("go_to_root_dir")
+def test_deploy_batch_simulate_gas(runner, manifest_path, tmp_path):
+    addresses_path = tmp_path / "addresses.json"
+    result = runner.invoke(
+        main,
+        f"deploy-batch {manifest_path} -d testcontracts --jsonrpc test -o {addresses_path} "
+        f"--simulate-gas --gas-multiplier 1.5",
+    )
+    assert result.exit_code == 0
+    assert len(json.loads(addresses_path.read_text())) == 3
+
+
+@pytest.mark.usefixtures("go_to_root_dir")
+def test_deploy_batch_parallel(runner, manifest_path, tmp_path):
+    addresses_path = tmp_path / "addresses.json"
+    result = runner.invoke(
+        main,
+        f"deploy-batch {manifest_path} -d testcontracts --jsonrpc test -o {addresses_path} --parallel",
+    )
+    assert result.exit_code == 0
+
+    addresses = json.loads(addresses_path.read_text())
+    assert list(addresses) == ["other", "TestContract", "ManyArgumentsContract"]
+    assert all(is_address(address) for address in addresses.values())
+
+
+@pytest.mark.parametrize("parallel", ["", "--parallel"])
+@pytest.mark.usefixtures("go_to_root_dir")
+def test_deploy_batch_with_state_dir_reuses_deployments(
+    runner, manifest_path, tmp_path, parallel
+):
+    addresses_path = tmp_path / "addresses.json"
+    state_dir = tmp_path / "state"
+    command = (
+        f"deploy-batch {manifest_path} -d testcontracts --jsonrpc test -o {addresses_path} "
+        f"--state-dir {state_dir} {parallel}"
+    )
+
+    result = runner.invoke(main, command)
+    assert result.exit_code == 0
+    addresses = json.loads(addresses_path.read_text())
+
+    result = runner.invoke(main, command)
+    assert result.exit_code == 0
+    assert json.loads(addresses_path.read_text()) == addresses
+
+
+@pytest.mark.usefixtures("go_to_root_dir")
+def test_deploy_batch_unknown_contract(runner, tmp_path):
+    manifest_path = tmp_path / "manifest.json"
+    manifest_path.write_text(json.dumps({"deployments": [{"contractName": "Unknown"}]}))
+    result = runner.invoke(
+        main, f"deploy-batch {manifest_path} -d testcontracts --jsonrpc test"
+    )
+    assert result.exit_code == 2
+
+
 @pytest.mark.usefixtures("go_to_root_dir")
 def test_send_transaction_to_contract(
     runner, test_contract_address, test_contract_name
@@ -374,6 +745,105 @@ def test_send_transaction_to_contract_insufficient_gas(
     assert type(result.exception) == ValidationError
 
 
+@pytest.fixture()
+def write_csv(tmp_path):
+    def write(rows):
+        csv_path = tmp_path / "rows.csv"
+        csv_path.write_text("".join(row + "\n" for row in rows))
+        return csv_path
+
+    return write
+
+
+@pytest.mark.usefixtures("go_to_root_dir")
+def test_transact_batch(runner, test_contract_address, test_contract_name, write_csv):
+    csv_path = write_csv(["1", "2", "3"])
+    command = (
+        f"transact-batch -d testcontracts --jsonrpc test --contract-address {test_contract_address} "
+        f"-- {test_contract_name} set {csv_path}"
+    )
+
+    result = runner.invoke(main, command)
+    assert result.exit_code == 0
+    assert len(result.output.splitlines()) == 3
+
+    checkpoint = json.loads(Path(f"{csv_path}.checkpoint.json").read_text())
+    assert checkpoint["processedRows"] == 3
+
+    # a second run resumes after the last processed row
+    result = runner.invoke(main, command)
+    assert result.exit_code == 0
+    assert not any(is_hex(line) for line in result.output.splitlines())
+
+
+@pytest.mark.usefixtures("go_to_root_dir")
+def test_transact_batch_keystore(
+    runner,
+    test_contract_address,
+    test_contract_name,
+    write_csv,
+    keystore_file_path,
+    key_password,
+):
+    csv_path = write_csv(["1", "2", "3"])
+    result = runner.invoke(
+        main,
+        (
+            f"transact-batch -d testcontracts --jsonrpc test --contract-address {test_contract_address} "
+            f"--keystore {keystore_file_path} --window 2 -- {test_contract_name} set {csv_path}"
+        ),
+        input=key_password,
+    )
+    assert result.exit_code == 0
+
+
+@pytest.mark.usefixtures("go_to_root_dir")
+def test_transact_batch_invalid_row(
+    runner, test_contract_address, test_contract_name, write_csv
+):
+    csv_path = write_csv(["1", "not-a-number", "3"])
+    result = runner.invoke(
+        main,
+        (
+            f"transact-batch -d testcontracts --jsonrpc test --contract-address {test_contract_address} "
+            f"-- {test_contract_name} set {csv_path}"
+        ),
+    )
+    assert result.exit_code == 1
+
+    checkpoint = json.loads(Path(f"{csv_path}.checkpoint.json").read_text())
+    assert checkpoint["processedRows"] == 3
+    assert checkpoint["failedRows"] == [1]
+
+
+def test_resolve_sent_rows(web3, accounts):
+    sender = accounts[0]
+    nonce = web3.eth.getTransactionCount(sender)
+    transaction_hash = web3.eth.sendTransaction(
+        {"from": sender, "to": accounts[1], "value": 1}
+    )
+    unknown_hash = "0x" + "11" * 32
+    checkpoint = {
+        "processedRows": 2,
+        "failedRows": [],
+        "sentRows": {
+            "2": {"transactionHash": transaction_hash.hex(), "nonce": nonce},
+            # the nonce of this row was used by the transaction above
+            "3": {"transactionHash": unknown_hash, "nonce": nonce},
+            # this transaction was dropped before it was mined
+            "4": {"transactionHash": unknown_hash, "nonce": nonce + 1},
+        },
+    }
+
+    completed_rows = resolve_sent_rows(
+        web3, checkpoint, sender=sender, receipt_tracker=ReceiptTracker(web3)
+    )
+
+    assert completed_rows == {2}
+    assert list(checkpoint["sentRows"]) == ["2"]
+    assert checkpoint["failedRows"] == []
+
+
 @pytest.mark.usefixtures("go_to_root_dir")
 def test_call_contract_function(runner, test_contract_address, test_contract_name):
     result = runner.invoke(
@@ -388,6 +858,75 @@ def test_call_contract_function(runner, test_contract_address, test_contract_nam
     assert result.output.strip() == "4"
 
 
+@pytest.mark.usefixtures("go_to_root_dir")
+def test_call_batch(runner, test_contract_address, test_contract_name):
+    calls = [
+        {
+            "contract": test_contract_name,
+            "address": test_contract_address,
+            "function": "state",
+            "args": [],
+        },
+        {
+            "contract": "Unknown",
+            "address": test_contract_address,
+            "function": "state",
+            "args": [],
+        },
+        {
+            "contract": test_contract_name,
+            "address": test_contract_address,
+            "function": "state",
+        },
+    ]
+    result = runner.invoke(
+        main,
+        "call-batch -d testcontracts --jsonrpc test --batch-size 2",
+        input="\n".join(json.dumps(call) for call in calls),
+    )
+
+    assert result.exit_code == 1
+    lines = [json.loads(line) for line in result.output.splitlines()[:3]]
+    assert [line.get("result") for line in lines] == [4, None, 4]
+    assert "error" in lines[1]
+
+
+@pytest.mark.parametrize(
+    "address, expected_error",
+    [
+        ("0x" + "ab" * 20, None),
+        ("0x1234", "InvalidAddressException"),
+        # invalid checksum
+        ("0x" + "aB" * 20, "InvalidAddressException"),
+        (1, "InvalidAddressException"),
+    ],
+)
+def test_parse_batch_call_address(web3, address, expected_error):
+    compiled_contracts = {
+        "Contract": {
+            "abi": [
+                {
+                    "type": "function",
+                    "name": "state",
+                    "inputs": [],
+                    "outputs": [{"name": "", "type": "uint256"}],
+                    "stateMutability": "view",
+                }
+            ]
+        }
+    }
+    line = json.dumps({"contract": "Contract", "address": address, "function": "state"})
+
+    _, function_call, error = parse_batch_call(web3, compiled_contracts, line)
+
+    if expected_error is None:
+        assert error is None
+        assert function_call.address == "0xABaBaBaBABabABabAbAbABAbABabababaBaBABaB"
+    else:
+        assert type(error).__name__ == expected_error
+        assert function_call is None
+
+
 @pytest.mark.usefixtures("go_to_root_dir")
 def test_call_contract_function_from_compiled_contracts(
     runner, test_contract_address, test_contract_name, compiled_contracts_path
@@ -447,3 +986,21 @@ def test_generate_keystore_from_private_key(
     )
 
     assert result.exit_code == 0
+
+
+def test_cli_import_does_not_load_heavy_dependencies():
+    """Benchmark for the startup time of the cli, which is dominated by importing its dependencies"""
+    heavy_modules = ["web3", "eth_tester", "solc", "eth_keyfile", "eth_utils"]
+    code = (
+        "import sys, time\n"
+        "start = time.perf_counter()\n"
+        "import deploy_tools.cli\n"
+        "print(time.perf_counter() - start)\n"
+        f"print(','.join(m for m in {heavy_modules!r} if m in sys.modules))\n"
+    )
+    output = subprocess.run(
+        [sys.executable, "-c", code], check=True, stdout=subprocess.PIPE
+    ).stdout.decode()
+    import_time, loaded_heavy_modules = output.splitlines()
+
+    assert loaded_heavy_modules == "", f"cli import took {float(import_time):.3f}s"
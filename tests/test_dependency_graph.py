@@ -0,0 +1,89 @@
+import pytest
+
+from deploy_tools.dependency_graph import (
+    DependencyGraph,
+    parse_imports,
+    resolve_import,
+)
+
+
+@pytest.fixture()
+def graph():
+    return DependencyGraph.from_sources(
+        {
+            "contracts/A.sol": {"content": 'import "./lib/B.sol";\ncontract A {}'},
+            "contracts/lib/B.sol": {
+                "content": 'import {C} from "../C.sol";\ncontract B {}'
+            },
+            "contracts/C.sol": {"content": "contract C {}"},
+            "contracts/D.sol": {"content": "contract D {}"},
+        }
+    )
+
+
+def test_parse_imports():
+    source_code = """
+    import "./A.sol";
+    import "./B.sol" as B;
+    import * as C from './C.sol';
+    import {D, E as F}
+        from "./D.sol";
+    // import "./Commented.sol";
+    /* import "./AlsoCommented.sol"; */
+    contract G {}
+    """
+
+    assert parse_imports(source_code) == ["./A.sol", "./B.sol", "./C.sol", "./D.sol"]
+
+
+@pytest.mark.parametrize(
+    "importing_path, import_path, resolved_path",
+    [
+        ("contracts/A.sol", "./B.sol", "contracts/B.sol"),
+        ("contracts/lib/A.sol", "../B.sol", "contracts/B.sol"),
+        ("contracts/A.sol", "other/B.sol", "other/B.sol"),
+        ("./contracts/A.sol", "./B.sol", "contracts/B.sol"),
+    ],
+)
+def test_resolve_import(importing_path, import_path, resolved_path):
+    assert resolve_import(importing_path, import_path) == resolved_path
+
+
+def test_dependencies(graph):
+    assert graph.dependencies("contracts/A.sol") == {
+        "contracts/lib/B.sol",
+        "contracts/C.sol",
+    }
+    assert graph.dependencies("contracts/D.sol") == set()
+
+
+def test_dependents(graph):
+    assert graph.dependents("contracts/C.sol") == {
+        "contracts/A.sol",
+        "contracts/lib/B.sol",
+    }
+    assert graph.imported_by("contracts/C.sol") == {"contracts/lib/B.sol"}
+
+
+def test_connected_components(graph):
+    assert graph.connected_components() == [
+        ["contracts/A.sol", "contracts/C.sol", "contracts/lib/B.sol"],
+        ["contracts/D.sol"],
+    ]
+
+
+def test_graph_with_dot_prefixed_paths():
+    graph = DependencyGraph.from_sources(
+        {
+            "./contracts/A.sol": {"content": 'import "./lib/B.sol";\ncontract A {}'},
+            "./contracts/lib/B.sol": {
+                "content": 'import "contracts/C.sol";\ncontract B {}'
+            },
+            "./contracts/C.sol": {"content": "contract C {}"},
+        }
+    )
+
+    assert graph.dependents("./contracts/C.sol") == {
+        "./contracts/A.sol",
+        "./contracts/lib/B.sol",
+    }
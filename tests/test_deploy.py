@@ -2,7 +2,18 @@ import pytest
 import eth_utils
 from eth_utils import is_address
 
-from deploy_tools.deploy import deploy_compiled_contract, send_function_call_transaction
+from deploy_tools.deploy import (
+    DeploymentPlanner,
+    compute_contract_address,
+    compute_create2_address,
+    deploy_compiled_contract,
+    deploy_compiled_contract_with_create2,
+    pipeline_function_call_transactions,
+    send_function_call_transaction,
+    send_function_call_transactions,
+)
+import deploy_tools.deployment_state as deployment_state_module
+from deploy_tools.deployment_state import DeploymentState
 from deploy_tools.plugin import get_contracts_folder
 from deploy_tools.compile import compile_project
 
@@ -12,6 +23,21 @@ def test_contract(deploy_contract):
     return deploy_contract("TestContract", constructor_args=(4,))
 
 
+# init code of the deterministic deployment factory, see https://github.com/Arachnid/deterministic-deployment-proxy
+CREATE2_FACTORY_INIT_CODE = (
+    "0x604580600e600039806000f350fe7fffffffffffffffffffffffffffffffffffffffffffffffffffffffffffffffe03601600081"
+    "602082378035828234f58015156039578182fd5b8082525050506014600cf3"
+)
+
+
+@pytest.fixture()
+def create2_factory(web3, accounts):
+    tx_hash = web3.eth.sendTransaction(
+        {"from": accounts[0], "data": CREATE2_FACTORY_INIT_CODE, "gas": 200_000}
+    )
+    return web3.eth.waitForTransactionReceipt(tx_hash)["contractAddress"]
+
+
 @pytest.fixture()
 def contract_assets_st_petersburg(pytestconfig):
     contracts_path = get_contracts_folder(pytestconfig)
@@ -113,3 +139,264 @@ def test_send_contract_call_set_nonce(test_contract, web3, account_keys):
             web3=web3,
             private_key=account_keys[2],
         )
+
+
+class FailingFunctionCall:
+    def buildTransaction(self, transaction_options):
+        raise ValueError("Can not build the transaction")
+
+
+def test_send_function_call_transactions(test_contract, web3, account_keys):
+    function_calls = [test_contract.functions.set(value) for value in range(1, 6)]
+
+    outcomes = send_function_call_transactions(
+        function_calls, web3=web3, private_key=account_keys[2], window=2
+    )
+
+    assert [outcome.index for outcome in outcomes] == list(range(5))
+    assert all(outcome.successful for outcome in outcomes)
+    assert test_contract.functions.state().call() == 5
+
+
+def test_send_function_call_transactions_reports_failures(
+    test_contract, web3, account_keys
+):
+    function_calls = [
+        test_contract.functions.set(1),
+        FailingFunctionCall(),
+        test_contract.functions.set(3),
+    ]
+
+    outcomes = send_function_call_transactions(
+        function_calls, web3=web3, private_key=account_keys[2]
+    )
+
+    assert [outcome.successful for outcome in outcomes] == [True, False, True]
+    assert isinstance(outcomes[1].error, ValueError)
+    assert test_contract.functions.state().call() == 3
+
+
+def test_send_function_call_transactions_from_node_account(test_contract, web3):
+    function_calls = [test_contract.functions.set(value) for value in range(1, 4)]
+
+    outcomes = send_function_call_transactions(function_calls, web3=web3)
+
+    assert all(outcome.successful for outcome in outcomes)
+    assert test_contract.functions.state().call() == 3
+
+
+def test_pipeline_waits_once_per_batch(web3, account_keys):
+    # deploys a contract returning 4
+    contract = web3.eth.contract(
+        abi=[], bytecode="0x600a600c600039600a6000f3600460005260206000f3"
+    )
+    events = []
+
+    outcomes = list(
+        pipeline_function_call_transactions(
+            [contract.constructor() for _ in range(6)],
+            web3=web3,
+            private_key=account_keys[2],
+            window=2,
+            on_sent=lambda index, transaction_hash, nonce: events.append(index),
+            before_wait=lambda: events.append("wait"),
+        )
+    )
+
+    assert all(outcome.successful for outcome in outcomes)
+    # the receipts of a batch arrive with the same poll, which frees the whole window
+    assert events == [0, 1, "wait", 2, 3, "wait", 4, 5, "wait"]
+
+
+def test_compute_contract_address():
+    sender = "0x6ac7ea33f8831ea9dcc53393aaa88b25a785dbf0"
+
+    assert compute_contract_address(sender, 0) == eth_utils.to_checksum_address(
+        "0xcd234a471b72ba2f1ccf0a70fcaba648a5eecd8d"
+    )
+    assert compute_contract_address(sender, 1) == eth_utils.to_checksum_address(
+        "0x343c43a37d37dff08ae8c4a11544c718abb4fcf8"
+    )
+
+
+@pytest.mark.parametrize("use_private_key", [True, False])
+def test_deployment_planner(web3, contract_assets, account_keys, use_private_key):
+    planner = DeploymentPlanner(
+        web3=web3, private_key=account_keys[1] if use_private_key else None
+    )
+    planned_addresses = [
+        planner.plan(
+            abi=contract_assets["TestContract"]["abi"],
+            bytecode=contract_assets["TestContract"]["bytecode"],
+            constructor_args=(value,),
+        )
+        for value in range(3)
+    ]
+
+    contracts = planner.deploy()
+
+    assert [contract.address for contract in contracts] == planned_addresses
+    assert [contract.functions.state().call() for contract in contracts] == [0, 1, 2]
+
+
+def test_deployment_planner_waits_for_sent_deployments_on_failure(web3):
+    # init code deploying a contract returning 4 and init code reverting
+    bytecode = "0x600a600c600039600a6000f3600460005260206000f3"
+    reverting_bytecode = "0x60006000fd"
+    planner = DeploymentPlanner(web3=web3)
+    first_address = planner.plan(abi=[], bytecode=bytecode)
+    planner.plan(abi=[], bytecode=reverting_bytecode)
+    planner.plan(abi=[], bytecode=bytecode)
+
+    with pytest.raises(Exception):
+        planner.deploy()
+
+    assert [contract.address for contract in planner.deployed_contracts] == [
+        first_address
+    ]
+    assert web3.eth.getCode(first_address)
+
+
+def test_deployment_planner_reuses_recorded_deployments(web3, tmp_path):
+    # init code deploying a contract returning 4
+    bytecode = "0x600a600c600039600a6000f3600460005260206000f3"
+    state_path = str(tmp_path / "deployments.json")
+
+    def plan_and_deploy():
+        planner = DeploymentPlanner(
+            web3=web3, deployment_state=DeploymentState(state_path)
+        )
+        address = planner.plan(abi=[], bytecode=bytecode, name="Contract")
+        planner.deploy()
+        return planner, address
+
+    planner, address = plan_and_deploy()
+    block_number = web3.eth.blockNumber
+    second_planner, second_address = plan_and_deploy()
+
+    assert [contract.address for contract in planner.deployed_contracts] == [address]
+    assert second_address == address
+    assert second_planner.deployed_contracts == []
+    assert [contract.address for contract in second_planner.reused_contracts] == [
+        address
+    ]
+    assert web3.eth.blockNumber == block_number
+
+
+def test_deployment_state_fetches_code_of_looked_up_deployment(
+    web3, tmp_path, monkeypatch
+):
+    bytecode = "0x600a600c600039600a6000f3600460005260206000f3"
+    state_path = str(tmp_path / "deployments.json")
+    planner = DeploymentPlanner(web3=web3, deployment_state=DeploymentState(state_path))
+    for name in ["First", "Second"]:
+        planner.plan(abi=[], bytecode=bytecode, name=name)
+    planner.deploy()
+
+    fetched_calls = []
+    original_make_batch_request = deployment_state_module.make_batch_request
+
+    def make_batch_request(web3, calls):
+        fetched_calls.extend(calls)
+        return original_make_batch_request(web3, calls)
+
+    monkeypatch.setattr(
+        deployment_state_module, "make_batch_request", make_batch_request
+    )
+    state = DeploymentState(state_path)
+
+    assert state.find_deployment(web3, "First", bytecode=bytecode) is not None
+    assert len(fetched_calls) == 1
+
+
+def test_compute_create2_address():
+    # example of EIP-1014
+    assert compute_create2_address(
+        "0x00000000000000000000000000000000deadbeef",
+        bytes.fromhex("00" * 28 + "cafebabe"),
+        bytes.fromhex("deadbeef"),
+    ) == eth_utils.to_checksum_address("0x60f3f640a8508fC6a86d45DF051962668E1e8AC7")
+
+
+def test_deploy_with_create2(web3, contract_assets, create2_factory, account_keys):
+    contract_interface = contract_assets["TestContract"]
+
+    def deploy():
+        return deploy_compiled_contract_with_create2(
+            abi=contract_interface["abi"],
+            bytecode=contract_interface["bytecode"],
+            web3=web3,
+            salt=b"\x01" * 32,
+            constructor_args=(5,),
+            private_key=account_keys[1],
+            factory=create2_factory,
+        )
+
+    contract = deploy()
+    block_number = web3.eth.blockNumber
+    redeployed_contract = deploy()
+
+    assert contract.functions.state().call() == 5
+    assert redeployed_contract.address == contract.address
+    assert web3.eth.blockNumber == block_number
+
+
+def test_deploy_with_create2_without_factory(web3, contract_assets):
+    contract_interface = contract_assets["TestContract"]
+
+    with pytest.raises(ValueError):
+        deploy_compiled_contract_with_create2(
+            abi=contract_interface["abi"],
+            bytecode=contract_interface["bytecode"],
+            web3=web3,
+            salt=b"\x02" * 32,
+            constructor_args=(5,),
+        )
+
+
+@pytest.fixture()
+def deploy_with_state(web3, contract_assets, tmp_path):
+    contract_interface = contract_assets["TestContract"]
+    state_path = str(tmp_path / "state" / "deployments.json")
+
+    def deploy(constructor_args=(5,)):
+        return deploy_compiled_contract(
+            abi=contract_interface["abi"],
+            bytecode=contract_interface["bytecode"],
+            web3=web3,
+            constructor_args=constructor_args,
+            deployment_state=DeploymentState(state_path),
+            name="TestContract",
+        )
+
+    return deploy
+
+
+def test_deploy_reuses_recorded_deployment(web3, deploy_with_state):
+    contract = deploy_with_state()
+    block_number = web3.eth.blockNumber
+
+    redeployed_contract = deploy_with_state()
+
+    assert redeployed_contract.address == contract.address
+    assert web3.eth.blockNumber == block_number
+
+
+def test_deploy_with_changed_arguments_deploys_again(deploy_with_state):
+    contract = deploy_with_state((5,))
+
+    redeployed_contract = deploy_with_state((6,))
+
+    assert redeployed_contract.address != contract.address
+    assert redeployed_contract.functions.state().call() == 6
+
+
+def test_deploy_without_recorded_code_deploys_again(web3, deploy_with_state):
+    snapshot = web3.testing.snapshot()
+    deploy_with_state()
+    web3.testing.revert(snapshot)
+    web3.testing.mine(1)
+
+    contract = deploy_with_state()
+
+    assert web3.eth.getCode(contract.address)
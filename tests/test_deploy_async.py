@@ -0,0 +1,112 @@
+import asyncio
+import threading
+
+import pytest
+from eth_utils import is_address
+
+from deploy_tools.deploy_async import (
+    ReceiptWatcher,
+    deploy_compiled_contract_async,
+    send_function_call_transaction_async,
+)
+
+
+def run(coroutine):
+    return asyncio.get_event_loop().run_until_complete(coroutine)
+
+
+@pytest.fixture()
+def test_contract(deploy_contract):
+    return deploy_contract("TestContract", constructor_args=(4,))
+
+
+def test_deploy_contracts_concurrently(web3, contract_assets, account_keys):
+    contract_interface = contract_assets["TestContract"]
+    receipt_watcher = ReceiptWatcher(web3, poll_interval=0.01)
+
+    async def deploy_all():
+        return await asyncio.gather(
+            *[
+                deploy_compiled_contract_async(
+                    abi=contract_interface["abi"],
+                    bytecode=contract_interface["bytecode"],
+                    web3=web3,
+                    constructor_args=(value,),
+                    private_key=account_keys[1],
+                    receipt_watcher=receipt_watcher,
+                )
+                for value in range(3)
+            ]
+        )
+
+    contracts = run(deploy_all())
+
+    assert all(is_address(contract.address) for contract in contracts)
+    assert [contract.functions.state().call() for contract in contracts] == [0, 1, 2]
+    assert receipt_watcher.pending_transaction_hashes == []
+
+
+def test_send_function_call_transaction_async(test_contract, web3):
+    receipt = run(
+        send_function_call_transaction_async(
+            test_contract.functions.set(200), web3=web3
+        )
+    )
+
+    assert receipt.status
+    assert test_contract.functions.state().call() == 200
+
+
+def test_receipt_watcher_timeout(web3):
+    receipt_watcher = ReceiptWatcher(web3, poll_interval=0.01)
+
+    with pytest.raises(asyncio.TimeoutError):
+        run(receipt_watcher.wait_for_receipt(b"\x01" * 32, timeout=0.05))
+
+    assert receipt_watcher.pending_transaction_hashes == []
+
+
+def test_send_function_call_transactions_async_in_new_event_loops(test_contract, web3):
+    async def send_all(values):
+        return await asyncio.gather(
+            *[
+                send_function_call_transaction_async(
+                    test_contract.functions.set(value), web3=web3
+                )
+                for value in values
+            ]
+        )
+
+    for values in [(1, 2), (3, 4)]:
+        loop = asyncio.new_event_loop()
+        try:
+            receipts = loop.run_until_complete(send_all(values))
+        finally:
+            loop.close()
+        assert all(receipt.status for receipt in receipts)
+
+    assert test_contract.functions.state().call() == 4
+
+
+def test_requests_of_web3_are_made_by_one_thread(web3, monkeypatch):
+    threads = set()
+    make_request = web3.manager._make_request
+
+    def recording_make_request(method, params):
+        threads.add(threading.current_thread())
+        return make_request(method, params)
+
+    monkeypatch.setattr(web3.manager, "_make_request", recording_make_request)
+
+    # deploys a contract returning 4
+    contract = run(
+        deploy_compiled_contract_async(
+            abi=[],
+            bytecode="0x600a600c600039600a6000f3600460005260206000f3",
+            web3=web3,
+        )
+    )
+
+    assert is_address(contract.address)
+    assert len(threads) == 1
+    assert threading.current_thread() not in threads
@@ -1,8 +1,20 @@
 import pytest
 import csv
+import json
+import multiprocessing
+import os
 
 from eth_utils import to_checksum_address
-from deploy_tools.files import read_addresses_in_csv, InvalidAddressException
+from deploy_tools.files import (
+    read_addresses_in_csv,
+    InvalidAddressException,
+    file_lock,
+    iterate_csv_rows,
+    iterate_addresses_in_csv,
+    InvalidAddressRow,
+    replace_json_asset,
+    write_pretty_json_asset,
+)
 
 
 @pytest.fixture()
@@ -50,3 +62,98 @@ def test_read_addresses_in_csv(address_list_csv_path, address_list):
 def test_read_incorrect_addresses_in_csv(incorrect_list_csv_path):
     with pytest.raises(InvalidAddressException):
         read_addresses_in_csv(incorrect_list_csv_path)
+
+
+def test_iterate_csv_rows(address_list_csv_path, address_list):
+    rows = list(iterate_csv_rows(address_list_csv_path, start_row=28))
+
+    assert rows == [
+        (28, [to_checksum_address(address_list[28])]),
+        (29, [to_checksum_address(address_list[29])]),
+    ]
+
+
+@pytest.mark.parametrize("processes", [None, 2])
+def test_iterate_addresses_in_csv(address_list_csv_path, address_list, processes):
+    chunks = list(
+        iterate_addresses_in_csv(
+            address_list_csv_path, chunk_size=7, processes=processes
+        )
+    )
+
+    assert [len(chunk.addresses) for chunk in chunks] == [7, 7, 7, 7, 2]
+    assert [address for chunk in chunks for address in chunk.addresses] == [
+        to_checksum_address(address) for address in address_list
+    ]
+
+
+def test_iterate_incorrect_addresses_in_csv(incorrect_list_csv_path, address_list):
+    chunks = list(iterate_addresses_in_csv(incorrect_list_csv_path, chunk_size=100))
+
+    assert len(chunks[0].addresses) == len(address_list)
+    assert chunks[0].invalid_rows == [
+        InvalidAddressRow(line_number=len(address_list) + 1, value="0")
+    ]
+
+
+def test_invalid_address_line_number_after_multiline_value(tmp_path):
+    csv_path = tmp_path / "addresses.csv"
+    address = "0x" + "ab" * 20
+    csv_path.write_text(f'{address},"a note\nover two lines"\n0,invalid\n')
+
+    (chunk,) = iterate_addresses_in_csv(str(csv_path))
+
+    assert chunk.invalid_rows == [InvalidAddressRow(line_number=3, value="0")]
+
+
+def append_line_with_lock(lock_path, file_path, line):
+    with file_lock(lock_path):
+        with open(file_path, "a") as f:
+            f.write(line + "\n")
+
+
+def test_file_lock_blocks_other_processes(tmp_path):
+    lock_path = tmp_path / "test.lock"
+    file_path = tmp_path / "lines.txt"
+
+    with file_lock(lock_path):
+        process = multiprocessing.Process(
+            target=append_line_with_lock, args=(lock_path, file_path, "second")
+        )
+        process.start()
+        process.join(timeout=0.5)
+        assert process.is_alive()
+        file_path.write_text("first\n")
+
+    process.join()
+    assert file_path.read_text() == "first\nsecond\n"
+
+
+def test_replace_json_asset(tmp_path):
+    asset_path = str(tmp_path / "asset.json")
+
+    assert replace_json_asset({"a": [1, 2]}, asset_path)
+    with open(asset_path) as file:
+        assert file.read() == '{"a":[1,2]}'
+    assert os.listdir(tmp_path) == ["asset.json"]
+
+
+def test_replace_json_asset_unchanged(tmp_path):
+    asset_path = str(tmp_path / "asset.json")
+    write_pretty_json_asset({"a": 1}, asset_path)
+    os.utime(asset_path, ns=(0, 0))
+
+    assert not write_pretty_json_asset({"a": 1}, asset_path)
+    assert os.stat(asset_path).st_mtime_ns == 0
+    assert os.listdir(tmp_path) == ["asset.json"]
+
+
+def test_replace_json_asset_changed(tmp_path):
+    asset_path = str(tmp_path / "asset.json")
+    write_pretty_json_asset({"a": 1}, asset_path)
+    os.chmod(asset_path, 0o640)
+
+    assert write_pretty_json_asset({"a": 2}, asset_path)
+    with open(asset_path) as file:
+        assert json.load(file) == {"a": 2}
+    assert os.stat(asset_path).st_mode & 0o777 == 0o640
@@ -0,0 +1,104 @@
+import pytest
+
+from deploy_tools.deploy import send_function_call_transaction
+from deploy_tools.gas import GasEstimator, create_simulation_web3
+
+
+@pytest.fixture()
+def test_contract(deploy_contract):
+    return deploy_contract("TestContract", constructor_args=(4,))
+
+
+def test_estimate_is_cached_for_same_calls(test_contract, web3):
+    gas_estimator = GasEstimator(web3, multiplier=2)
+
+    first_estimate = gas_estimator.estimate_gas(test_contract.functions.set(1))
+    second_estimate = gas_estimator.estimate_gas(test_contract.functions.set(1))
+
+    assert first_estimate == second_estimate
+    assert first_estimate == 2 * test_contract.functions.set(1).estimateGas()
+    assert len(gas_estimator.estimates) == 1
+
+
+def test_estimates_differ_for_different_arguments(test_contract, web3):
+    gas_estimator = GasEstimator(web3)
+
+    assert gas_estimator.key(test_contract.functions.set(1)) != gas_estimator.key(
+        test_contract.functions.set(2)
+    )
+
+
+def test_estimates_differ_for_different_functions(test_contract, web3):
+    gas_estimator = GasEstimator(web3)
+
+    assert gas_estimator.key(test_contract.functions.set(1)) != gas_estimator.key(
+        test_contract.functions.duplicatedDifferentArgumentLength(1, 2)
+    )
+
+
+def test_constructor_estimate_is_independent_of_chain(web3, contract_assets):
+    contract_interface = contract_assets["TestContract"]
+
+    def constructor_call(web3):
+        return web3.eth.contract(
+            abi=contract_interface["abi"], bytecode=contract_interface["bytecode"]
+        ).constructor(1)
+
+    simulation_web3 = create_simulation_web3()
+    simulation_gas_estimator = GasEstimator(simulation_web3)
+    simulation_gas_estimator.estimate_gas(constructor_call(simulation_web3))
+
+    gas_estimator = GasEstimator(web3, estimates=simulation_gas_estimator.estimates)
+    assert gas_estimator.key(constructor_call(web3)) in gas_estimator.estimates
+
+
+def test_send_transaction_with_gas_estimator(test_contract, web3, account_keys):
+    gas_estimator = GasEstimator(web3)
+
+    receipt = send_function_call_transaction(
+        test_contract.functions.set(200),
+        web3=web3,
+        private_key=account_keys[0],
+        gas_estimator=gas_estimator,
+    )
+
+    assert receipt.status
+    assert test_contract.functions.state().call() == 200
+    assert len(gas_estimator.estimates) == 1
+
+
+def test_labelled_address_arguments_share_estimate(web3):
+    # init code deploying a contract returning 4, the constructor argument is ignored
+    bytecode = "0x600a600c600039600a6000f3600460005260206000f3"
+    abi = [
+        {
+            "type": "constructor",
+            "inputs": [{"name": "other", "type": "address"}],
+            "stateMutability": "nonpayable",
+        }
+    ]
+    other_address = "0x" + "11" * 20
+
+    def constructor_call(web3, address):
+        return web3.eth.contract(abi=abi, bytecode=bytecode).constructor(address)
+
+    simulation_web3 = create_simulation_web3()
+    simulation_address = simulation_web3.eth.accounts[1]
+    simulation_gas_estimator = GasEstimator(
+        simulation_web3, address_labels={"Other": simulation_address}
+    )
+    simulation_gas_estimator.estimate_gas(
+        constructor_call(simulation_web3, simulation_address)
+    )
+
+    gas_estimator = GasEstimator(
+        web3,
+        estimates=simulation_gas_estimator.estimates,
+        address_labels={"Other": other_address},
+    )
+    assert gas_estimator.key(constructor_call(web3, other_address)) in (
+        gas_estimator.estimates
+    )
+    assert gas_estimator.key(constructor_call(web3, simulation_address)) not in (
+        gas_estimator.estimates
+    )
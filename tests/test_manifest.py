@@ -0,0 +1,62 @@
+import json
+
+import pytest
+
+from deploy_tools.manifest import (
+    load_deployment_manifest,
+    resolve_manifest_args,
+    ManifestEntry,
+    InvalidManifestException,
+)
+
+
+@pytest.fixture()
+def write_manifest(tmp_path):
+    def write(manifest):
+        manifest_path = tmp_path / "manifest.json"
+        manifest_path.write_text(json.dumps(manifest))
+        return manifest_path
+
+    return write
+
+
+def test_load_manifest(write_manifest):
+    manifest_path = write_manifest(
+        {
+            "deployments": [
+                {"name": "other", "contractName": "OtherContract"},
+                {"contractName": "TestContract", "args": [4, {"ref": "other"}]},
+            ]
+        }
+    )
+
+    assert load_deployment_manifest(manifest_path) == [
+        ManifestEntry("other", "OtherContract", []),
+        ManifestEntry("TestContract", "TestContract", [4, {"ref": "other"}]),
+    ]
+
+
+@pytest.mark.parametrize(
+    "manifest",
+    [
+        {},
+        {"deployments": [{"name": "other"}]},
+        {"deployments": [{"contractName": "A"}, {"contractName": "A"}]},
+        {"deployments": [{"contractName": "A", "args": [{"ref": "B"}]}]},
+        {"deployments": [{"contractName": "A", "args": [[1, 2]]}]},
+    ],
+)
+def test_load_invalid_manifest(write_manifest, manifest):
+    with pytest.raises(InvalidManifestException):
+        load_deployment_manifest(write_manifest(manifest))
+
+
+def test_resolve_manifest_args():
+    addresses = {"other": "0x00D6Cc1BA9cf89BD2e58009741f4F7325BAdc0ED"}
+
+    assert resolve_manifest_args([1, True, "0x00", {"ref": "other"}], addresses) == [
+        "1",
+        "true",
+        "0x00",
+        "0x00D6Cc1BA9cf89BD2e58009741f4F7325BAdc0ED",
+    ]
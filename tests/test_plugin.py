@@ -1,10 +1,39 @@
 import pytest
 
+from deploy_tools.plugin import get_compilation_cache
+
+
+scenario_setups = []
+
 
 @pytest.fixture()
 def contract(deploy_contract):
     return deploy_contract("TestContract", constructor_args=(4,))
 
 
+@pytest.fixture()
+def scenario_contract(deployment_scenario, deploy_contract):
+    def setup():
+        scenario_setups.append(1)
+        return deploy_contract("TestContract", constructor_args=(4,))
+
+    return deployment_scenario("test_scenario", setup)
+
+
 def test_call(contract):
     assert contract.functions.testFunction(3).call() == 7
+
+
+def test_contract_assets_are_cached(pytestconfig, contract_assets):
+    compilation_cache = get_compilation_cache(pytestconfig)
+
+    assert list(compilation_cache.cache_dir.glob("*.json"))
+
+
+@pytest.mark.parametrize("value", [5, 6])
+def test_deployment_scenario_is_set_up_once(scenario_contract, value, web3):
+    assert scenario_contract.functions.state().call() == 4
+    scenario_contract.functions.set(value).transact()
+    assert scenario_contract.functions.state().call() == value
+
+    assert len(scenario_setups) == 1
@@ -0,0 +1,81 @@
+import pytest
+from web3.exceptions import TimeExhausted
+
+from deploy_tools.receipts import ReceiptTracker
+
+
+@pytest.fixture()
+def send_transaction(web3, accounts):
+    def send():
+        return web3.eth.sendTransaction(
+            {"from": accounts[0], "to": accounts[1], "value": 1, "gas": 21000}
+        )
+
+    return send
+
+
+def test_wait_for_receipt(web3, send_transaction):
+    tx_hash = send_transaction()
+
+    receipt = ReceiptTracker(web3).wait_for_receipt(tx_hash)
+
+    assert receipt["transactionHash"] == tx_hash
+
+
+def test_wait_for_receipts_fetches_all_receipts_at_once(web3, send_transaction):
+    tx_hashes = [send_transaction() for _ in range(3)]
+    receipt_tracker = ReceiptTracker(web3)
+    for tx_hash in tx_hashes:
+        receipt_tracker.track(tx_hash)
+
+    assert set(receipt_tracker.poll()) == set(tx_hashes)
+    assert receipt_tracker.pending_transaction_hashes == []
+    receipts = receipt_tracker.wait_for_receipts(tx_hashes)
+    assert [receipts[tx_hash]["transactionHash"] for tx_hash in tx_hashes] == tx_hashes
+
+
+def test_confirmations(web3, send_transaction):
+    reached_confirmations = []
+    receipt_tracker = ReceiptTracker(
+        web3,
+        confirmations=3,
+        on_confirmation=lambda tx_hash, confirmations: reached_confirmations.append(
+            confirmations
+        ),
+    )
+    tx_hash = send_transaction()
+    receipt_tracker.track(tx_hash)
+
+    assert receipt_tracker.poll() == {}
+    web3.testing.mine(1)
+    assert receipt_tracker.poll() == {}
+    web3.testing.mine(1)
+    assert tx_hash in receipt_tracker.poll()
+    assert reached_confirmations == [1, 2, 3]
+
+
+def test_reorganization(web3, send_transaction):
+    reorganized = []
+    receipt_tracker = ReceiptTracker(
+        web3, confirmations=2, on_reorganization=reorganized.append
+    )
+    snapshot = web3.testing.snapshot()
+    tx_hash = send_transaction()
+    receipt_tracker.track(tx_hash)
+    receipt_tracker.poll()
+
+    web3.testing.revert(snapshot)
+    web3.testing.mine(2)
+
+    assert receipt_tracker.poll() == {}
+    assert reorganized == [tx_hash]
+    assert receipt_tracker.pending_transaction_hashes == [tx_hash]
+
+
+def test_wait_for_receipt_timeout(web3):
+    receipt_tracker = ReceiptTracker(web3, poll_interval=0.01)
+
+    with pytest.raises(TimeExhausted):
+        receipt_tracker.wait_for_receipt(b"\x01" * 32, timeout=0.05)
+
+    assert receipt_tracker.pending_transaction_hashes == []
@@ -0,0 +1,194 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+import pytest
+from web3 import Web3
+
+from deploy_tools.rpc import (
+    BatchingHTTPProvider,
+    call_functions,
+    make_batch_request,
+    prefill_transaction_options,
+)
+from deploy_tools.deploy import send_function_call_transaction
+from deploy_tools.server import CommandServer
+
+
+def _encode_bytes(value):
+    return "0x" + bytes(value).hex()
+
+
+@pytest.fixture()
+def json_rpc_url(web3):
+    """Serves the json rpc api of the test chain via http"""
+    backend = web3.provider
+
+    def handle_call(call):
+        if call["method"] == "eth_call":
+            # nodes do not require the sender of a call, unlike the test chain
+            call["params"][0].setdefault("from", web3.eth.accounts[0])
+        response = backend.make_request(call["method"], call["params"])
+        return dict(response, jsonrpc="2.0", id=call["id"])
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            request = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+            if isinstance(request, list):
+                response = [handle_call(call) for call in request]
+            else:
+                response = handle_call(request)
+            body = json.dumps(response, default=_encode_bytes).encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = HTTPServer(("127.0.0.1", 0), Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_port}"
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture()
+def batching_web3(json_rpc_url):
+    return Web3(BatchingHTTPProvider(json_rpc_url))
+
+
+def test_batch_request_is_one_request(batching_web3, web3):
+    block_number, gas_price = make_batch_request(
+        batching_web3, [("eth_blockNumber", []), ("eth_gasPrice", [])]
+    )
+
+    assert block_number == web3.eth.blockNumber
+    assert gas_price == web3.eth.gasPrice
+    assert batching_web3.provider.statistics.request_count == 1
+    assert batching_web3.provider.statistics.call_count == 2
+
+
+def test_batch_request_without_batching_provider(web3, accounts):
+    (transaction_count,) = make_batch_request(
+        web3, [("eth_getTransactionCount", [accounts[0], "pending"])]
+    )
+
+    assert transaction_count == web3.eth.getTransactionCount(accounts[0], "pending")
+
+
+def test_batch_request_error(batching_web3):
+    with pytest.raises(ValueError):
+        make_batch_request(batching_web3, [("eth_unknownMethod", [])])
+
+
+def test_prefill_transaction_options(batching_web3, web3, accounts):
+    transaction_options = prefill_transaction_options(
+        batching_web3, {"gas": 100_000}, sender=accounts[0], include_chain_id=True
+    )
+
+    assert transaction_options == {
+        "gas": 100_000,
+        "nonce": web3.eth.getTransactionCount(accounts[0], "pending"),
+        "gasPrice": web3.eth.gasPrice,
+        "chainId": web3.eth.chainId,
+    }
+    assert batching_web3.provider.statistics.request_count == 1
+
+
+def test_batch_request_return_exceptions(batching_web3, web3):
+    block_number, error = make_batch_request(
+        batching_web3,
+        [("eth_blockNumber", []), ("eth_unknownMethod", [])],
+        return_exceptions=True,
+    )
+
+    assert block_number == web3.eth.blockNumber
+    assert isinstance(error, ValueError)
+
+
+def test_send_transaction_with_batching_provider(
+    batching_web3, deploy_contract, account_keys
+):
+    test_contract = deploy_contract("TestContract", constructor_args=(4,))
+    contract = batching_web3.eth.contract(
+        address=test_contract.address, abi=test_contract.abi
+    )
+
+    receipt = send_function_call_transaction(
+        contract.functions.set(1), web3=batching_web3, private_key=account_keys[0]
+    )
+
+    assert receipt.status
+    assert test_contract.functions.state().call() == 1
+
+
+@pytest.mark.parametrize("use_batching", [True, False])
+def test_call_functions(batching_web3, web3, deploy_contract, use_batching):
+    if use_batching:
+        web3 = batching_web3
+    test_contract = deploy_contract("TestContract", constructor_args=(4,))
+    contract = web3.eth.contract(address=test_contract.address, abi=test_contract.abi)
+    no_contract = web3.eth.contract(address="0x" + "11" * 20, abi=test_contract.abi)
+
+    outcomes = call_functions(
+        web3,
+        [
+            contract.functions.state(),
+            no_contract.functions.state(),
+            contract.functions.state(),
+        ],
+    )
+
+    assert [outcome.successful for outcome in outcomes] == [True, False, True]
+    assert outcomes[0].result == outcomes[2].result == 4
+
+
+def test_rpc_stats_of_commands_run_by_server(json_rpc_url, web3, accounts, tmp_path):
+    # deploys a contract returning 4
+    receipt = web3.eth.waitForTransactionReceipt(
+        web3.eth.sendTransaction(
+            {
+                "from": accounts[0],
+                "data": "0x600a600c600039600a6000f3600460005260206000f3",
+            }
+        )
+    )
+    abi = [
+        {
+            "type": "function",
+            "name": "state",
+            "inputs": [],
+            "outputs": [{"name": "", "type": "uint256"}],
+            "stateMutability": "view",
+        }
+    ]
+    (tmp_path / "contracts.json").write_text(
+        json.dumps({"C": {"abi": abi, "bytecode": "0x"}})
+    )
+    command_server = CommandServer()
+    args = [
+        "--rpc-stats",
+        "call",
+        "--jsonrpc",
+        json_rpc_url,
+        "--compiled-contracts",
+        "contracts.json",
+        "--contract-address",
+        receipt["contractAddress"],
+        "C",
+        "state",
+    ]
+
+    results = [command_server.run_command(args, str(tmp_path)) for _ in range(2)]
+
+    assert [result["stdout"] for result in results] == ["4\n", "4\n"]
+    # the second command reports only its own requests, the same as the first one
+    request_counts = [
+        result["stderr"].split(", total latency")[0] for result in results
+    ]
+    assert request_counts[0].startswith("RPC stats: ")
+    assert request_counts[0] == request_counts[1]
@@ -0,0 +1,141 @@
+import os
+import shutil
+import tempfile
+import threading
+
+import pytest
+from click.testing import CliRunner
+from eth_utils import is_address
+
+from deploy_tools.assets import LazyContractAssets
+from deploy_tools.cache import CompilationCache
+from deploy_tools.cli import main
+from deploy_tools.ipc import IPCServer
+from deploy_tools.server import CommandServer
+
+
+@pytest.fixture()
+def command_server():
+    return CommandServer()
+
+
+@pytest.fixture()
+def server_socket_path(command_server, monkeypatch):
+    # the path of a unix socket is limited to about 100 characters, which tmp_path might exceed
+    socket_dir = tempfile.mkdtemp()
+    socket_path = os.path.join(socket_dir, "server.sock")
+    monkeypatch.setenv("DEPLOY_TOOLS_SERVER_SOCKET", socket_path)
+    server = IPCServer(socket_path, command_server.handle_request)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield socket_path
+    server.shutdown()
+    server.server_close()
+    shutil.rmtree(socket_dir)
+
+
+@pytest.fixture()
+def root_dir():
+    return os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+
+
+def test_run_command(root_dir):
+    result = CommandServer().run_command(["call", "--help"], root_dir)
+
+    assert result["exitCode"] == 0
+    assert "Usage" in result["stdout"]
+
+
+def test_run_command_error(root_dir):
+    result = CommandServer().run_command(["deploy", "--gas", "x", "A"], root_dir)
+
+    assert result["exitCode"] == 2
+    assert "Invalid value" in result["stderr"]
+
+
+def test_commands_are_forwarded_to_server(
+    command_server, server_socket_path, root_dir, monkeypatch
+):
+    monkeypatch.chdir(root_dir)
+    runner = CliRunner()
+    result = runner.invoke(main, "deploy OtherContract -d testcontracts --jsonrpc test")
+    second_result = runner.invoke(
+        main, "deploy OtherContract -d testcontracts --jsonrpc test"
+    )
+
+    assert result.exit_code == 0
+    assert second_result.exit_code == 0
+    assert is_address(second_result.output.strip())
+    assert len(command_server.compiled_contracts) == 1
+    assert list(command_server.web3_connections) == ["test"]
+
+
+def test_compiled_contracts_of_older_version_are_replaced(command_server):
+    command_server.get_compiled_contracts(("path", 1), lambda: {"A": 1})
+    compiled_contracts = command_server.get_compiled_contracts(
+        ("path", 2), lambda: {"A": 2}
+    )
+
+    assert compiled_contracts == {"A": 2}
+    assert len(command_server.compiled_contracts) == 1
+
+
+def test_replaced_compiled_contracts_are_closed(command_server, tmp_path):
+    contracts_path = tmp_path / "contracts.json"
+    contracts_path.write_text('{"A": {"abi": []}}')
+    lazy_contract_assets = LazyContractAssets(
+        str(contracts_path),
+        offset_index_cache=CompilationCache(str(tmp_path / "offsets")),
+    )
+    command_server.get_compiled_contracts(("path", 1), lambda: lazy_contract_assets)
+    command_server.get_compiled_contracts(("path", 2), dict)
+
+    with pytest.raises(ValueError):
+        lazy_contract_assets["A"]
+
+
+def test_environment_is_forwarded_to_server(
+    command_server, server_socket_path, root_dir, monkeypatch
+):
+    environments = []
+
+    def run_command(args, cwd, environment=None):
+        environments.append(environment)
+        return {"exitCode": 0, "stdout": "", "stderr": ""}
+
+    monkeypatch.setattr(command_server, "run_command", run_command)
+    monkeypatch.setenv("SOLC_BINARY", "/opt/solc")
+    monkeypatch.delenv("DEPLOY_TOOLS_CACHE_DIR", raising=False)
+
+    result = CliRunner().invoke(main, "call --help")
+
+    assert result.exit_code == 0
+    assert environments[0]["SOLC_BINARY"] == "/opt/solc"
+    assert environments[0]["DEPLOY_TOOLS_CACHE_DIR"] is None
+
+
+def test_run_command_restores_environment(root_dir, monkeypatch):
+    monkeypatch.setenv("SOLC_BINARY", "/opt/solc")
+    monkeypatch.delenv("XDG_CACHE_HOME", raising=False)
+
+    CommandServer().run_command(
+        ["call", "--help"], root_dir, {"SOLC_BINARY": None, "XDG_CACHE_HOME": "/tmp"}
+    )
+
+    assert os.environ["SOLC_BINARY"] == "/opt/solc"
+    assert "XDG_CACHE_HOME" not in os.environ
+
+
+def test_command_runs_without_server_if_forwarding_fails(
+    command_server, server_socket_path, monkeypatch
+):
+    def run_command(args, cwd, environment=None):
+        raise ValueError("Can not run the command")
+
+    monkeypatch.setattr(command_server, "run_command", run_command)
+
+    result = CliRunner().invoke(main, "call --help")
+
+    assert result.exit_code == 0
+    assert "without the server" in result.output
+    assert "Usage" in result.output
@@ -0,0 +1,80 @@
+import os
+
+import pytest
+
+from deploy_tools.watch import SourceWatcher
+
+
+@pytest.fixture()
+def contracts_dir(tmp_path):
+    (tmp_path / "sub").mkdir()
+    (tmp_path / "A.sol").write_text("contract A {}")
+    (tmp_path / "sub" / "B.sol").write_text("contract B {}")
+    (tmp_path / "notes.txt").write_text("")
+    return tmp_path
+
+
+@pytest.fixture()
+def watcher(contracts_dir):
+    return SourceWatcher(str(contracts_dir))
+
+
+def _touch_later(path):
+    """Sets the modification time of the path into the future, so that a change within the same tick is seen"""
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+
+def test_watcher_finds_files(watcher, contracts_dir):
+    assert watcher.file_paths == [
+        str(contracts_dir / "A.sol"),
+        str(contracts_dir / "sub" / "B.sol"),
+    ]
+    assert not watcher.poll()
+
+
+def test_watcher_sees_changed_file(watcher, contracts_dir):
+    (contracts_dir / "A.sol").write_text("contract A { uint a; }")
+
+    assert watcher.poll()
+    assert not watcher.poll()
+
+
+def test_watcher_sees_added_file(watcher, contracts_dir):
+    (contracts_dir / "sub" / "C.sol").write_text("contract C {}")
+    _touch_later(contracts_dir / "sub")
+
+    assert watcher.poll()
+    assert str(contracts_dir / "sub" / "C.sol") in watcher.file_paths
+
+
+def test_watcher_sees_added_directory(watcher, contracts_dir):
+    (contracts_dir / "other").mkdir()
+    (contracts_dir / "other" / "D.sol").write_text("contract D {}")
+    _touch_later(contracts_dir)
+
+    assert watcher.poll()
+    assert str(contracts_dir / "other" / "D.sol") in watcher.file_paths
+
+
+def test_watcher_sees_removed_file(watcher, contracts_dir):
+    (contracts_dir / "sub" / "B.sol").unlink()
+
+    assert watcher.poll()
+    assert watcher.file_paths == [str(contracts_dir / "A.sol")]
+
+
+def test_watcher_ignores_other_files(watcher, contracts_dir):
+    (contracts_dir / "notes.txt").write_text("changed")
+    (contracts_dir / "A.sol.swp").write_text("")
+    _touch_later(contracts_dir)
+
+    assert not watcher.poll()
+
+
+def test_wait_for_change_debounces(watcher, contracts_dir):
+    (contracts_dir / "A.sol").write_text("contract A { uint a; }")
+
+    watcher.wait_for_change(poll_interval=0.01, debounce_time=0.01)
+
+    assert not watcher.poll()